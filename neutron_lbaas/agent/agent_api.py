@@ -22,6 +22,8 @@ class LbaasAgentApi(object):
 
     # history
     #   1.0 Initial version
+    #   1.1 Add get_loadbalancers, update_loadbalancers_stats
+    #   1.2 Add update_statuses
 
     def __init__(self, topic, context, host):
         self.context = context
@@ -38,6 +40,11 @@ class LbaasAgentApi(object):
         return cctxt.call(self.context, 'get_loadbalancer',
                           loadbalancer_id=loadbalancer_id)
 
+    def get_loadbalancers(self, loadbalancer_ids):
+        cctxt = self.client.prepare(version='1.1')
+        return cctxt.call(self.context, 'get_loadbalancers',
+                          loadbalancer_ids=loadbalancer_ids)
+
     def loadbalancer_deployed(self, loadbalancer_id):
         cctxt = self.client.prepare()
         return cctxt.call(self.context, 'loadbalancer_deployed',
@@ -51,6 +58,10 @@ class LbaasAgentApi(object):
                           provisioning_status=provisioning_status,
                           operating_status=operating_status)
 
+    def update_statuses(self, statuses):
+        cctxt = self.client.prepare(version='1.2')
+        return cctxt.cast(self.context, 'update_statuses', statuses=statuses)
+
     def loadbalancer_destroyed(self, loadbalancer_id):
         cctxt = self.client.prepare()
         return cctxt.call(self.context, 'loadbalancer_destroyed',
@@ -70,3 +81,8 @@ class LbaasAgentApi(object):
         cctxt = self.client.prepare()
         return cctxt.call(self.context, 'update_loadbalancer_stats',
                           loadbalancer_id=loadbalancer_id, stats=stats)
+
+    def update_loadbalancers_stats(self, stats):
+        cctxt = self.client.prepare(version='1.1')
+        return cctxt.cast(self.context, 'update_loadbalancers_stats',
+                          stats=stats)
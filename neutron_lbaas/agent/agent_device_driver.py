@@ -15,6 +15,7 @@
 
 import abc
 
+from neutron.plugins.common import constants
 import six
 
 
@@ -65,6 +66,24 @@ class AgentDeviceDriver(object):
         # Not all drivers will support this
         raise NotImplementedError()
 
+    def get_last_update_time(self, loadbalancer_id):
+        """Returns when the loadbalancer was last changed on the device.
+
+        The time is a POSIX timestamp, None means the driver does not know
+        the loadbalancer or does not track changes.
+        """
+        return None
+
+    def defer_completion(self, loadbalancer_id, callback):
+        """Delays reporting a change until the device has applied it.
+
+        Drivers which apply the changes to a loadbalancer later keep
+        callback, call it with error=True or error=False once the pending
+        changes are applied and return True.  By default changes are
+        applied before the driver call returns and False is returned.
+        """
+        return False
+
 
 @six.add_metaclass(abc.ABCMeta)
 class BaseManager(object):
@@ -101,7 +120,24 @@ class BasePoolManager(BaseManager):
 
 
 class BaseMemberManager(BaseManager):
-    pass
+
+    def batch_update(self, old_pool, pool):
+        """Applies a batch of member changes to a pool.
+
+        Members of pool in PENDING_CREATE or PENDING_UPDATE were added or
+        changed by the batch.  Drivers that can apply the whole batch at
+        once should override this; by default every changed member is sent
+        through create or update.
+        """
+        old_members = dict((member.id, member) for member in old_pool.members)
+        for member in pool.members:
+            member.pool = pool
+            if member.provisioning_status == constants.PENDING_CREATE:
+                self.create(member)
+            elif member.provisioning_status == constants.PENDING_UPDATE:
+                old_member = old_members[member.id]
+                old_member.pool = old_pool
+                self.update(old_member, member)
 
 
 class BaseHealthMonitorManager(BaseManager):
@@ -13,6 +13,10 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import collections
+import functools
+
+import eventlet
 from neutron.agent import rpc as agent_rpc
 from neutron.common import exceptions as n_exc
 from neutron import context as ncontext
@@ -42,6 +46,31 @@ OPTS = [
                  'namespace_driver.HaproxyNSDriver'],
         help=_('Drivers used to manage loadbalancing devices'),
     ),
+    cfg.IntOpt(
+        'sync_state_workers',
+        default=1,
+        help=_('Number of loadbalancers deployed concurrently when the '
+               'agent resyncs its state with the server'),
+    ),
+    cfg.StrOpt(
+        'sync_state_order',
+        default='none',
+        choices=['none', 'recently_updated'],
+        help=_('Order in which loadbalancers are deployed during a resync. '
+               '"recently_updated" deploys the loadbalancers whose '
+               'configuration changed most recently on this agent first, '
+               'loadbalancers never deployed here come before all others.'),
+    ),
+    cfg.FloatOpt(
+        'status_update_window',
+        default=0,
+        help=_('Seconds during which the status updates are collected and '
+               'coalesced before being sent to the server in one '
+               'update_statuses cast. 0 sends every update with its own '
+               'update_status call. Only set it when the server supports '
+               'RPC API 1.2, older servers drop the cast and the objects '
+               'stay pending.'),
+    ),
 ]
 
 
@@ -53,7 +82,9 @@ class LbaasAgentManager(periodic_task.PeriodicTasks):
 
     # history
     #   1.0 Initial version
-    target = oslo_messaging.Target(version='1.0')
+    #   1.1 Add update_members
+    #   1.2 Add create_loadbalancers
+    target = oslo_messaging.Target(version='1.2')
 
     def __init__(self, conf):
         super(LbaasAgentManager, self).__init__(conf)
@@ -71,7 +102,8 @@ class LbaasAgentManager(periodic_task.PeriodicTasks):
             'binary': 'neutron-lbaasv2-agent',
             'host': conf.host,
             'topic': lb_const.LOADBALANCER_AGENTV2,
-            'configurations': {'device_drivers': self.device_drivers.keys()},
+            'configurations': {'device_drivers': self.device_drivers.keys(),
+                               'rpc_api_version': self.target.version},
             'agent_type': lb_const.AGENT_TYPE_LOADBALANCERV2,
             'start_flag': True}
         self.admin_state_up = True
@@ -80,6 +112,14 @@ class LbaasAgentManager(periodic_task.PeriodicTasks):
         self.needs_resync = False
         # pool_id->device_driver_name mapping used to store known instances
         self.instance_mapping = {}
+        # loadbalancer_id->stats last sent to the plugin
+        self.sent_stats = {}
+        # whether the plugin serves the bulk calls of RPC API 1.1
+        self.bulk_rpc_supported = False
+        # (obj_type, obj_id)->[provisioning_status, operating_status] not
+        # sent yet, flushed by _status_flush once the window is over
+        self.pending_statuses = collections.OrderedDict()
+        self._status_flush = None
 
     def _load_drivers(self):
         self.device_drivers = {}
@@ -132,29 +172,66 @@ class LbaasAgentManager(periodic_task.PeriodicTasks):
 
     @periodic_task.periodic_task(spacing=6)
     def collect_stats(self, context):
+        changed_stats = {}
         for loadbalancer_id, driver_name in self.instance_mapping.items():
             driver = self.device_drivers[driver_name]
             try:
                 stats = driver.loadbalancer.get_stats(loadbalancer_id)
-                if stats:
-                    self.plugin_rpc.update_loadbalancer_stats(
-                        loadbalancer_id, stats)
+                if stats and stats != self.sent_stats.get(loadbalancer_id):
+                    changed_stats[loadbalancer_id] = stats
             except Exception:
                 LOG.exception(_LE('Error updating statistics on loadbalancer'
                                   ' %s'),
                               loadbalancer_id)
                 self.needs_resync = True
 
+        for loadbalancer_id in (set(self.sent_stats) -
+                                set(self.instance_mapping)):
+            del self.sent_stats[loadbalancer_id]
+
+        if not changed_stats:
+            return
+        if self.bulk_rpc_supported:
+            self._send_stats_batch(changed_stats)
+        else:
+            for loadbalancer_id, stats in changed_stats.items():
+                try:
+                    self.plugin_rpc.update_loadbalancer_stats(
+                        loadbalancer_id, stats)
+                    self.sent_stats[loadbalancer_id] = stats
+                except Exception:
+                    LOG.exception(_LE('Error updating statistics on '
+                                      'loadbalancer %s'),
+                                  loadbalancer_id)
+                    self.needs_resync = True
+
+    def _send_stats_batch(self, changed_stats):
+        stats_list = [{'loadbalancer_id': loadbalancer_id, 'stats': stats}
+                      for loadbalancer_id, stats in changed_stats.items()]
+        try:
+            self.plugin_rpc.update_loadbalancers_stats(stats_list)
+            self.sent_stats.update(changed_stats)
+        except Exception:
+            LOG.exception(_LE('Error updating statistics on loadbalancers'))
+            self.needs_resync = True
+
     def sync_state(self):
         known_instances = set(self.instance_mapping.keys())
+        # casts of statistics are not acknowledged, so send everything again
+        # after a resync in case some of them were lost
+        self.sent_stats = {}
         try:
             ready_instances = set(self.plugin_rpc.get_ready_devices())
 
             for deleted_id in known_instances - ready_instances:
                 self._destroy_loadbalancer(deleted_id)
 
-            for loadbalancer_id in ready_instances:
-                self._reload_loadbalancer(loadbalancer_id)
+            loadbalancers = self._get_loadbalancers(ready_instances)
+            pool = eventlet.GreenPool(max(1, self.conf.sync_state_workers))
+            for loadbalancer_id in self._sync_order(ready_instances):
+                pool.spawn_n(self._reload_loadbalancer, loadbalancer_id,
+                             loadbalancers.get(loadbalancer_id))
+            pool.waitall()
 
         except Exception:
             LOG.exception(_LE('Unable to retrieve ready devices'))
@@ -162,6 +239,40 @@ class LbaasAgentManager(periodic_task.PeriodicTasks):
 
         self.remove_orphans()
 
+    def _get_loadbalancers(self, loadbalancer_ids):
+        """Fetches the given loadbalancers from the server in one call.
+
+        Servers which predate get_loadbalancers reject the call, in which
+        case an empty mapping is returned and every loadbalancer is fetched
+        on its own while it is reloaded.  The outcome also tells whether
+        the server accepts the other bulk calls of RPC API 1.1, so the call
+        is made even when there is nothing to fetch.
+        """
+        try:
+            loadbalancers = self.plugin_rpc.get_loadbalancers(
+                list(loadbalancer_ids))
+        except oslo_messaging.RemoteError as e:
+            if e.exc_type != 'UnsupportedVersion':
+                raise
+            LOG.info(_LI('Plugin does not support get_loadbalancers, '
+                         'fetching loadbalancers one by one'))
+            self.bulk_rpc_supported = False
+            return {}
+        self.bulk_rpc_supported = True
+        return dict((lb['id'], lb) for lb in loadbalancers)
+
+    def _sync_order(self, loadbalancer_ids):
+        if self.conf.sync_state_order != 'recently_updated':
+            return list(loadbalancer_ids)
+
+        def last_update(loadbalancer_id):
+            times = [driver.get_last_update_time(loadbalancer_id)
+                     for driver in self.device_drivers.values()]
+            times = [t for t in times if t is not None]
+            return max(times) if times else float('inf')
+
+        return sorted(loadbalancer_ids, key=last_update, reverse=True)
+
     def _get_driver(self, loadbalancer_id):
         if loadbalancer_id not in self.instance_mapping:
             raise DeviceNotFoundOnAgent(loadbalancer_id=loadbalancer_id)
@@ -169,17 +280,18 @@ class LbaasAgentManager(periodic_task.PeriodicTasks):
         driver_name = self.instance_mapping[loadbalancer_id]
         return self.device_drivers[driver_name]
 
-    def _reload_loadbalancer(self, loadbalancer_id):
+    def _reload_loadbalancer(self, loadbalancer_id, loadbalancer_dict=None):
         try:
-            loadbalancer_dict = self.plugin_rpc.get_loadbalancer(
-                loadbalancer_id)
+            if loadbalancer_dict is None:
+                loadbalancer_dict = self.plugin_rpc.get_loadbalancer(
+                    loadbalancer_id)
             loadbalancer = data_models.LoadBalancer.from_dict(
                 loadbalancer_dict)
             driver_name = loadbalancer.provider.device_driver
             if driver_name not in self.device_drivers:
                 LOG.error(_LE('No device driver on agent: %s.'), driver_name)
-                self.plugin_rpc.update_status(
-                    'loadbalancer', loadbalancer_id, constants.ERROR)
+                self._send_status('loadbalancer', loadbalancer_id,
+                                  provisioning_status=constants.ERROR)
                 return
 
             self.device_drivers[driver_name].deploy_instance(loadbalancer)
@@ -232,6 +344,50 @@ class LbaasAgentManager(periodic_task.PeriodicTasks):
                     self._destroy_loadbalancer(loadbalancer_id)
             LOG.info(_LI("Agent_updated by server side %s!"), payload)
 
+    def _send_status(self, obj_type, obj_id, provisioning_status=None,
+                     operating_status=None):
+        window = self.conf.status_update_window
+        if window <= 0:
+            self.plugin_rpc.update_status(
+                obj_type, obj_id, provisioning_status=provisioning_status,
+                operating_status=operating_status)
+            return
+        statuses = self.pending_statuses.setdefault((obj_type, obj_id),
+                                                    [None, None])
+        if provisioning_status:
+            statuses[0] = provisioning_status
+        if operating_status:
+            statuses[1] = operating_status
+        if self._status_flush is None:
+            self._status_flush = eventlet.spawn_after(window,
+                                                      self.flush_statuses)
+
+    def flush_statuses(self):
+        """Sends the status updates collected since the last flush."""
+        self._status_flush = None
+        pending = self.pending_statuses
+        self.pending_statuses = collections.OrderedDict()
+        if not pending:
+            return
+        statuses = [(obj_type, obj_id, p_status, o_status)
+                    for (obj_type, obj_id), (p_status, o_status)
+                    in pending.items()]
+        try:
+            self.plugin_rpc.update_statuses(statuses)
+        except Exception:
+            LOG.exception(_LE('Error updating statuses'))
+            self.needs_resync = True
+
+    def _report_completion(self, driver, loadbalancer_id, report):
+        """Reports a successful driver call once the device applied it.
+
+        report sends the statuses and takes an error keyword.  Drivers
+        which apply changes to the loadbalancer later keep it and call it
+        with the outcome, otherwise it is called right away.
+        """
+        if not driver.defer_completion(loadbalancer_id, report):
+            report()
+
     def _update_statuses(self, obj, error=False):
         lb_p_status = constants.ACTIVE
         lb_o_status = None
@@ -251,19 +407,34 @@ class LbaasAgentManager(periodic_task.PeriodicTasks):
             lb = obj
         else:
             lb = obj.root_loadbalancer
-            self.plugin_rpc.update_status(obj_type, obj.id,
-                                          provisioning_status=obj_p_status,
-                                          operating_status=obj_o_status)
-        self.plugin_rpc.update_status('loadbalancer', lb.id,
-                                      provisioning_status=lb_p_status,
-                                      operating_status=lb_o_status)
+            self._send_status(obj_type, obj.id,
+                              provisioning_status=obj_p_status,
+                              operating_status=obj_o_status)
+        self._send_status('loadbalancer', lb.id,
+                          provisioning_status=lb_p_status,
+                          operating_status=lb_o_status)
+
+    def _update_members_statuses(self, pool, error=False):
+        p_status = constants.ACTIVE
+        o_status = lb_const.ONLINE
+        if error:
+            p_status = constants.ERROR
+            o_status = lb_const.OFFLINE
+        for member in pool.members:
+            if member.provisioning_status in (constants.PENDING_CREATE,
+                                              constants.PENDING_UPDATE):
+                self._send_status('member', member.id,
+                                  provisioning_status=p_status,
+                                  operating_status=o_status)
+        self._send_status('loadbalancer', pool.listener.loadbalancer.id,
+                          provisioning_status=constants.ACTIVE)
 
     def create_loadbalancer(self, context, loadbalancer, driver_name):
         loadbalancer = data_models.LoadBalancer.from_dict(loadbalancer)
         if driver_name not in self.device_drivers:
             LOG.error(_LE('No device driver on agent: %s.'), driver_name)
-            self.plugin_rpc.update_status('loadbalancer', loadbalancer.id,
-                                          provisioning_status=constants.ERROR)
+            self._send_status('loadbalancer', loadbalancer.id,
+                              provisioning_status=constants.ERROR)
             return
         driver = self.device_drivers[driver_name]
         try:
@@ -273,7 +444,14 @@ class LbaasAgentManager(periodic_task.PeriodicTasks):
                                             driver.get_name())
         else:
             self.instance_mapping[loadbalancer.id] = driver_name
-            self._update_statuses(loadbalancer)
+            self._report_completion(
+                driver, loadbalancer.id,
+                functools.partial(self._update_statuses, loadbalancer))
+
+    def create_loadbalancers(self, context, loadbalancers, driver_name):
+        """Deploys the load balancers rescheduled to this agent."""
+        for loadbalancer in loadbalancers:
+            self.create_loadbalancer(context, loadbalancer, driver_name)
 
     def update_loadbalancer(self, context, old_loadbalancer, loadbalancer):
         loadbalancer = data_models.LoadBalancer.from_dict(loadbalancer)
@@ -285,7 +463,9 @@ class LbaasAgentManager(periodic_task.PeriodicTasks):
             self._handle_failed_driver_call('update', loadbalancer,
                                             driver.get_name())
         else:
-            self._update_statuses(loadbalancer)
+            self._report_completion(
+                driver, loadbalancer.id,
+                functools.partial(self._update_statuses, loadbalancer))
 
     def delete_loadbalancer(self, context, loadbalancer):
         loadbalancer = data_models.LoadBalancer.from_dict(loadbalancer)
@@ -302,7 +482,9 @@ class LbaasAgentManager(periodic_task.PeriodicTasks):
             self._handle_failed_driver_call('create', listener,
                                             driver.get_name())
         else:
-            self._update_statuses(listener)
+            self._report_completion(
+                driver, listener.loadbalancer.id,
+                functools.partial(self._update_statuses, listener))
 
     def update_listener(self, context, old_listener, listener):
         listener = data_models.Listener.from_dict(listener)
@@ -314,7 +496,9 @@ class LbaasAgentManager(periodic_task.PeriodicTasks):
             self._handle_failed_driver_call('update', listener,
                                             driver.get_name())
         else:
-            self._update_statuses(listener)
+            self._report_completion(
+                driver, listener.loadbalancer.id,
+                functools.partial(self._update_statuses, listener))
 
     def delete_listener(self, context, listener):
         listener = data_models.Listener.from_dict(listener)
@@ -329,7 +513,9 @@ class LbaasAgentManager(periodic_task.PeriodicTasks):
         except Exception:
             self._handle_failed_driver_call('create', pool, driver.get_name())
         else:
-            self._update_statuses(pool)
+            self._report_completion(
+                driver, pool.listener.loadbalancer.id,
+                functools.partial(self._update_statuses, pool))
 
     def update_pool(self, context, old_pool, pool):
         pool = data_models.Pool.from_dict(pool)
@@ -340,7 +526,9 @@ class LbaasAgentManager(periodic_task.PeriodicTasks):
         except Exception:
             self._handle_failed_driver_call('create', pool, driver.get_name())
         else:
-            self._update_statuses(pool)
+            self._report_completion(
+                driver, pool.listener.loadbalancer.id,
+                functools.partial(self._update_statuses, pool))
 
     def delete_pool(self, context, pool):
         pool = data_models.Pool.from_dict(pool)
@@ -356,7 +544,9 @@ class LbaasAgentManager(periodic_task.PeriodicTasks):
             self._handle_failed_driver_call('create', member,
                                             driver.get_name())
         else:
-            self._update_statuses(member)
+            self._report_completion(
+                driver, member.pool.listener.loadbalancer.id,
+                functools.partial(self._update_statuses, member))
 
     def update_member(self, context, old_member, member):
         member = data_models.Member.from_dict(member)
@@ -368,13 +558,31 @@ class LbaasAgentManager(periodic_task.PeriodicTasks):
             self._handle_failed_driver_call('create', member,
                                             driver.get_name())
         else:
-            self._update_statuses(member)
+            self._report_completion(
+                driver, member.pool.listener.loadbalancer.id,
+                functools.partial(self._update_statuses, member))
 
     def delete_member(self, context, member):
         member = data_models.Member.from_dict(member)
         driver = self._get_driver(member.pool.listener.loadbalancer.id)
         driver.member.delete(member)
 
+    def update_members(self, context, old_pool, pool):
+        pool = data_models.Pool.from_dict(pool)
+        old_pool = data_models.Pool.from_dict(old_pool)
+        driver = self._get_driver(pool.listener.loadbalancer.id)
+        try:
+            driver.member.batch_update(old_pool, pool)
+        except Exception:
+            LOG.exception(_LE('Member batch update for pool %(id)s failed on '
+                              'device driver %(driver)s'),
+                          {'id': pool.id, 'driver': driver.get_name()})
+            self._update_members_statuses(pool, error=True)
+        else:
+            self._report_completion(
+                driver, pool.listener.loadbalancer.id,
+                functools.partial(self._update_members_statuses, pool))
+
     def create_healthmonitor(self, context, healthmonitor):
         healthmonitor = data_models.HealthMonitor.from_dict(healthmonitor)
         driver = self._get_driver(healthmonitor.pool.listener.loadbalancer.id)
@@ -384,7 +592,9 @@ class LbaasAgentManager(periodic_task.PeriodicTasks):
             self._handle_failed_driver_call('create', healthmonitor,
                                             driver.get_name())
         else:
-            self._update_statuses(healthmonitor)
+            self._report_completion(
+                driver, healthmonitor.pool.listener.loadbalancer.id,
+                functools.partial(self._update_statuses, healthmonitor))
 
     def update_healthmonitor(self, context, old_healthmonitor,
                              healthmonitor):
@@ -398,7 +608,9 @@ class LbaasAgentManager(periodic_task.PeriodicTasks):
             self._handle_failed_driver_call('create', healthmonitor,
                                             driver.get_name())
         else:
-            self._update_statuses(healthmonitor)
+            self._report_completion(
+                driver, healthmonitor.pool.listener.loadbalancer.id,
+                functools.partial(self._update_statuses, healthmonitor))
 
     def delete_healthmonitor(self, context, healthmonitor):
         healthmonitor = data_models.HealthMonitor.from_dict(healthmonitor)
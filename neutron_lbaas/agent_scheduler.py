@@ -13,18 +13,29 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import abc
+import datetime
+import functools
 import random
 
+import eventlet
+from neutron import context as ncontext
 from neutron.db import agents_db
 from neutron.db import agentschedulers_db
 from neutron.db import model_base
+from oslo_config import cfg
 from oslo_log import log as logging
+from oslo_service import loopingcall
+from oslo_utils import timeutils
 import six
 import sqlalchemy as sa
 from sqlalchemy import orm
 from sqlalchemy.orm import joinedload
 
+from neutron_lbaas._i18n import _LE
+from neutron_lbaas._i18n import _LI
 from neutron_lbaas._i18n import _LW
+from neutron_lbaas.db.loadbalancer import models
 from neutron_lbaas.extensions import lbaas_agentschedulerv2
 from neutron_lbaas.services.loadbalancer import constants as lb_const
 
@@ -53,6 +64,8 @@ class LbaasAgentSchedulerDbMixin(agentschedulers_db.AgentSchedulerDbMixin,
 
     agent_notifiers = {}
 
+    _lbaas_agent_status_check = None
+
     def get_agent_hosting_loadbalancer(self, context,
                                        loadbalancer_id, active=None):
         query = context.session.query(LoadbalancerAgentBinding)
@@ -97,9 +110,181 @@ class LbaasAgentSchedulerDbMixin(agentschedulers_db.AgentSchedulerDbMixin,
                 candidates.append(agent)
         return candidates
 
+    def get_lbaas_agent_loads(self, context, agent_ids):
+        """Returns the load of every given agent with a single query.
+
+        :returns: dict of agent id to a (load balancer count, active
+                  connections, bytes in and out) tuple, all zero for the
+                  agents hosting nothing
+        """
+        loads = dict((agent_id, (0, 0, 0)) for agent_id in agent_ids)
+        if not loads:
+            return loads
+        stats = models.LoadBalancerStatistics
+        query = context.session.query(
+            LoadbalancerAgentBinding.agent_id,
+            sa.func.count(LoadbalancerAgentBinding.loadbalancer_id),
+            sa.func.coalesce(sa.func.sum(stats.active_connections), 0),
+            sa.func.coalesce(sa.func.sum(stats.bytes_in + stats.bytes_out),
+                             0))
+        query = query.outerjoin(
+            stats,
+            stats.loadbalancer_id == LoadbalancerAgentBinding.loadbalancer_id)
+        query = query.filter(
+            LoadbalancerAgentBinding.agent_id.in_(list(loads)))
+        query = query.group_by(LoadbalancerAgentBinding.agent_id)
+        for agent_id, instances, connections, traffic in query:
+            loads[agent_id] = (instances, int(connections), int(traffic))
+        return loads
+
+    def start_periodic_lbaas_agent_status_check(self, plugin):
+        """Starts rescheduling the load balancers of dead agents.
 
-class ChanceScheduler(object):
-    """Allocate a loadbalancer agent for a vip in a random way."""
+        Nothing is started unless allow_automatic_lbaas_agent_failover is
+        set.  The first check is delayed until the agents had the time to
+        report after a restart of the server.
+        """
+        if not cfg.CONF.allow_automatic_lbaas_agent_failover:
+            LOG.info(_LI("Skipping periodic lbaas agent status check because "
+                         "automatic rescheduling is disabled."))
+            return
+        if self._lbaas_agent_status_check is not None:
+            return
+        loop = loopingcall.FixedIntervalLoopingCall(
+            self.reschedule_loadbalancers_from_down_agents, plugin)
+        interval = max(cfg.CONF.agent_down_time // 2, 1)
+        initial_delay = (cfg.CONF.agent_down_time * 2 +
+                         random.randint(0, interval))
+        loop.start(interval=interval, initial_delay=initial_delay)
+        self._lbaas_agent_status_check = loop
+
+    def reschedule_loadbalancers_from_down_agents(self, plugin):
+        """Moves the load balancers of the dead lbaas agents elsewhere.
+
+        An enabled agent is dead once it has not reported for twice
+        agent_down_time.
+        """
+        context = ncontext.get_admin_context()
+        cutoff = timeutils.utcnow() - datetime.timedelta(
+            seconds=cfg.CONF.agent_down_time * 2)
+        try:
+            query = context.session.query(agents_db.Agent.id)
+            query = query.filter(
+                agents_db.Agent.agent_type ==
+                lb_const.AGENT_TYPE_LOADBALANCERV2,
+                agents_db.Agent.admin_state_up == sa.true(),
+                agents_db.Agent.heartbeat_timestamp < cutoff,
+                agents_db.Agent.id.in_(
+                    context.session.query(LoadbalancerAgentBinding.agent_id)))
+            dead_agent_ids = [row[0] for row in query]
+        except Exception:
+            LOG.exception(_LE("Failed to look up dead lbaas agents"))
+            return
+        for agent_id in dead_agent_ids:
+            LOG.warn(_LW("Rescheduling load balancers from dead lbaas agent "
+                         "%s"), agent_id)
+            try:
+                self._reschedule_lbaas_agent_loadbalancers(plugin, context,
+                                                           agent_id)
+            except Exception:
+                LOG.exception(_LE("Failed to reschedule load balancers from "
+                                  "lbaas agent %s"), agent_id)
+
+    def evacuate_lbaas_agent(self, context, plugin, agent_id):
+        """Disables an lbaas agent and moves its load balancers elsewhere.
+
+        The load balancers are rescheduled in parallel, at most
+        loadbalancer_evacuation_concurrency at a time.
+
+        :returns: the ids of the load balancers moved
+        :raises: InvalidLbaasAgent if the agent is not a LBaaS agent
+        """
+        agent = self._get_agent(context, agent_id)
+        if agent.agent_type != lb_const.AGENT_TYPE_LOADBALANCERV2:
+            raise lbaas_agentschedulerv2.InvalidLbaasAgent(id=agent_id)
+        if agent.admin_state_up:
+            self.update_agent(context, agent_id,
+                              {'agent': {'admin_state_up': False}})
+        return self._reschedule_lbaas_agent_loadbalancers(
+            plugin, context, agent_id,
+            concurrency=cfg.CONF.loadbalancer_evacuation_concurrency)
+
+    def _reschedule_lbaas_agent_loadbalancers(self, plugin, context,
+                                              agent_id, concurrency=1):
+        """Rebinds the load balancers of an agent through the scheduler.
+
+        The load balancers are rebound in batches of
+        loadbalancer_reschedule_batch_size, every batch ending with one
+        create_loadbalancers cast per new agent.  Agents older than RPC API
+        1.2 get one create_loadbalancer cast per load balancer instead.  A
+        load balancer that cannot be rescheduled stays on its agent.
+        """
+        query = context.session.query(
+            LoadbalancerAgentBinding.loadbalancer_id)
+        query = query.filter_by(agent_id=agent_id)
+        loadbalancer_ids = [row[0] for row in query]
+        batch_size = max(cfg.CONF.loadbalancer_reschedule_batch_size, 1)
+        pool = eventlet.GreenPool(max(concurrency, 1))
+        reschedule = functools.partial(self._reschedule_loadbalancer,
+                                       plugin, agent_id)
+        moved = []
+        for start in range(0, len(loadbalancer_ids), batch_size):
+            batch = loadbalancer_ids[start:start + batch_size]
+            notifications = {}
+            for result in pool.imap(reschedule, batch):
+                if result is None:
+                    continue
+                loadbalancer, agent, driver = result
+                moved.append(loadbalancer.id)
+                key = (agent['host'], driver,
+                       self._supports_create_loadbalancers(agent))
+                notifications.setdefault(key, []).append(loadbalancer)
+            for (host, driver, bulk), loadbalancers in notifications.items():
+                if bulk:
+                    driver.agent_rpc.create_loadbalancers(
+                        context, loadbalancers, host, driver.device_driver)
+                    continue
+                for loadbalancer in loadbalancers:
+                    driver.agent_rpc.create_loadbalancer(
+                        context, loadbalancer, host, driver.device_driver)
+        return moved
+
+    def _supports_create_loadbalancers(self, agent):
+        # The agents report the version of their RPC API since 1.2, which
+        # added create_loadbalancers.
+        version = self.get_configuration_dict(agent).get('rpc_api_version')
+        if not version:
+            return False
+        return tuple(int(part) for part in version.split('.')) >= (1, 2)
+
+    def _reschedule_loadbalancer(self, plugin, agent_id, loadbalancer_id):
+        # every green thread needs a session of its own
+        context = ncontext.get_admin_context()
+        try:
+            with context.session.begin(subtransactions=True):
+                query = context.session.query(LoadbalancerAgentBinding)
+                query = query.filter_by(loadbalancer_id=loadbalancer_id,
+                                        agent_id=agent_id)
+                if not query.delete(synchronize_session=False):
+                    # rescheduled or deleted meanwhile
+                    return None
+                loadbalancer = self.get_loadbalancer(context,
+                                                     loadbalancer_id)
+                driver = plugin.drivers[loadbalancer.provider.provider_name]
+                agent = driver.loadbalancer_scheduler.schedule(
+                    plugin, context, loadbalancer, driver.device_driver)
+                if not agent:
+                    raise lbaas_agentschedulerv2.NoEligibleLbaasAgent(
+                        loadbalancer_id=loadbalancer_id)
+        except Exception:
+            LOG.exception(_LE("Failed to reschedule load balancer %s"),
+                          loadbalancer_id)
+            return None
+        return loadbalancer, agent, driver
+
+
+@six.add_metaclass(abc.ABCMeta)
+class SchedulerBase(object):
 
     def schedule(self, plugin, context, loadbalancer, device_driver):
         """Schedule the load balancer to an active loadbalancer agent if there
@@ -130,7 +315,7 @@ class ChanceScheduler(object):
                          device_driver)
                 return
 
-            chosen_agent = random.choice(candidates)
+            chosen_agent = self._schedule(candidates, plugin, context)
             binding = LoadbalancerAgentBinding()
             binding.agent = chosen_agent
             binding.loadbalancer_id = loadbalancer.id
@@ -142,3 +327,38 @@ class ChanceScheduler(object):
                     'agent_id': chosen_agent['id']}
             )
             return chosen_agent
+
+    @abc.abstractmethod
+    def _schedule(self, candidates, plugin, context):
+        pass
+
+
+class ChanceScheduler(SchedulerBase):
+
+    def _schedule(self, candidates, plugin, context):
+        """Allocate a loadbalancer agent for a vip in a random way."""
+        return random.choice(candidates)
+
+
+class LeastLoadedScheduler(SchedulerBase):
+
+    def _schedule(self, candidates, plugin, context):
+        """Pick the agent with the lowest weighted load from candidates.
+
+        The load of an agent is the sum of its load balancer count, the
+        active connections and the bytes of the load balancers it hosts,
+        weighted by the loadbalancer_scheduler_*_weight options.  Ties go
+        to the first candidate.
+        """
+        conf = cfg.CONF
+        loads = plugin.db.get_lbaas_agent_loads(
+            context, [agent['id'] for agent in candidates])
+
+        def score(agent):
+            instances, connections, traffic = loads[agent['id']]
+            return (conf.loadbalancer_scheduler_instance_weight * instances +
+                    conf.loadbalancer_scheduler_connection_weight *
+                    connections +
+                    conf.loadbalancer_scheduler_traffic_weight * traffic)
+
+        return min(candidates, key=score)
@@ -15,6 +15,8 @@
 from oslo_config import cfg
 from stevedore import driver
 
+from neutron_lbaas.common.cert_manager import cached_cert_manager
+
 CONF = cfg.CONF
 
 CERT_MANAGER_DEFAULT = 'barbican'
@@ -23,12 +25,20 @@ cert_manager_opts = [
     cfg.StrOpt('cert_manager_type',
                default=CERT_MANAGER_DEFAULT,
                help='Certificate Manager plugin. '
-                    'Defaults to {0}.'.format(CERT_MANAGER_DEFAULT))
+                    'Defaults to {0}.'.format(CERT_MANAGER_DEFAULT)),
+    cfg.IntOpt('cache_ttl',
+               default=300,
+               help='Seconds a certificate read from the certificate '
+                    'manager is cached. 0 disables the cache.'),
+    cfg.IntOpt('cache_size',
+               default=256,
+               help='Most certificates kept in the cache.'),
 ]
 
 CONF.register_opts(cert_manager_opts, group='certificates')
 
 _CERT_MANAGER_PLUGIN = None
+_CACHED_CERT_MANAGER = None
 
 
 def get_backend():
@@ -38,3 +48,11 @@ def get_backend():
             "neutron_lbaas.cert_manager.backend",
             cfg.CONF.certificates.cert_manager_type).driver
     return _CERT_MANAGER_PLUGIN
+
+
+def get_cached_cert_manager():
+    """Returns the caching Cert Manager shared by the whole process."""
+    global _CACHED_CERT_MANAGER
+    if not _CACHED_CERT_MANAGER:
+        _CACHED_CERT_MANAGER = cached_cert_manager.CachingCertManager()
+    return _CACHED_CERT_MANAGER
@@ -0,0 +1,156 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import collections
+import threading
+import time
+
+import eventlet
+from oslo_config import cfg
+
+from neutron_lbaas.common.cert_manager import cert_manager
+
+CONF = cfg.CONF
+
+# Most parallel reads of a get_certs call.
+FETCH_CONCURRENCY = 10
+
+
+class _CacheEntry(object):
+
+    def __init__(self, cert, expires):
+        self.cert = cert
+        self.expires = expires
+        # consumer registrations already done for this cert
+        self.consumers = set()
+
+
+class CachingCertManager(cert_manager.CertManager):
+    """Cert Manager that caches the certs read from another Cert Manager.
+
+    Certs are cached by their ref for certificates.cache_ttl seconds and at
+    most certificates.cache_size of them are kept, the least recently used
+    ones being dropped first.  A read that registers as a consumer is only
+    passed on once per ref and consumer while the cert is cached.  Certs
+    can be dropped explicitly with invalidate, which should be done
+    whenever the containers of a listener change.
+
+    :param backend: the Cert Manager to read from, if not given the one of
+                    the configured backend is looked up on every call
+    """
+
+    def __init__(self, backend=None):
+        self._backend = backend
+        self._lock = threading.Lock()
+        self._cache = collections.OrderedDict()
+
+    @property
+    def backend(self):
+        if self._backend is not None:
+            return self._backend
+        # imported here as the package imports this module
+        from neutron_lbaas.common import cert_manager as cert_manager_pkg
+        return cert_manager_pkg.get_backend().CertManager
+
+    def _lookup(self, cert_ref):
+        with self._lock:
+            entry = self._cache.pop(cert_ref, None)
+            if entry is None:
+                return None
+            if entry.expires <= time.time():
+                return None
+            # re-inserting marks the entry as the most recently used one
+            self._cache[cert_ref] = entry
+            return entry
+
+    def _store(self, cert_ref, cert, consumer=None):
+        ttl = CONF.certificates.cache_ttl
+        size = CONF.certificates.cache_size
+        if ttl <= 0 or size <= 0:
+            return
+        with self._lock:
+            entry = self._cache.pop(cert_ref, None)
+            if entry is None or entry.expires <= time.time():
+                entry = _CacheEntry(cert, time.time() + ttl)
+            entry.cert = cert
+            if consumer is not None:
+                entry.consumers.add(consumer)
+            self._cache[cert_ref] = entry
+            while len(self._cache) > size:
+                self._cache.popitem(last=False)
+
+    def store_cert(self, certificate, private_key, intermediates=None,
+                   private_key_passphrase=None, **kwargs):
+        return self.backend.store_cert(
+            certificate, private_key, intermediates=intermediates,
+            private_key_passphrase=private_key_passphrase, **kwargs)
+
+    def get_cert(self, cert_ref, check_only=False, **kwargs):
+        consumer = None if check_only else tuple(sorted(kwargs.items()))
+        entry = self._lookup(cert_ref)
+        if entry is not None and (check_only or consumer in entry.consumers):
+            return entry.cert
+        cert = self.backend.get_cert(cert_ref, check_only=check_only,
+                                     **kwargs)
+        self._store(cert_ref, cert, consumer=consumer)
+        return cert
+
+    def get_certs(self, cert_refs, check_only=False, **kwargs):
+        """Retrieves several certs, reading the uncached ones in parallel.
+
+        :returns: the certs in the order of cert_refs
+        :raises Exception: the first error of the backend, if any
+        """
+        certs = {}
+        to_fetch = []
+        for cert_ref in cert_refs:
+            if cert_ref in certs or cert_ref in to_fetch:
+                continue
+            entry = self._lookup(cert_ref)
+            if entry is not None and check_only:
+                certs[cert_ref] = entry.cert
+            else:
+                to_fetch.append(cert_ref)
+
+        def fetch(cert_ref):
+            try:
+                return cert_ref, self.get_cert(cert_ref,
+                                               check_only=check_only,
+                                               **kwargs), None
+            except Exception as e:
+                return cert_ref, None, e
+
+        if len(to_fetch) == 1:
+            results = [fetch(to_fetch[0])]
+        else:
+            pool = eventlet.GreenPool(min(len(to_fetch) or 1,
+                                          FETCH_CONCURRENCY))
+            results = list(pool.imap(fetch, to_fetch))
+        for cert_ref, cert, error in results:
+            if error is not None:
+                raise error
+            certs[cert_ref] = cert
+        return [certs[cert_ref] for cert_ref in cert_refs]
+
+    def delete_cert(self, cert_ref, *args, **kwargs):
+        self.invalidate(cert_ref)
+        return self.backend.delete_cert(cert_ref, *args, **kwargs)
+
+    def invalidate(self, *cert_refs):
+        """Drops the given certs from the cache."""
+        with self._lock:
+            for cert_ref in cert_refs:
+                self._cache.pop(cert_ref, None)
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
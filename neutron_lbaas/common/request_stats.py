@@ -0,0 +1,82 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import collections
+import threading
+import time
+
+from oslo_log import log as logging
+
+from neutron_lbaas._i18n import _LI
+
+LOG = logging.getLogger(__name__)
+
+
+class RequestStats(object):
+    """Latency and error counters of the requests sent to a backend.
+
+    The counters are kept per method and endpoint.  endpoint is a function
+    mapping the path of a request to its endpoint, usually by leaving the
+    ids out, so the requests on every entity of a collection add up.
+
+    With a log_interval the counters are logged at info level by the first
+    request recorded once log_interval seconds have passed since the last
+    log, so nothing is logged while the backend is not used.
+    """
+
+    def __init__(self, endpoint, name=None, log_interval=0):
+        self.endpoint = endpoint
+        self.name = name
+        self.log_interval = log_interval
+        self._last_log = time.time()
+        self._lock = threading.Lock()
+        self._stats = collections.defaultdict(
+            lambda: {'requests': 0, 'errors': 0, 'retries': 0,
+                     'total_time': 0.0, 'max_time': 0.0})
+
+    def record(self, method, path, elapsed, error=False, retry=False):
+        with self._lock:
+            stats = self._stats[(method, self.endpoint(path))]
+            stats['requests'] += 1
+            stats['total_time'] += elapsed
+            stats['max_time'] = max(stats['max_time'], elapsed)
+            if error:
+                stats['errors'] += 1
+            if retry:
+                stats['retries'] += 1
+            now = time.time()
+            if (not self.log_interval or
+                    now - self._last_log < self.log_interval):
+                return
+            self._last_log = now
+            snapshot = self._snapshot()
+        self._log(snapshot)
+
+    def get(self):
+        """Returns a snapshot of the counters keyed by (method, endpoint)."""
+        with self._lock:
+            return self._snapshot()
+
+    def _snapshot(self):
+        return dict((key, dict(value)) for key, value in self._stats.items())
+
+    def _log(self, snapshot):
+        for (method, endpoint), stats in sorted(snapshot.items()):
+            LOG.info(_LI("%(name)s requests %(method)s %(endpoint)s: "
+                         "%(requests)d sent, %(errors)d failed, "
+                         "%(retries)d retried, %(mean).3fs mean, "
+                         "%(max).3fs max"),
+                     {'name': self.name, 'method': method,
+                      'endpoint': endpoint, 'requests': stats['requests'],
+                      'errors': stats['errors'], 'retries': stats['retries'],
+                      'mean': stats['total_time'] / stats['requests'],
+                      'max': stats['max_time']})
@@ -13,6 +13,11 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import collections
+import copy
+import hashlib
+import threading
+
 from cryptography.hazmat import backends
 from cryptography.hazmat.primitives import serialization
 import neutron_lbaas.common.exceptions as exceptions
@@ -25,6 +30,65 @@ import six
 X509_BEG = "-----BEGIN CERTIFICATE-----"
 X509_END = "-----END CERTIFICATE-----"
 
+# Most results kept by each of the memoized parsers below.
+MEMO_SIZE = 256
+
+
+class _DigestMemo(object):
+    """Bounded LRU of parse results keyed by a digest of their input.
+
+    Only the digest is kept as key, so the PEM data itself is not held
+    any longer than the results derived from it.
+    """
+
+    def __init__(self, size=MEMO_SIZE):
+        self.size = size
+        self._lock = threading.Lock()
+        self._results = collections.OrderedDict()
+
+    @staticmethod
+    def digest(*args):
+        digest = hashlib.sha256()
+        for arg in args:
+            if arg is None:
+                digest.update(b'-')
+                continue
+            if isinstance(arg, six.text_type):
+                arg = arg.encode('utf-8')
+            digest.update(six.b('%d:' % len(arg)))
+            digest.update(arg)
+        return digest.digest()
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key not in self._results:
+                return default
+            result = self._results.pop(key)
+            self._results[key] = result
+            return result
+
+    def set(self, key, result):
+        with self._lock:
+            self._results.pop(key, None)
+            self._results[key] = result
+            while len(self._results) > self.size:
+                self._results.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._results.clear()
+
+
+_VALID_CERTS = _DigestMemo()
+_PRIVATE_KEYS = _DigestMemo()
+_HOST_NAMES = _DigestMemo()
+
+
+def clear_memos():
+    """Forgets all memoized parse results."""
+    for memo in (_VALID_CERTS, _PRIVATE_KEYS, _HOST_NAMES):
+        memo.clear()
+
 
 def validate_cert(certificate, private_key=None,
                   private_key_passphrase=None, intermediates=None):
@@ -40,6 +104,21 @@ def validate_cert(certificate, private_key=None,
     :param intermediates: PEM encoded intermediate certificates
     :returns: boolean
     """
+    # Only successful validations are remembered, invalid input is
+    # checked again and raises the same error every time.
+    key = _VALID_CERTS.digest(certificate, private_key,
+                              private_key_passphrase, intermediates)
+    if _VALID_CERTS.get(key):
+        return True
+    _validate_cert(certificate, private_key=private_key,
+                   private_key_passphrase=private_key_passphrase,
+                   intermediates=intermediates)
+    _VALID_CERTS.set(key, True)
+    return True
+
+
+def _validate_cert(certificate, private_key=None,
+                   private_key_passphrase=None, intermediates=None):
     x509 = _get_x509_from_pem_bytes(certificate)
     if intermediates:
         for x509Pem in _split_x509s(intermediates):
@@ -53,7 +132,6 @@ def validate_cert(certificate, private_key=None,
             ctx.check_privatekey()
         except Exception:
             raise exceptions.MisMatchedKey
-    return True
 
 
 def _read_privatekey(privatekey_pem, passphrase=None):
@@ -117,7 +195,15 @@ def dump_private_key(private_key, private_key_passphrase=None):
     :param private_key_passphrase: private key passphrase
     :returns: Unencrypted private key in PKCS8
     """
+    key = _PRIVATE_KEYS.digest(private_key, private_key_passphrase)
+    pkcs8 = _PRIVATE_KEYS.get(key)
+    if pkcs8 is None:
+        pkcs8 = _dump_private_key(private_key, private_key_passphrase)
+        _PRIVATE_KEYS.set(key, pkcs8)
+    return pkcs8
 
+
+def _dump_private_key(private_key, private_key_passphrase=None):
     # re encode the key as unencrypted PKCS8
     pk = _read_pyca_private_key(private_key,
                                 private_key_passphrase=private_key_passphrase)
@@ -138,7 +224,16 @@ def get_host_names(certificate):
     'dns_names' is a list of dNSNames (possibly empty) from
     the SubjectAltNames of the certificate.
     """
+    key = _HOST_NAMES.digest(certificate)
+    host_names = _HOST_NAMES.get(key)
+    if host_names is None:
+        host_names = _get_host_names(certificate)
+        _HOST_NAMES.set(key, host_names)
+    # the callers get their own copy to modify
+    return copy.deepcopy(host_names)
+
 
+def _get_host_names(certificate):
     x509 = _get_x509_from_pem_bytes(certificate)
     hostNames = {}
     if hasattr(x509.get_subject(), 'CN'):
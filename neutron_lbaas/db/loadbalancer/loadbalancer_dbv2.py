@@ -26,6 +26,8 @@ from oslo_db import exception
 from oslo_log import log as logging
 from oslo_utils import excutils
 from oslo_utils import uuidutils
+import six
+import sqlalchemy as sa
 from sqlalchemy import orm
 from sqlalchemy.orm import exc
 
@@ -38,6 +40,57 @@ from neutron_lbaas.services.loadbalancer import data_models
 
 LOG = logging.getLogger(__name__)
 
+# Query profiles select how much of the object graph _get_resource and
+# _get_resources load along with the requested rows.
+#   full: the eager loading declared on the models
+#   list: the relationships of the requested rows are fetched by one extra
+#         query each instead of being joined into the main query
+#   status: only the columns, relationships are loaded if they are accessed
+#   stats: like status, plus the statistics of a load balancer
+#   graph: a load balancer together with its VIP port and listeners, as
+#          sent to agents
+QUERY_PROFILE_FULL = 'full'
+QUERY_PROFILE_LIST = 'list'
+QUERY_PROFILE_STATUS = 'status'
+QUERY_PROFILE_STATS = 'stats'
+QUERY_PROFILE_GRAPH = 'graph'
+
+
+# API attributes which are returned verbatim from a column of their model.
+# A list request asking only for these is answered from the columns alone.
+API_COLUMNS = {
+    models.LoadBalancer: frozenset([
+        'id', 'tenant_id', 'name', 'description', 'vip_subnet_id',
+        'vip_port_id', 'vip_address', 'provisioning_status',
+        'operating_status', 'admin_state_up']),
+    models.Listener: frozenset([
+        'id', 'tenant_id', 'name', 'description', 'default_pool_id',
+        'protocol', 'protocol_port', 'connection_limit', 'admin_state_up']),
+    models.PoolV2: frozenset([
+        'id', 'tenant_id', 'name', 'description', 'healthmonitor_id',
+        'protocol', 'lb_algorithm', 'admin_state_up']),
+    models.MemberV2: frozenset([
+        'id', 'tenant_id', 'name', 'pool_id', 'address', 'protocol_port',
+        'weight', 'admin_state_up', 'subnet_id']),
+    models.HealthMonitorV2: frozenset([
+        'id', 'tenant_id', 'name', 'type', 'delay', 'timeout',
+        'max_retries', 'http_method', 'url_path', 'expected_codes',
+        'admin_state_up'])
+}
+
+
+def _query_options(model, profile):
+    if profile == QUERY_PROFILE_LIST:
+        return [orm.subqueryload('*')]
+    if profile == QUERY_PROFILE_STATUS:
+        return [orm.lazyload('*')]
+    if profile == QUERY_PROFILE_STATS:
+        return [orm.lazyload('*'), orm.joinedload(model.stats)]
+    if profile == QUERY_PROFILE_GRAPH:
+        return [orm.joinedload(model.vip_port),
+                orm.subqueryload(model.listeners)]
+    return []
+
 
 class LoadBalancerPluginDbv2(base_db.CommonDbMixin,
                              agent_scheduler.LbaasAgentSchedulerDbMixin):
@@ -51,15 +104,15 @@ class LoadBalancerPluginDbv2(base_db.CommonDbMixin,
     def _core_plugin(self):
         return manager.NeutronManager.get_plugin()
 
-    def _get_resource(self, context, model, id, for_update=False):
+    def _get_resource(self, context, model, id, for_update=False,
+                      profile=QUERY_PROFILE_FULL):
         resource = None
         try:
+            query = self._model_query(context, model).filter(model.id == id)
+            query = query.options(*_query_options(model, profile))
             if for_update:
-                query = self._model_query(context, model).filter(
-                    model.id == id).with_lockmode('update')
-                resource = query.one()
-            else:
-                resource = self._get_by_id(context, model, id)
+                query = query.with_lockmode('update')
+            resource = query.one()
         except exc.NoResultFound:
             with excutils.save_and_reraise_exception(reraise=False) as ctx:
                 if issubclass(model, (models.LoadBalancer, models.Listener,
@@ -72,16 +125,57 @@ class LoadBalancerPluginDbv2(base_db.CommonDbMixin,
         return resource
 
     def _resource_exists(self, context, model, id):
-        try:
-            self._get_by_id(context, model, id)
-        except exc.NoResultFound:
-            return False
-        return True
-
-    def _get_resources(self, context, model, filters=None):
+        query = self._model_query(context, model).filter(model.id == id)
+        query = query.options(*_query_options(model, QUERY_PROFILE_STATUS))
+        return query.first() is not None
+
+    def _get_resources(self, context, model, filters=None,
+                       profile=QUERY_PROFILE_FULL, sorts=None, limit=None,
+                       marker=None, page_reverse=False):
+        marker_obj = self._get_pagination_marker(context, model, limit,
+                                                 marker)
+        query = self._get_collection_query(context, model,
+                                           filters=filters, sorts=sorts,
+                                           limit=limit, marker_obj=marker_obj,
+                                           page_reverse=page_reverse)
+        query = query.options(*_query_options(model, profile))
+        resources = [model_instance for model_instance in query]
+        if limit and page_reverse:
+            resources.reverse()
+        return resources
+
+    def _get_pagination_marker(self, context, model, limit, marker):
+        if not (limit and marker):
+            return None
+        return self._get_resource(context, model, marker,
+                                  profile=QUERY_PROFILE_STATUS)
+
+    def get_resource_columns(self, context, model, fields, filters=None,
+                             sorts=None, limit=None, marker=None,
+                             page_reverse=False):
+        """Lists resources as API dicts built from their columns only.
+
+        Neither the related rows nor the data models are loaded, which
+        makes large listings of a few attributes cheap.
+
+        :returns: a list of dicts holding the given fields, or None if any
+                  of the fields is not a plain column of the model
+        """
+        if not fields or not set(fields) <= API_COLUMNS.get(model, set()):
+            return None
+        fields = list(set(fields))
+        marker_obj = self._get_pagination_marker(context, model, limit,
+                                                 marker)
         query = self._get_collection_query(context, model,
-                                           filters=filters)
-        return [model_instance for model_instance in query]
+                                           filters=filters, sorts=sorts,
+                                           limit=limit, marker_obj=marker_obj,
+                                           page_reverse=page_reverse)
+        query = query.with_entities(*[getattr(model, field)
+                                      for field in fields])
+        resources = [dict(zip(fields, row)) for row in query]
+        if limit and page_reverse:
+            resources.reverse()
+        return resources
 
     def _create_port_for_load_balancer(self, context, lb_db, ip_address):
         # resolve subnet and create port
@@ -151,28 +245,82 @@ class LoadBalancerPluginDbv2(base_db.CommonDbMixin,
             raise loadbalancerv2.StateInvalid(id=id, state=status)
 
     def test_and_set_status(self, context, model, id, status):
-        with context.session.begin(subtransactions=True):
-            db_lb_child = None
+        """Sets the status of an object if its load balancer is not pending.
+
+        The load balancer is moved out of its current status by a single
+        conditional UPDATE instead of being locked and read, the affected
+        row count telling whether another request got there first.  If the
+        model passed in is not a load balancer, its root load balancer is
+        set to PENDING_UPDATE and the object to the status passed in.
+
+        :raises StateInvalid: if the load balancer is in a PENDING status
+        :raises EntityNotFound: if the object does not exist
+        """
+        pending = [constants.PENDING_CREATE, constants.PENDING_UPDATE,
+                   constants.PENDING_DELETE]
+        session = context.session
+        with session.begin(subtransactions=True):
             if model == models.LoadBalancer:
-                db_lb = self._get_resource(context, model, id, for_update=True)
+                lb_id = id
+                lb_status = status
             else:
-                db_lb_child = self._get_resource(context, model, id)
+                lb_id = self._get_root_loadbalancer_id(context, model, id)
+                lb_status = constants.PENDING_UPDATE
+            query = session.query(models.LoadBalancer).filter(
+                models.LoadBalancer.id == lb_id,
+                ~models.LoadBalancer.provisioning_status.in_(pending))
+            if not query.update({'provisioning_status': lb_status},
+                                synchronize_session=False):
+                # Either the load balancer is gone or it is pending, this
+                # raises the matching error.
                 db_lb = self._get_resource(context, models.LoadBalancer,
-                                           db_lb_child.root_loadbalancer.id)
-            # This method will raise an exception if modification is not
-            # allowed.
-            self.assert_modification_allowed(db_lb)
-
-            # if the model passed in is not a load balancer then we will
-            # set its root load balancer's provisioning status to
-            # PENDING_UPDATE and the model's status to the status passed in
-            # Otherwise we are just setting the load balancer's provisioning
-            # status to the status passed in
-            if db_lb_child:
-                db_lb.provisioning_status = constants.PENDING_UPDATE
-                db_lb_child.provisioning_status = status
+                                           lb_id,
+                                           profile=QUERY_PROFILE_STATUS)
+                self.assert_modification_allowed(db_lb)
+                raise loadbalancerv2.StateInvalid(
+                    id=lb_id, state=db_lb.provisioning_status)
+            self._expire_status(context, models.LoadBalancer, lb_id)
+            if model != models.LoadBalancer:
+                query = session.query(model).filter(model.id == id)
+                query.update({'provisioning_status': status},
+                             synchronize_session=False)
+                self._expire_status(context, model, id)
+
+    def _get_root_loadbalancer_id(self, context, model, id):
+        listener_cls = models.Listener
+        pool_cls = models.PoolV2
+        row = None
+        query = context.session.query(listener_cls.loadbalancer_id)
+        if model == listener_cls:
+            row = query.filter(listener_cls.id == id).first()
+        elif model in (pool_cls, models.MemberV2, models.HealthMonitorV2):
+            query = query.join(pool_cls,
+                               pool_cls.id == listener_cls.default_pool_id)
+            if model == pool_cls:
+                query = query.filter(pool_cls.id == id)
+            elif model == models.MemberV2:
+                query = query.join(models.MemberV2,
+                                   models.MemberV2.pool_id == pool_cls.id)
+                query = query.filter(models.MemberV2.id == id)
             else:
-                db_lb.provisioning_status = status
+                query = query.filter(pool_cls.healthmonitor_id == id)
+            row = query.first()
+        if row is not None:
+            return row[0]
+        # Other models, missing objects and objects outside of a load
+        # balancer graph go through the object, which raises accordingly.
+        db_lb_child = self._get_resource(context, model, id,
+                                         profile=QUERY_PROFILE_STATUS)
+        return db_lb_child.root_loadbalancer.id
+
+    def _expire_status(self, context, model, id,
+                       columns=('provisioning_status',)):
+        # The conditional UPDATEs bypass the objects already loaded in the
+        # session, make them read their status again.
+        key = sa.inspect(model).identity_key_from_primary_key([id])
+        db_obj = context.session.identity_map.get(key)
+        if db_obj is not None:
+            context.session.expire(db_obj, list(columns))
 
     def update_loadbalancer_provisioning_status(self, context, lb_id,
                                                 status=constants.ACTIVE):
@@ -182,17 +330,8 @@ class LoadBalancerPluginDbv2(base_db.CommonDbMixin,
     def update_status(self, context, model, id, provisioning_status=None,
                       operating_status=None):
         with context.session.begin(subtransactions=True):
-            if issubclass(model, models.LoadBalancer):
-                try:
-                    model_db = (self._model_query(context, model).
-                                filter(model.id == id).
-                                options(orm.noload('vip_port')).
-                                one())
-                except exc.NoResultFound:
-                    raise loadbalancerv2.EntityNotFound(
-                        name=models.LoadBalancer.NAME, id=id)
-            else:
-                model_db = self._get_resource(context, model, id)
+            model_db = self._get_resource(context, model, id,
+                                          profile=QUERY_PROFILE_STATUS)
             if provisioning_status and (model_db.provisioning_status !=
                                         provisioning_status):
                 model_db.provisioning_status = provisioning_status
@@ -200,6 +339,84 @@ class LoadBalancerPluginDbv2(base_db.CommonDbMixin,
                     model_db.operating_status != operating_status):
                 model_db.operating_status = operating_status
 
+    def get_status(self, context, model, id):
+        """Returns the (provisioning_status, operating_status) of an object.
+
+        Only the row of the object is read.  operating_status is None for
+        the models which have none.
+        """
+        model_db = self._get_resource(context, model, id,
+                                      profile=QUERY_PROFILE_STATUS)
+        return (model_db.provisioning_status,
+                getattr(model_db, 'operating_status', None))
+
+    def update_statuses(self, context, model, statuses):
+        """Updates the statuses of many objects of one model at once.
+
+        The rows are written in place by a single UPDATE ... SET
+        status = CASE id WHEN ... END WHERE id IN (...), without loading
+        them.  A status left to None is not changed.  The objects already
+        loaded in the session are expired so they read the new statuses.
+
+        :param statuses: dict of object id to a (provisioning_status,
+                         operating_status) tuple
+        :returns: the number of rows updated
+        """
+        table = model.__table__
+        values = {}
+        for index, column in enumerate(('provisioning_status',
+                                        'operating_status')):
+            if column not in table.c:
+                continue
+            whens = dict((obj_id, obj_statuses[index])
+                         for obj_id, obj_statuses in six.iteritems(statuses)
+                         if obj_statuses[index] is not None)
+            if whens:
+                values[column] = sa.case(whens, value=table.c.id,
+                                         else_=table.c[column])
+        if not values:
+            return 0
+        stmt = table.update().where(
+            table.c.id.in_(list(statuses))).values(**values)
+        with context.session.begin(subtransactions=True):
+            rowcount = context.session.execute(stmt).rowcount
+        for obj_id in statuses:
+            self._expire_status(context, model, obj_id, columns=values)
+        return rowcount
+
+    def activate_loadbalancer_graph(self, context, loadbalancer_id):
+        """Sets the pending objects of a load balancer graph to ACTIVE.
+
+        The load balancer, its listeners, pools, members and health monitors
+        in PENDING_CREATE or PENDING_UPDATE are written by one UPDATE per
+        table, the children being selected by subqueries on the load
+        balancer id, so nothing is loaded.  The objects already loaded in
+        the session are not refreshed before the transaction ends.
+        """
+        pending = [constants.PENDING_CREATE, constants.PENDING_UPDATE]
+        listener_cls = models.Listener
+        pool_cls = models.PoolV2
+        session = context.session
+        with session.begin(subtransactions=True):
+            pool_ids = session.query(listener_cls.default_pool_id).filter(
+                listener_cls.loadbalancer_id == loadbalancer_id)
+            hm_ids = session.query(pool_cls.healthmonitor_id).filter(
+                pool_cls.id.in_(pool_ids))
+            children = [
+                (models.LoadBalancer,
+                 models.LoadBalancer.id == loadbalancer_id),
+                (listener_cls,
+                 listener_cls.loadbalancer_id == loadbalancer_id),
+                (pool_cls, pool_cls.id.in_(pool_ids)),
+                (models.MemberV2, models.MemberV2.pool_id.in_(pool_ids)),
+                (models.HealthMonitorV2,
+                 models.HealthMonitorV2.id.in_(hm_ids))]
+            for model, criterion in children:
+                query = session.query(model).filter(
+                    criterion, model.provisioning_status.in_(pending))
+                query.update({'provisioning_status': constants.ACTIVE},
+                             synchronize_session=False)
+
     def create_loadbalancer(self, context, loadbalancer, allocate_vip=True):
         with context.session.begin(subtransactions=True):
             self._load_id_and_tenant_id(context, loadbalancer)
@@ -256,9 +473,13 @@ class LoadBalancerPluginDbv2(base_db.CommonDbMixin,
             _prevent_lbaasv2_port_delete_callback, resources.PORT,
             events.BEFORE_DELETE)
 
-    def get_loadbalancers(self, context, filters=None):
+    def get_loadbalancers(self, context, filters=None,
+                          profile=QUERY_PROFILE_LIST, sorts=None, limit=None,
+                          marker=None, page_reverse=False):
         lb_dbs = self._get_resources(context, models.LoadBalancer,
-                                     filters=filters)
+                                     filters=filters, profile=profile,
+                                     sorts=sorts, limit=limit, marker=marker,
+                                     page_reverse=page_reverse)
         return [data_models.LoadBalancer.from_sqlalchemy_model(lb_db)
                 for lb_db in lb_dbs]
 
@@ -266,30 +487,126 @@ class LoadBalancerPluginDbv2(base_db.CommonDbMixin,
         lb_db = self._get_resource(context, models.LoadBalancer, id)
         return data_models.LoadBalancer.from_sqlalchemy_model(lb_db)
 
+    def get_loadbalancer_provider_name(self, context, id):
+        lb_db = self._get_resource(context, models.LoadBalancer, id,
+                                   profile=QUERY_PROFILE_STATUS)
+        return lb_db.provider.provider_name if lb_db.provider else None
+
+    def get_pending_loadbalancer_ids(self, context, provider_name=None):
+        """Lists the ids of the load balancers in a PENDING_* state.
+
+        Only the id column is read, so drivers can find the load balancers
+        left pending by a restart without loading any of them.
+        """
+        query = self._model_query(context, models.LoadBalancer).filter(
+            models.LoadBalancer.provisioning_status.in_(
+                [constants.PENDING_CREATE, constants.PENDING_UPDATE,
+                 constants.PENDING_DELETE]))
+        if provider_name is not None:
+            query = query.filter(models.LoadBalancer.provider.has(
+                provider_name=provider_name))
+        return [row.id for row in query.with_entities(models.LoadBalancer.id)]
+
+    def get_loadbalancer_status_tree(self, context, id):
+        """Returns a load balancer graph holding only ids and statuses.
+
+        For the drivers completing pending operations from the statuses
+        reported by their backend.  Every level of the graph is read by
+        one query selecting only the id, status and parent columns, the
+        data models are linked to their parents.
+        """
+        lb_db = self._get_resource(context, models.LoadBalancer, id,
+                                   profile=QUERY_PROFILE_STATUS)
+        lb = data_models.LoadBalancer(
+            id=lb_db.id, provisioning_status=lb_db.provisioning_status,
+            operating_status=lb_db.operating_status)
+        session = context.session
+        listener_cls = models.Listener
+        query = session.query(
+            listener_cls.id, listener_cls.default_pool_id,
+            listener_cls.provisioning_status, listener_cls.operating_status)
+        listeners = {}
+        for row in query.filter(listener_cls.loadbalancer_id == id):
+            listener = data_models.Listener(
+                id=row.id, loadbalancer_id=id,
+                default_pool_id=row.default_pool_id,
+                provisioning_status=row.provisioning_status,
+                operating_status=row.operating_status, loadbalancer=lb)
+            lb.listeners.append(listener)
+            if row.default_pool_id:
+                listeners[row.default_pool_id] = listener
+        if not listeners:
+            return lb
+        pool_cls = models.PoolV2
+        query = session.query(
+            pool_cls.id, pool_cls.healthmonitor_id,
+            pool_cls.provisioning_status, pool_cls.operating_status)
+        pools = {}
+        monitored = {}
+        for row in query.filter(pool_cls.id.in_(list(listeners))):
+            pool = data_models.Pool(
+                id=row.id, healthmonitor_id=row.healthmonitor_id,
+                provisioning_status=row.provisioning_status,
+                operating_status=row.operating_status,
+                listener=listeners[row.id])
+            listeners[row.id].default_pool = pool
+            pools[row.id] = pool
+            if row.healthmonitor_id:
+                monitored[row.healthmonitor_id] = pool
+        if not pools:
+            return lb
+        member_cls = models.MemberV2
+        query = session.query(
+            member_cls.id, member_cls.pool_id,
+            member_cls.provisioning_status, member_cls.operating_status)
+        for row in query.filter(member_cls.pool_id.in_(list(pools))):
+            pools[row.pool_id].members.append(data_models.Member(
+                id=row.id, pool_id=row.pool_id,
+                provisioning_status=row.provisioning_status,
+                operating_status=row.operating_status,
+                pool=pools[row.pool_id]))
+        if monitored:
+            hm_cls = models.HealthMonitorV2
+            query = session.query(hm_cls.id, hm_cls.provisioning_status)
+            for row in query.filter(hm_cls.id.in_(list(monitored))):
+                monitored[row.id].healthmonitor = data_models.HealthMonitor(
+                    id=row.id, provisioning_status=row.provisioning_status,
+                    pool=monitored[row.id])
+        return lb
+
     def _validate_listener_data(self, context, listener):
+        """Validates the parents of a listener and returns them.
+
+        Only the parent rows themselves are loaded, their children are
+        left alone so validation does not grow with the load balancer.
+
+        :returns: a tuple of the load balancer and pool models, either of
+                  them None if the listener does not refer to one
+        """
+        lb = pool = None
         pool_id = listener.get('default_pool_id')
         lb_id = listener.get('loadbalancer_id')
         if lb_id:
-            if not self._resource_exists(context, models.LoadBalancer,
-                                         lb_id):
-                raise loadbalancerv2.EntityNotFound(
-                    name=models.LoadBalancer.NAME, id=lb_id)
+            lb = self._get_resource(context, models.LoadBalancer, lb_id,
+                                    profile=QUERY_PROFILE_STATUS)
         if pool_id:
-            pool = self._get_resource(context, models.PoolV2, pool_id)
+            pool = self._get_resource(context, models.PoolV2, pool_id,
+                                      profile=QUERY_PROFILE_STATUS)
             if ((pool.protocol, listener.get('protocol'))
                 not in lb_const.LISTENER_POOL_COMPATIBLE_PROTOCOLS):
                 raise loadbalancerv2.ListenerPoolProtocolMismatch(
                     listener_proto=listener['protocol'],
                     pool_proto=pool.protocol)
             filters = {'default_pool_id': [pool_id]}
-            listenerpools = self._get_resources(context,
-                                                models.Listener,
-                                                filters=filters)
+            listenerpools = self._get_resources(
+                context, models.Listener, filters=filters,
+                profile=QUERY_PROFILE_STATUS)
             if listenerpools:
                 raise loadbalancerv2.EntityInUse(
                     entity_using=models.Listener.NAME,
                     id=listenerpools[0].id,
                     entity_in_use=models.PoolV2.NAME)
+        return lb, pool
 
     def _convert_api_to_db(self, listener):
         # NOTE(blogan): Converting the values for db models for now to
@@ -316,11 +633,16 @@ class LoadBalancerPluginDbv2(base_db.CommonDbMixin,
                     if listener.get(id) == attributes.ATTR_NOT_SPECIFIED:
                         listener[id] = None
 
-                self._validate_listener_data(context, listener)
+                lb_db, pool_db = self._validate_listener_data(context,
+                                                              listener)
                 sni_container_ids = []
                 if 'sni_container_ids' in listener:
                     sni_container_ids = listener.pop('sni_container_ids')
                 listener_db_entry = models.Listener(**listener)
+                # Attaching the already loaded parents keeps their loaded
+                # collections current without reloading them afterwards.
+                listener_db_entry.loadbalancer = lb_db
+                listener_db_entry.default_pool = pool_db
                 for container_id in sni_container_ids:
                     sni = models.SNI(listener_id=listener_db_entry.id,
                                      tls_container_id=container_id)
@@ -330,7 +652,6 @@ class LoadBalancerPluginDbv2(base_db.CommonDbMixin,
             raise loadbalancerv2.LoadBalancerListenerProtocolPortExists(
                 lb_id=listener['loadbalancer_id'],
                 protocol_port=listener['protocol_port'])
-        context.session.refresh(listener_db_entry.loadbalancer)
         return data_models.Listener.from_sqlalchemy_model(listener_db_entry)
 
     def update_listener(self, context, id, listener,
@@ -362,9 +683,14 @@ class LoadBalancerPluginDbv2(base_db.CommonDbMixin,
         with context.session.begin(subtransactions=True):
             context.session.delete(listener_db_entry)
 
-    def get_listeners(self, context, filters=None):
+    def get_listeners(self, context, filters=None, sorts=None, limit=None,
+                      marker=None, page_reverse=False):
         listener_dbs = self._get_resources(context, models.Listener,
-                                           filters=filters)
+                                           filters=filters,
+                                           profile=QUERY_PROFILE_LIST,
+                                           sorts=sorts, limit=limit,
+                                           marker=marker,
+                                           page_reverse=page_reverse)
         return [data_models.Listener.from_sqlalchemy_model(listener_db)
                 for listener_db in listener_dbs]
 
@@ -470,8 +796,13 @@ class LoadBalancerPluginDbv2(base_db.CommonDbMixin,
                                  {'default_pool_id': None})
             context.session.delete(pool_db)
 
-    def get_pools(self, context, filters=None):
-        pool_dbs = self._get_resources(context, models.PoolV2, filters=filters)
+    def get_pools(self, context, filters=None, sorts=None, limit=None,
+                  marker=None, page_reverse=False):
+        pool_dbs = self._get_resources(context, models.PoolV2, filters=filters,
+                                       profile=QUERY_PROFILE_LIST,
+                                       sorts=sorts, limit=limit,
+                                       marker=marker,
+                                       page_reverse=page_reverse)
         return [data_models.Pool.from_sqlalchemy_model(pool_db)
                 for pool_db in pool_dbs]
 
@@ -479,21 +810,36 @@ class LoadBalancerPluginDbv2(base_db.CommonDbMixin,
         pool_db = self._get_resource(context, models.PoolV2, id)
         return data_models.Pool.from_sqlalchemy_model(pool_db)
 
+    def get_pool_loadbalancer_id(self, context, pool_id):
+        """Returns the id of the load balancer a pool hangs off, if any."""
+        query = context.session.query(models.Listener.loadbalancer_id)
+        row = query.filter_by(default_pool_id=pool_id).first()
+        return row.loadbalancer_id if row else None
+
     def create_pool_member(self, context, member, pool_id):
+        member_db = self._create_pool_member_db(context, member, pool_id)
+        return data_models.Member.from_sqlalchemy_model(member_db)
+
+    def _create_pool_member_db(self, context, member, pool_id):
         try:
             with context.session.begin(subtransactions=True):
+                pool_db = self._get_resource(context, models.PoolV2, pool_id,
+                                             profile=QUERY_PROFILE_STATUS)
                 self._load_id_and_tenant_id(context, member)
                 member['pool_id'] = pool_id
                 member['provisioning_status'] = constants.PENDING_CREATE
                 member['operating_status'] = lb_const.OFFLINE
                 member_db = models.MemberV2(**member)
+                # The backref appends to pool_db.members only if that
+                # collection is already loaded, so the siblings are never
+                # read just to add one more member.
+                member_db.pool = pool_db
                 context.session.add(member_db)
         except exception.DBDuplicateEntry:
             raise loadbalancerv2.MemberExists(address=member['address'],
                                               port=member['protocol_port'],
                                               pool=pool_id)
-        context.session.refresh(member_db.pool)
-        return data_models.Member.from_sqlalchemy_model(member_db)
+        return member_db
 
     def update_pool_member(self, context, id, member):
         with context.session.begin(subtransactions=True):
@@ -507,10 +853,68 @@ class LoadBalancerPluginDbv2(base_db.CommonDbMixin,
             member_db = self._get_resource(context, models.MemberV2, id)
             context.session.delete(member_db)
 
-    def get_pool_members(self, context, filters=None):
+    def update_pool_members(self, context, pool_id, members):
+        """Makes the members of a pool match the given desired list.
+
+        Members are matched on (address, protocol_port).  New members are
+        added as PENDING_CREATE, members whose mutable attributes changed
+        are set to PENDING_UPDATE and members missing from the list are
+        set to PENDING_DELETE.  Everything happens in a single transaction
+        and the returned pool still contains the members pending deletion
+        so the driver can act on them.
+        """
+        with context.session.begin(subtransactions=True):
+            pool_db = self._get_resource(context, models.PoolV2, pool_id)
+            existing = dict(((m.address, m.protocol_port), m)
+                            for m in pool_db.members)
+            desired = set()
+            for member in members:
+                key = (member['address'], member['protocol_port'])
+                if key in desired:
+                    raise loadbalancerv2.MemberExists(
+                        address=member['address'],
+                        port=member['protocol_port'],
+                        pool=pool_id)
+                desired.add(key)
+                member_db = existing.get(key)
+                if member_db is None:
+                    member = dict(member)
+                    self._load_id_and_tenant_id(context, member)
+                    member['pool_id'] = pool_id
+                    member['provisioning_status'] = constants.PENDING_CREATE
+                    member['operating_status'] = lb_const.OFFLINE
+                    pool_db.members.append(models.MemberV2(**member))
+                    continue
+                changes = dict(
+                    (attr, member[attr])
+                    for attr in lb_const.MEMBER_BATCH_MUTABLE_ATTRIBUTES
+                    if attr in member and
+                    getattr(member_db, attr) != member[attr])
+                if changes:
+                    changes['provisioning_status'] = constants.PENDING_UPDATE
+                    member_db.update(changes)
+            for key, member_db in six.iteritems(existing):
+                if key not in desired:
+                    member_db.provisioning_status = constants.PENDING_DELETE
+        return data_models.Pool.from_sqlalchemy_model(pool_db)
+
+    def delete_pool_members(self, context, ids):
+        if not ids:
+            return
+        with context.session.begin(subtransactions=True):
+            for member_db in self._get_resources(
+                    context, models.MemberV2, filters={'id': ids}):
+                context.session.delete(member_db)
+
+    def get_pool_members(self, context, filters=None, sorts=None, limit=None,
+                         marker=None, page_reverse=False):
         filters = filters or {}
         member_dbs = self._get_resources(context, models.MemberV2,
-                                         filters=filters)
+                                         filters=filters,
+                                         profile=QUERY_PROFILE_LIST,
+                                         sorts=sorts, limit=limit,
+                                         marker=marker,
+                                         page_reverse=page_reverse)
         return [data_models.Member.from_sqlalchemy_model(member_db)
                 for member_db in member_dbs]
 
@@ -561,25 +965,90 @@ class LoadBalancerPluginDbv2(base_db.CommonDbMixin,
         hm_db = self._get_resource(context, models.HealthMonitorV2, id)
         return data_models.HealthMonitor.from_sqlalchemy_model(hm_db)
 
-    def get_healthmonitors(self, context, filters=None):
+    def get_healthmonitors(self, context, filters=None, sorts=None, limit=None,
+                           marker=None, page_reverse=False):
         filters = filters or {}
         hm_dbs = self._get_resources(context, models.HealthMonitorV2,
-                                     filters=filters)
+                                     filters=filters,
+                                     profile=QUERY_PROFILE_LIST,
+                                     sorts=sorts, limit=limit, marker=marker,
+                                     page_reverse=page_reverse)
         return [data_models.HealthMonitor.from_sqlalchemy_model(hm_db)
                 for hm_db in hm_dbs]
 
     def update_loadbalancer_stats(self, context, loadbalancer_id, stats_data):
-        stats_data = stats_data or {}
+        missing = self.update_loadbalancers_stats(
+            context, {loadbalancer_id: stats_data})
+        if missing:
+            raise loadbalancerv2.EntityNotFound(
+                name=models.LoadBalancer.NAME, id=loadbalancer_id)
+
+    def update_loadbalancers_stats(self, context, stats_by_loadbalancer):
+        """Updates the statistics of many load balancers at once.
+
+        The rows are written in place by one executemany UPDATE, without
+        loading the load balancers.  Rows which do not exist yet are
+        inserted afterwards.
+
+        :returns: the set of ids of load balancers which do not exist
+        """
+        if not stats_by_loadbalancer:
+            return set()
+        rows = dict(
+            (loadbalancer_id, self._loadbalancer_stats_row(data))
+            for loadbalancer_id, data in six.iteritems(stats_by_loadbalancer))
+        table = models.LoadBalancerStatistics.__table__
+        # the columns to set are taken from the keys of the parameters
+        stmt = table.update().where(
+            table.c.loadbalancer_id == sa.bindparam('lb_id'))
+        params = [dict(row, lb_id=loadbalancer_id)
+                  for loadbalancer_id, row in six.iteritems(rows)]
         with context.session.begin(subtransactions=True):
-            lb_db = self._get_resource(context, models.LoadBalancer,
-                                       loadbalancer_id)
-            lb_db.stats = self._create_loadbalancer_stats(context,
-                                                          loadbalancer_id,
-                                                          data=stats_data)
+            result = context.session.execute(stmt, params)
+            if result.rowcount == len(rows):
+                return set()
+
+            # Either some rows are missing or the driver could not count
+            # the updated rows, look them up to find out.
+            stats_cls = models.LoadBalancerStatistics
+            qry = context.session.query(stats_cls.loadbalancer_id)
+            qry = qry.filter(stats_cls.loadbalancer_id.in_(list(rows)))
+            missing = set(rows) - set(lb_id for lb_id, in qry)
+            if not missing:
+                return set()
+            qry = context.session.query(models.LoadBalancer.id)
+            qry = qry.filter(models.LoadBalancer.id.in_(list(missing)))
+            found = set(lb_id for lb_id, in qry)
+            if found:
+                context.session.execute(
+                    table.insert(),
+                    [dict(rows[lb_id], loadbalancer_id=lb_id)
+                     for lb_id in found])
+        return missing - found
+
+    @staticmethod
+    def _loadbalancer_stats_row(data):
+        data = data or {}
+        row = {
+            'bytes_in': data.get(lb_const.STATS_IN_BYTES, 0),
+            'bytes_out': data.get(lb_const.STATS_OUT_BYTES, 0),
+            'active_connections': data.get(
+                lb_const.STATS_ACTIVE_CONNECTIONS, 0),
+            'total_connections': data.get(
+                lb_const.STATS_TOTAL_CONNECTIONS, 0)}
+        # the rows are written without the model and its validators
+        for key, value in six.iteritems(row):
+            if value < 0:
+                raise ValueError(_('The %(key)s field can not have '
+                                   'negative value. '
+                                   'Current value is %(value)d.') %
+                                 {'key': key, 'value': value})
+        return row
 
     def stats(self, context, loadbalancer_id):
         loadbalancer = self._get_resource(context, models.LoadBalancer,
-                                          loadbalancer_id)
+                                          loadbalancer_id,
+                                          profile=QUERY_PROFILE_STATS)
         return data_models.LoadBalancerStatistics.from_sqlalchemy_model(
             loadbalancer.stats)
 
@@ -25,12 +25,22 @@ from neutron_lbaas.services.loadbalancer import data_models
 
 LOG = logging.getLogger(__name__)
 
+MODEL_MAPPING = {
+    'loadbalancer': db_models.LoadBalancer,
+    'pool': db_models.PoolV2,
+    'listener': db_models.Listener,
+    'member': db_models.MemberV2,
+    'healthmonitor': db_models.HealthMonitorV2
+}
+
 
 class LoadBalancerCallbacks(object):
 
     # history
     #   1.0 Initial version
-    target = messaging.Target(version='1.0')
+    #   1.1 Add get_loadbalancers, update_loadbalancers_stats
+    #   1.2 Add update_statuses
+    target = messaging.Target(version='1.2')
 
     def __init__(self, plugin):
         super(LoadBalancerCallbacks, self).__init__()
@@ -65,52 +75,60 @@ class LoadBalancerCallbacks(object):
 
     def get_loadbalancer(self, context, loadbalancer_id=None):
         lb_model = self.plugin.db.get_loadbalancer(context, loadbalancer_id)
+        subnets = {}
+        if lb_model.vip_port and lb_model.vip_port.fixed_ips:
+            for fixed_ip in lb_model.vip_port.fixed_ips:
+                subnets[fixed_ip.subnet_id] = (
+                    self.plugin.db._core_plugin.get_subnet(
+                        context, fixed_ip.subnet_id))
+        return self._loadbalancer_to_dict(lb_model, subnets)
+
+    def get_loadbalancers(self, context, loadbalancer_ids=None):
+        """Returns the full graphs of several loadbalancers at once.
+
+        The loadbalancers are loaded together with their graphs by a fixed
+        number of queries and the subnets of all their VIPs are resolved by
+        one get_subnets call, so the cost of a resync does not grow with one
+        round trip per loadbalancer.  Loadbalancers which no longer exist
+        are left out.
+        """
+        if not loadbalancer_ids:
+            return []
+        lb_models = self.plugin.db.get_loadbalancers(
+            context, filters={'id': loadbalancer_ids},
+            profile=loadbalancer_dbv2.QUERY_PROFILE_GRAPH)
+
+        subnet_ids = set()
+        for lb_model in lb_models:
+            if lb_model.vip_port and lb_model.vip_port.fixed_ips:
+                subnet_ids.update(fixed_ip.subnet_id
+                                  for fixed_ip in lb_model.vip_port.fixed_ips)
+        subnets = {}
+        if subnet_ids:
+            subnets = dict(
+                (subnet['id'], subnet)
+                for subnet in self.plugin.db._core_plugin.get_subnets(
+                    context, filters={'id': list(subnet_ids)}))
+
+        return [self._loadbalancer_to_dict(lb_model, subnets)
+                for lb_model in lb_models]
+
+    def _loadbalancer_to_dict(self, lb_model, subnets):
         if lb_model.vip_port and lb_model.vip_port.fixed_ips:
             for fixed_ip in lb_model.vip_port.fixed_ips:
-                subnet_dict = self.plugin.db._core_plugin.get_subnet(
-                    context, fixed_ip.subnet_id
-                )
-                setattr(fixed_ip, 'subnet', data_models.Subnet.from_dict(
-                    subnet_dict))
+                subnet_dict = subnets.get(fixed_ip.subnet_id)
+                if subnet_dict:
+                    setattr(fixed_ip, 'subnet',
+                            data_models.Subnet.from_dict(subnet_dict))
         if lb_model.provider:
             device_driver = self.plugin.drivers[
                 lb_model.provider.provider_name].device_driver
             setattr(lb_model.provider, 'device_driver', device_driver)
-        lb_dict = lb_model.to_dict(stats=False)
-
-        return lb_dict
+        return lb_model.to_dict(stats=False)
 
     def loadbalancer_deployed(self, context, loadbalancer_id):
-        with context.session.begin(subtransactions=True):
-            qry = context.session.query(db_models.LoadBalancer)
-            qry = qry.filter_by(id=loadbalancer_id)
-            loadbalancer = qry.one()
-
-            # set all resources to active
-            if (loadbalancer.provisioning_status in
-                    constants.ACTIVE_PENDING_STATUSES):
-                loadbalancer.provisioning_status = constants.ACTIVE
-
-            if loadbalancer.listeners:
-                for l in loadbalancer.listeners:
-                    if (l.provisioning_status in
-                            constants.ACTIVE_PENDING_STATUSES):
-                        l.provisioning_status = constants.ACTIVE
-                    if (l.default_pool
-                        and l.default_pool.provisioning_status in
-                            constants.ACTIVE_PENDING_STATUSES):
-                        l.default_pool.provisioning_status = constants.ACTIVE
-                        if l.default_pool.members:
-                            for m in l.default_pool.members:
-                                if (m.provisioning_status in
-                                        constants.ACTIVE_PENDING_STATUSES):
-                                    m.provisioning_status = constants.ACTIVE
-                        if l.default_pool.healthmonitor:
-                            hm = l.default_pool.healthmonitor
-                            ps = hm.provisioning_status
-                            if ps in constants.ACTIVE_PENDING_STATUSES:
-                                (l.default_pool.healthmonitor
-                                 .provisioning_status) = constants.ACTIVE
+        # set all resources to active
+        self.plugin.db.activate_loadbalancer_graph(context, loadbalancer_id)
 
     def update_status(self, context, obj_type, obj_id,
                       provisioning_status=None, operating_status=None):
@@ -120,18 +138,11 @@ class LoadBalancerCallbacks(object):
                             'operating_status') % {'obj_type': obj_type,
                                                    'obj_id': obj_id})
             return
-        model_mapping = {
-            'loadbalancer': db_models.LoadBalancer,
-            'pool': db_models.PoolV2,
-            'listener': db_models.Listener,
-            'member': db_models.MemberV2,
-            'healthmonitor': db_models.HealthMonitorV2
-        }
-        if obj_type not in model_mapping:
+        if obj_type not in MODEL_MAPPING:
             raise n_exc.Invalid(_('Unknown object type: %s') % obj_type)
         try:
             self.plugin.db.update_status(
-                context, model_mapping[obj_type], obj_id,
+                context, MODEL_MAPPING[obj_type], obj_id,
                 provisioning_status=provisioning_status,
                 operating_status=operating_status)
         except n_exc.NotFound:
@@ -142,6 +153,28 @@ class LoadBalancerCallbacks(object):
                             'concurrently'),
                         {'obj_type': obj_type, 'obj_id': obj_id})
 
+    def update_statuses(self, context, statuses=None):
+        """Updates the statuses of many objects in one transaction.
+
+        :param statuses: list of (obj_type, obj_id, provisioning_status,
+                         operating_status), the later statuses of an object
+                         overriding the earlier ones
+        """
+        by_model = {}
+        for obj_type, obj_id, p_status, o_status in statuses or []:
+            if obj_type not in MODEL_MAPPING:
+                LOG.warning(_LW('update_statuses called for unknown object '
+                                'type %s'), obj_type)
+                continue
+            model_statuses = by_model.setdefault(MODEL_MAPPING[obj_type], {})
+            old_p_status, old_o_status = model_statuses.get(obj_id,
+                                                            (None, None))
+            model_statuses[obj_id] = (p_status or old_p_status,
+                                      o_status or old_o_status)
+        with context.session.begin(subtransactions=True):
+            for model, model_statuses in by_model.items():
+                self.plugin.db.update_statuses(context, model, model_statuses)
+
     def loadbalancer_destroyed(self, context, loadbalancer_id=None):
         """Agent confirmation hook that a load balancer has been destroyed.
 
@@ -207,3 +240,9 @@ class LoadBalancerCallbacks(object):
                                   stats=None):
         self.plugin.db.update_loadbalancer_stats(context, loadbalancer_id,
                                                  stats)
+
+    def update_loadbalancers_stats(self, context, stats=None):
+        stats_by_loadbalancer = dict((s['loadbalancer_id'], s['stats'])
+                                     for s in stats or [])
+        self.plugin.db.update_loadbalancers_stats(context,
+                                                  stats_by_loadbalancer)
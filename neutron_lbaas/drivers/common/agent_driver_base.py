@@ -15,6 +15,7 @@
 from neutron.common import exceptions as n_exc
 from neutron.common import rpc as n_rpc
 from neutron.db import agents_db
+from neutron.plugins.common import constants
 from neutron.services import provider_configuration as provconf
 from oslo_config import cfg
 from oslo_log import log as logging
@@ -36,6 +37,28 @@ AGENT_SCHEDULER_OPTS = [
                default='neutron_lbaas.agent_scheduler.ChanceScheduler',
                help=_('Driver to use for scheduling '
                       'to a default loadbalancer agent')),
+    cfg.FloatOpt('loadbalancer_scheduler_instance_weight', default=1.0,
+                 help=_('Weight of the number of load balancers hosted by '
+                        'an agent in the load computed by '
+                        'LeastLoadedScheduler')),
+    cfg.FloatOpt('loadbalancer_scheduler_connection_weight', default=0.0,
+                 help=_('Weight of the active connections of the load '
+                        'balancers hosted by an agent in the load computed '
+                        'by LeastLoadedScheduler')),
+    cfg.FloatOpt('loadbalancer_scheduler_traffic_weight', default=0.0,
+                 help=_('Weight of the bytes in and out of the load '
+                        'balancers hosted by an agent in the load computed '
+                        'by LeastLoadedScheduler')),
+    cfg.BoolOpt('allow_automatic_lbaas_agent_failover', default=False,
+                help=_('Automatically reschedule load balancers from dead '
+                       'lbaas agents to live ones')),
+    cfg.IntOpt('loadbalancer_reschedule_batch_size', default=100,
+               help=_('Number of load balancers rebound before the new '
+                      'agents are notified when rescheduling the load '
+                      'balancers of an agent')),
+    cfg.IntOpt('loadbalancer_evacuation_concurrency', default=10,
+               help=_('Number of load balancers rescheduled in parallel '
+                      'when evacuating an lbaas agent')),
 ]
 
 cfg.CONF.register_opts(AGENT_SCHEDULER_OPTS)
@@ -51,6 +74,8 @@ class DataModelSerializer(object):
     def serialize_entity(self, ctx, entity):
         if isinstance(entity, data_models.BaseDataModel):
             return entity.to_dict(stats=False)
+        elif isinstance(entity, (list, tuple)):
+            return [self.serialize_entity(ctx, item) for item in entity]
         else:
             return entity
 
@@ -60,6 +85,8 @@ class LoadBalancerAgentApi(object):
 
     # history
     #   1.0 Initial version
+    #   1.1 Add update_members
+    #   1.2 Add create_loadbalancers
     #
 
     def __init__(self, topic):
@@ -77,6 +104,12 @@ class LoadBalancerAgentApi(object):
         cctxt.cast(context, 'create_loadbalancer',
                    loadbalancer=loadbalancer, driver_name=driver_name)
 
+    def create_loadbalancers(self, context, loadbalancers, host,
+                             driver_name):
+        cctxt = self.client.prepare(server=host, version='1.2')
+        cctxt.cast(context, 'create_loadbalancers',
+                   loadbalancers=loadbalancers, driver_name=driver_name)
+
     def update_loadbalancer(self, context, old_loadbalancer,
                             loadbalancer, host):
         cctxt = self.client.prepare(server=host)
@@ -127,6 +160,10 @@ class LoadBalancerAgentApi(object):
         cctxt = self.client.prepare(server=host)
         cctxt.cast(context, 'delete_member', member=member)
 
+    def update_members(self, context, old_pool, pool, host):
+        cctxt = self.client.prepare(server=host, version='1.1')
+        cctxt.cast(context, 'update_members', old_pool=old_pool, pool=pool)
+
     def create_healthmonitor(self, context, healthmonitor, host):
         cctxt = self.client.prepare(server=host)
         cctxt.cast(context, 'create_healthmonitor',
@@ -267,6 +304,21 @@ class MemberManager(driver_base.BaseMemberManager):
             context, member.pool.listener.loadbalancer.id)
         self.driver.agent_rpc.delete_member(context, member, agent['host'])
 
+    def batch_update(self, context, old_pool, pool):
+        agent = self.driver.get_loadbalancer_agent(
+            context, pool.listener.loadbalancer.id)
+        # TODO(blogan): Rethink deleting from the database here. May want to
+        # wait until the agent actually deletes it.  Doing this now to keep
+        # what single member deletes do.
+        deleted = set(member.id for member in pool.members
+                      if member.provisioning_status ==
+                      constants.PENDING_DELETE)
+        self.driver.plugin.db.delete_pool_members(context, list(deleted))
+        pool.members = [member for member in pool.members
+                        if member.id not in deleted]
+        self.driver.agent_rpc.update_members(context, old_pool, pool,
+                                             agent['host'])
+
 
 class HealthMonitorManager(driver_base.BaseHealthMonitorManager):
 
@@ -334,6 +386,7 @@ class AgentDriverBase(driver_base.LoadBalancerBaseDriver):
             cfg.CONF.loadbalancer_scheduler_driver, LB_SCHEDULERS)
         self.loadbalancer_scheduler = importutils.import_object(
             lb_sched_driver)
+        self.plugin.db.start_periodic_lbaas_agent_status_check(self.plugin)
 
     def start_rpc_listeners(self):
         # other agent based plugin driver might already set callbacks on plugin
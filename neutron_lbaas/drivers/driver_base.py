@@ -14,10 +14,12 @@
 
 from functools import wraps
 
+from neutron.plugins.common import constants
 from oslo_utils import excutils
 
 from neutron_lbaas.db.loadbalancer import models
 from neutron_lbaas.drivers import driver_mixins
+from neutron_lbaas.services.loadbalancer import constants as lb_const
 
 
 class NotImplementedManager(object):
@@ -100,6 +102,63 @@ class BaseMemberManager(driver_mixins.BaseManagerMixin):
     def db_delete_method(self):
         return self.driver.plugin.db.delete_member
 
+    def batch_update(self, context, old_pool, pool):
+        """Applies a batch of member changes to a pool.
+
+        Each member of pool carries a PENDING_CREATE, PENDING_UPDATE or
+        PENDING_DELETE provisioning status describing its change; members in
+        any other status are unchanged.  Drivers able to apply the batch as
+        one backend operation should override this.  The default falls back
+        to one create, update or delete call per changed member.
+        """
+        old_members = dict((member.id, member) for member in old_pool.members)
+        for member in pool.members:
+            member.pool = pool
+            status = member.provisioning_status
+            if status == constants.PENDING_CREATE:
+                self.create(context, member)
+            elif status == constants.PENDING_UPDATE:
+                old_member = old_members[member.id]
+                old_member.pool = old_pool
+                self.update(context, old_member, member)
+            elif status == constants.PENDING_DELETE:
+                self.delete(context, member)
+
+    def successful_batch_completion(self, context, pool):
+        """Finishes a member batch that the backend applied successfully.
+
+        Members pending deletion are removed from the database, changed
+        members are set ACTIVE and ONLINE and the load balancer ACTIVE.
+        """
+        db = self.driver.plugin.db
+        db.delete_pool_members(
+            context, [member.id for member in pool.members
+                      if member.provisioning_status ==
+                      constants.PENDING_DELETE])
+        for member in pool.members:
+            if member.provisioning_status in (constants.PENDING_CREATE,
+                                              constants.PENDING_UPDATE):
+                db.update_status(context, models.MemberV2, member.id,
+                                 provisioning_status=constants.ACTIVE,
+                                 operating_status=lb_const.ONLINE)
+        db.update_status(context, models.LoadBalancer,
+                         pool.root_loadbalancer.id,
+                         provisioning_status=constants.ACTIVE)
+
+    def failed_batch_completion(self, context, pool):
+        """Sets every changed member to ERROR and the load balancer ACTIVE."""
+        db = self.driver.plugin.db
+        for member in pool.members:
+            if member.provisioning_status in (constants.PENDING_CREATE,
+                                              constants.PENDING_UPDATE,
+                                              constants.PENDING_DELETE):
+                db.update_status(context, models.MemberV2, member.id,
+                                 provisioning_status=constants.ERROR,
+                                 operating_status=lb_const.OFFLINE)
+        db.update_status(context, models.LoadBalancer,
+                         pool.root_loadbalancer.id,
+                         provisioning_status=constants.ACTIVE)
+
 
 class BaseHealthMonitorManager(driver_mixins.BaseManagerMixin):
     model_class = models.HealthMonitorV2
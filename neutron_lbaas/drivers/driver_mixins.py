@@ -98,14 +98,12 @@ class BaseManagerMixin(object):
             self.driver.plugin.db.update_loadbalancer(
                 context, obj.id, {'vip_address': obj.vip_address,
                                   'vip_port_id': obj.vip_port_id})
-        self.driver.plugin.db.update_status(
-            context, models.LoadBalancer, obj.root_loadbalancer.id,
-            provisioning_status=lb_p_status,
-            operating_status=lb_op_status)
+        db = self.driver.plugin.db
+        lb_statuses = {obj.root_loadbalancer.id: (lb_p_status, lb_op_status)}
         if obj == obj.root_loadbalancer or delete:
-            # Do not want to update the status of the load balancer again
-            # Or the obj was deleted from the db so no need to update the
-            # statuses
+            # Only the load balancer is left to update, the obj is either
+            # the load balancer itself or was deleted from the db
+            db.update_statuses(context, models.LoadBalancer, lb_statuses)
             return
         obj_op_status = lb_const.ONLINE
         if isinstance(obj, data_models.HealthMonitor):
@@ -114,10 +112,10 @@ class BaseManagerMixin(object):
         LOG.debug("Updating object of type {0} with id of {1} to "
                   "provisioning_status = {2}, operating_status = {3}".format(
                       obj.__class__, obj.id, constants.ACTIVE, obj_op_status))
-        self.driver.plugin.db.update_status(
-            context, obj_sa_cls, obj.id,
-            provisioning_status=constants.ACTIVE,
-            operating_status=obj_op_status)
+        with context.session.begin(subtransactions=True):
+            db.update_statuses(context, models.LoadBalancer, lb_statuses)
+            db.update_statuses(context, obj_sa_cls,
+                               {obj.id: (constants.ACTIVE, obj_op_status)})
 
     def failed_completion(self, context, obj):
         """
@@ -132,31 +130,31 @@ class BaseManagerMixin(object):
         """
         LOG.debug("Starting failed_completion method after a failed driver "
                   "action.")
+        db = self.driver.plugin.db
         if isinstance(obj, data_models.LoadBalancer):
             LOG.debug("Updating load balancer {0} to provisioning_status = "
                       "{1}, operating_status = {2}.".format(
                           obj.root_loadbalancer.id, constants.ERROR,
                           lb_const.OFFLINE))
-            self.driver.plugin.db.update_status(
-                context, models.LoadBalancer, obj.root_loadbalancer.id,
-                provisioning_status=constants.ERROR,
-                operating_status=lb_const.OFFLINE)
+            db.update_statuses(
+                context, models.LoadBalancer,
+                {obj.root_loadbalancer.id: (constants.ERROR,
+                                            lb_const.OFFLINE)})
             return
         obj_sa_cls = data_models.DATA_MODEL_TO_SA_MODEL_MAP[obj.__class__]
         LOG.debug("Updating object of type {0} with id of {1} to "
                   "provisioning_status = {2}, operating_status = {3}".format(
                       obj.__class__, obj.id, constants.ERROR,
                       lb_const.OFFLINE))
-        self.driver.plugin.db.update_status(
-            context, obj_sa_cls, obj.id,
-            provisioning_status=constants.ERROR,
-            operating_status=lb_const.OFFLINE)
         LOG.debug("Updating load balancer {0} to "
                   "provisioning_status = {1}".format(obj.root_loadbalancer.id,
                                                      constants.ACTIVE))
-        self.driver.plugin.db.update_status(
-            context, models.LoadBalancer, obj.root_loadbalancer.id,
-            provisioning_status=constants.ACTIVE)
+        with context.session.begin(subtransactions=True):
+            db.update_statuses(context, obj_sa_cls,
+                               {obj.id: (constants.ERROR, lb_const.OFFLINE)})
+            db.update_statuses(context, models.LoadBalancer,
+                               {obj.root_loadbalancer.id: (constants.ACTIVE,
+                                                           None)})
 
     def update_vip(self, context, loadbalancer_id, vip_address,
                    vip_port_id=None):
@@ -0,0 +1,63 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Runtime changes to a running haproxy through its admin socket."""
+
+import socket
+
+from neutron.common import exceptions
+
+CHUNK_SIZE = 1024
+
+
+class AdminSocketCommandFailed(exceptions.NeutronException):
+    message = _('haproxy rejected %(commands)s: %(response)s')
+
+
+def member_commands(member):
+    """Returns the commands that bring a running member to its new state.
+
+    The commands are idempotent and only refer to the server by name, so
+    they can be used for any member that is already part of the running
+    configuration.  Address or port changes are not covered and need a
+    reload.
+    """
+    server = '%s/%s' % (member.pool.id, member.id)
+    state = 'enable' if member.admin_state_up else 'disable'
+    return ['set weight %s %d' % (server, member.weight),
+            '%s server %s' % (state, server)]
+
+
+def run_commands(socket_path, commands):
+    """Runs commands on the haproxy admin socket.
+
+    haproxy answers successful runtime changes with an empty line, so any
+    other output means at least one of the commands was rejected.
+
+    :raises: socket.error, AdminSocketCommandFailed
+    """
+    s = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        s.connect(socket_path)
+        s.send(';'.join(commands) + '\n')
+        response = ''
+        while True:
+            chunk = s.recv(CHUNK_SIZE)
+            if not chunk:
+                break
+            response += chunk
+    finally:
+        s.close()
+
+    response = response.strip()
+    if response:
+        raise AdminSocketCommandFailed(commands=commands, response=response)
@@ -13,6 +13,7 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import functools
 import os
 import shutil
 import socket
@@ -23,12 +24,15 @@ from neutron.agent.linux import utils as linux_utils
 from neutron.common import exceptions
 from neutron.common import utils as n_utils
 from neutron.plugins.common import constants
+from oslo_concurrency import lockutils
 from oslo_config import cfg
 from oslo_log import log as logging
+from oslo_service import loopingcall
 from oslo_utils import excutils
 
 from neutron_lbaas._i18n import _LI, _LE, _LW
 from neutron_lbaas.agent import agent_device_driver
+from neutron_lbaas.drivers.haproxy import admin_socket
 from neutron_lbaas.services.loadbalancer import constants as lb_const
 from neutron_lbaas.services.loadbalancer import data_models
 from neutron_lbaas.services.loadbalancer.drivers.haproxy import jinja_cfg
@@ -45,13 +49,45 @@ DRIVER_NAME = 'haproxy_ns'
 
 STATE_PATH_V2_APPEND = 'v2'
 
+OPTS = [
+    cfg.FloatOpt(
+        'reload_debounce_interval',
+        default=0,
+        help=_('Seconds during which configuration changes to a '
+               'loadbalancer are collected before haproxy is reloaded. '
+               'A burst of changes is then applied with a single '
+               'configuration fetch and reload. 0 reloads on every '
+               'change.'),
+    ),
+]
+
 cfg.CONF.register_opts(namespace_driver.OPTS, 'haproxy')
+cfg.CONF.register_opts(OPTS, 'haproxy')
 
 
 def get_ns_name(namespace_id):
     return NS_PREFIX + namespace_id
 
 
+def synchronized_loadbalancer(get_loadbalancer_id):
+    """Serializes driver calls per loadbalancer.
+
+    Calls for different loadbalancers run concurrently, calls for the same
+    loadbalancer wait for each other.
+
+    :param get_loadbalancer_id: returns the loadbalancer id from the first
+                                argument of the decorated method
+    """
+    def wrap(f):
+        @functools.wraps(f)
+        def inner(self, obj, *args, **kwargs):
+            lock_name = 'haproxy-driver-%s' % get_loadbalancer_id(obj)
+            with lockutils.lock(lock_name):
+                return f(self, obj, *args, **kwargs)
+        return inner
+    return wrap
+
+
 class HaproxyNSDriver(agent_device_driver.AgentDeviceDriver):
 
     def __init__(self, conf, plugin_rpc):
@@ -77,6 +113,14 @@ class HaproxyNSDriver(agent_device_driver.AgentDeviceDriver):
         self._member = MemberManager(self)
         self._healthmonitor = HealthMonitorManager(self)
 
+        # loadbalancer id->completion callbacks waiting for a coalesced reload
+        self.reload_debounce_interval = conf.haproxy.reload_debounce_interval
+        self._dirty_loadbalancers = {}
+        if self.reload_debounce_interval > 0:
+            flush_loop = loopingcall.FixedIntervalLoopingCall(
+                self.flush_dirty_loadbalancers)
+            flush_loop.start(interval=self.reload_debounce_interval)
+
     @property
     def loadbalancer(self):
         return self._loadbalancer
@@ -100,7 +144,52 @@ class HaproxyNSDriver(agent_device_driver.AgentDeviceDriver):
     def get_name(self):
         return DRIVER_NAME
 
-    @n_utils.synchronized('haproxy-driver')
+    def mark_dirty(self, loadbalancer_id):
+        self._dirty_loadbalancers.setdefault(loadbalancer_id, [])
+
+    def discard_dirty(self, loadbalancer_id):
+        self._dirty_loadbalancers.pop(loadbalancer_id, None)
+
+    def defer_completion(self, loadbalancer_id, callback):
+        if loadbalancer_id not in self._dirty_loadbalancers:
+            return False
+        self._dirty_loadbalancers[loadbalancer_id].append(callback)
+        return True
+
+    def flush_dirty_loadbalancers(self):
+        """Reloads every loadbalancer changed since the last flush.
+
+        Each loadbalancer is fetched, rendered and reloaded once no matter
+        how many changes were made to it during the debounce interval.  The
+        outcome of the reload is then reported for every one of them.
+        """
+        dirty, self._dirty_loadbalancers = self._dirty_loadbalancers, {}
+        for loadbalancer_id, callbacks in dirty.items():
+            error = False
+            try:
+                self.loadbalancer.reload(loadbalancer_id)
+            except Exception:
+                LOG.exception(_LE('Unable to reload loadbalancer %s'),
+                              loadbalancer_id)
+                error = True
+                if not callbacks:
+                    self._set_loadbalancer_error(loadbalancer_id)
+            for callback in callbacks:
+                try:
+                    callback(error=error)
+                except Exception:
+                    LOG.exception(_LE('Unable to report the changes to '
+                                      'loadbalancer %s'), loadbalancer_id)
+
+    def _set_loadbalancer_error(self, loadbalancer_id):
+        try:
+            self.plugin_rpc.update_status(
+                'loadbalancer', loadbalancer_id, constants.ERROR)
+        except Exception:
+            LOG.exception(_LE('Unable to update status of '
+                              'loadbalancer %s'), loadbalancer_id)
+
+    @synchronized_loadbalancer(lambda loadbalancer_id: loadbalancer_id)
     def undeploy_instance(self, loadbalancer_id, **kwargs):
         cleanup_namespace = kwargs.get('cleanup_namespace', False)
         delete_namespace = kwargs.get('delete_namespace', False)
@@ -127,6 +216,7 @@ class HaproxyNSDriver(agent_device_driver.AgentDeviceDriver):
             self._get_state_file_path(loadbalancer_id, ''))
         if os.path.isdir(conf_dir):
             shutil.rmtree(conf_dir)
+        jinja_cfg.forget_stored_certificates(conf_dir)
 
         if delete_namespace:
             ns = ip_lib.IPWrapper(namespace=namespace)
@@ -142,6 +232,14 @@ class HaproxyNSDriver(agent_device_driver.AgentDeviceDriver):
             if self.exists(lb_id):
                 self.undeploy_instance(lb_id, cleanup_namespace=True)
 
+    def get_last_update_time(self, loadbalancer_id):
+        conf_path = self._get_state_file_path(loadbalancer_id, 'haproxy.conf',
+                                              False)
+        try:
+            return os.path.getmtime(conf_path)
+        except OSError:
+            return None
+
     def get_stats(self, loadbalancer_id):
         socket_path = self._get_state_file_path(loadbalancer_id,
                                                 'haproxy_stats.sock', False)
@@ -158,7 +256,7 @@ class HaproxyNSDriver(agent_device_driver.AgentDeviceDriver):
                      loadbalancer_id)
             return {}
 
-    @n_utils.synchronized('haproxy-driver')
+    @synchronized_loadbalancer(lambda loadbalancer: loadbalancer.id)
     def deploy_instance(self, loadbalancer):
         """Deploys loadbalancer if necessary
 
@@ -175,11 +273,52 @@ class HaproxyNSDriver(agent_device_driver.AgentDeviceDriver):
             self.create(loadbalancer)
         return True
 
+    @synchronized_loadbalancer(
+        lambda member: member.pool.listener.loadbalancer.id)
+    def update_member_runtime(self, member):
+        """Applies a member weight or admin state change without a reload.
+
+        The change is only made through the admin socket of the running
+        haproxy.  The configuration file and its digest are left as they
+        are: the current graph may hold changes haproxy has not loaded yet,
+        and writing it would make the reload applying them look unneeded.
+        The next reload renders the new weight and admin state anyway.
+
+        :returns: True if the change was applied, False if a reload is needed
+        """
+        loadbalancer_id = member.pool.listener.loadbalancer.id
+        if not self.exists(loadbalancer_id):
+            return False
+        loadbalancer = data_models.LoadBalancer.from_dict(
+            self.plugin_rpc.get_loadbalancer(loadbalancer_id))
+        if not self.deployable(loadbalancer):
+            return False
+
+        sock_path = self._get_state_file_path(loadbalancer.id,
+                                              jinja_cfg.ADMIN_SOCKET_NAME)
+        try:
+            admin_socket.run_commands(sock_path,
+                                      admin_socket.member_commands(member))
+        except (socket.error, admin_socket.AdminSocketCommandFailed) as e:
+            LOG.info(_LI('Reloading loadbalancer %(lb)s, runtime update of '
+                         'member %(member)s failed: %(err)s'),
+                     {'lb': loadbalancer.id, 'member': member.id, 'err': e})
+            return False
+        return True
+
     def update(self, loadbalancer):
+        if not self._save_config(loadbalancer):
+            # nothing haproxy reads has changed, keep the running process
+            self.deployed_loadbalancers[loadbalancer.id] = loadbalancer
+            return
         pid_path = self._get_state_file_path(loadbalancer.id, 'haproxy.pid')
-        extra_args = ['-sf']
-        extra_args.extend(p.strip() for p in open(pid_path, 'r'))
-        self._spawn(loadbalancer, extra_args)
+        try:
+            extra_args = ['-sf']
+            extra_args.extend(p.strip() for p in open(pid_path, 'r'))
+            self._spawn(loadbalancer, extra_args)
+        except Exception:
+            with excutils.save_and_reraise_exception():
+                self._discard_config_digest(loadbalancer)
 
     def exists(self, loadbalancer_id):
         namespace = get_ns_name(loadbalancer_id)
@@ -200,7 +339,12 @@ class HaproxyNSDriver(agent_device_driver.AgentDeviceDriver):
         namespace = get_ns_name(loadbalancer.id)
 
         self._plug(namespace, loadbalancer.vip_port, loadbalancer.vip_address)
-        self._spawn(loadbalancer)
+        self._save_config(loadbalancer)
+        try:
+            self._spawn(loadbalancer)
+        except Exception:
+            with excutils.save_and_reraise_exception():
+                self._discard_config_digest(loadbalancer)
 
     def deployable(self, loadbalancer):
         """Returns True if loadbalancer is active and has active listeners."""
@@ -260,7 +404,8 @@ class HaproxyNSDriver(agent_device_driver.AgentDeviceDriver):
             if stats.get('type') == STATS_TYPE_SERVER_RESPONSE:
                 res[stats['svname']] = {
                     lb_const.STATS_STATUS: (constants.INACTIVE
-                                            if stats['status'] == 'DOWN'
+                                            if stats['status'] in
+                                            ('DOWN', 'MAINT')
                                             else constants.ACTIVE),
                     lb_const.STATS_HEALTH: stats['check_status'],
                     lb_const.STATS_FAILED_CHECKS: stats['chkfail']
@@ -337,20 +482,33 @@ class HaproxyNSDriver(agent_device_driver.AgentDeviceDriver):
         interface_name = self.vif_driver.get_device_name(port)
         self.vif_driver.unplug(interface_name, namespace=namespace)
 
-    def _spawn(self, loadbalancer, extra_cmd_args=()):
-        namespace = get_ns_name(loadbalancer.id)
+    def _save_config(self, loadbalancer):
+        """Writes the haproxy configuration of a loadbalancer.
+
+        :returns: True if the configuration or certificates changed
+        """
         conf_path = self._get_state_file_path(loadbalancer.id, 'haproxy.conf')
-        pid_path = self._get_state_file_path(loadbalancer.id,
-                                             'haproxy.pid')
         sock_path = self._get_state_file_path(loadbalancer.id,
                                               'haproxy_stats.sock')
         user_group = self.conf.haproxy.user_group
         haproxy_base_dir = self._get_state_file_path(loadbalancer.id, '')
-        jinja_cfg.save_config(conf_path,
-                              loadbalancer,
-                              sock_path,
-                              user_group,
-                              haproxy_base_dir)
+        return jinja_cfg.save_config(conf_path,
+                                     loadbalancer,
+                                     sock_path,
+                                     user_group,
+                                     haproxy_base_dir)
+
+    def _discard_config_digest(self, loadbalancer):
+        # haproxy did not load the saved configuration, the next save must
+        # not take it for the running one and skip the reload
+        jinja_cfg.discard_digest(
+            self._get_state_file_path(loadbalancer.id, 'haproxy.conf'))
+
+    def _spawn(self, loadbalancer, extra_cmd_args=()):
+        namespace = get_ns_name(loadbalancer.id)
+        conf_path = self._get_state_file_path(loadbalancer.id, 'haproxy.conf')
+        pid_path = self._get_state_file_path(loadbalancer.id,
+                                             'haproxy.pid')
         cmd = ['haproxy', '-f', conf_path, '-p', pid_path]
         cmd.extend(extra_cmd_args)
 
@@ -364,14 +522,22 @@ class HaproxyNSDriver(agent_device_driver.AgentDeviceDriver):
 class LoadBalancerManager(agent_device_driver.BaseLoadBalancerManager):
 
     def refresh(self, loadbalancer):
+        if self.driver.reload_debounce_interval > 0:
+            # picked up by the next HaproxyNSDriver.flush_dirty_loadbalancers
+            self.driver.mark_dirty(loadbalancer.id)
+            return
+        self.reload(loadbalancer.id)
+
+    def reload(self, loadbalancer_id):
         loadbalancer_dict = self.driver.plugin_rpc.get_loadbalancer(
-            loadbalancer.id)
+            loadbalancer_id)
         loadbalancer = data_models.LoadBalancer.from_dict(loadbalancer_dict)
         if (not self.driver.deploy_instance(loadbalancer) and
                 self.driver.exists(loadbalancer.id)):
             self.driver.undeploy_instance(loadbalancer.id)
 
     def delete(self, loadbalancer):
+        self.driver.discard_dirty(loadbalancer.id)
         if self.driver.exists(loadbalancer.id):
             self.driver.undeploy_instance(loadbalancer.id,
                                           delete_namespace=True)
@@ -441,7 +607,11 @@ class MemberManager(agent_device_driver.BaseMemberManager):
         pool.members.pop(index_to_remove)
 
     def update(self, old_member, new_member):
-        self.driver.loadbalancer.refresh(new_member.pool.listener.loadbalancer)
+        # weight and admin state changes keep the backend topology, so they
+        # go through the admin socket; anything else needs a reload
+        if not self.driver.update_member_runtime(new_member):
+            self.driver.loadbalancer.refresh(
+                new_member.pool.listener.loadbalancer)
 
     def create(self, member):
         self.driver.loadbalancer.refresh(member.pool.listener.loadbalancer)
@@ -450,6 +620,11 @@ class MemberManager(agent_device_driver.BaseMemberManager):
         self._remove_member(member.pool, member.id)
         self.driver.loadbalancer.refresh(member.pool.listener.loadbalancer)
 
+    def batch_update(self, old_pool, pool):
+        # the whole batch is already in the database, one refresh renders
+        # the config and reloads haproxy once for all members
+        self.driver.loadbalancer.refresh(pool.listener.loadbalancer)
+
 
 class HealthMonitorManager(agent_device_driver.BaseHealthMonitorManager):
 
@@ -31,8 +31,9 @@ from oslo_log import log as logging
 from oslo_service import service
 from oslo_utils import excutils
 
-from neutron_lbaas._i18n import _LE, _LW
+from neutron_lbaas._i18n import _LE, _LI, _LW
 from neutron_lbaas.drivers import driver_base
+from neutron_lbaas.drivers.haproxy import admin_socket
 from neutron_lbaas.extensions import loadbalancerv2
 from neutron_lbaas.services.loadbalancer.agent import agent as lb_agent
 from neutron_lbaas.services.loadbalancer import constants as lb_const
@@ -224,18 +225,31 @@ class HaproxyNSDriver(driver_base.LoadBalancerBaseDriver):
             namespace_driver.Wrap(port_stub))
         self.vif_driver.unplug(interface_name, namespace=namespace)
 
-    def _spawn(self, loadbalancer, extra_cmd_args=()):
-        namespace = get_ns_name(loadbalancer.id)
+    def _save_config(self, loadbalancer):
+        """Writes the haproxy configuration of a load balancer.
+
+        :returns: True if the configuration or certificates changed
+        """
         conf_path = self._get_state_file_path(loadbalancer.id, 'haproxy.conf')
-        pid_path = self._get_state_file_path(loadbalancer.id,
-                                             'haproxy.pid')
         sock_path = self._get_state_file_path(loadbalancer.id,
                                               'haproxy_stats.sock')
         user_group = self.conf.haproxy.user_group
         state_path = self._get_state_file_path(loadbalancer.id, '')
 
-        jinja_cfg.save_config(conf_path, loadbalancer, sock_path, user_group,
-                              state_path)
+        return jinja_cfg.save_config(conf_path, loadbalancer, sock_path,
+                                     user_group, state_path)
+
+    def _discard_config_digest(self, loadbalancer):
+        # haproxy did not load the saved configuration, the next save must
+        # not take it for the running one and skip the reload
+        jinja_cfg.discard_digest(
+            self._get_state_file_path(loadbalancer.id, 'haproxy.conf'))
+
+    def _spawn(self, loadbalancer, extra_cmd_args=()):
+        namespace = get_ns_name(loadbalancer.id)
+        conf_path = self._get_state_file_path(loadbalancer.id, 'haproxy.conf')
+        pid_path = self._get_state_file_path(loadbalancer.id,
+                                             'haproxy.pid')
         cmd = ['haproxy', '-f', conf_path, '-p', pid_path]
         cmd.extend(extra_cmd_args)
 
@@ -260,7 +274,8 @@ class HaproxyNSDriver(driver_base.LoadBalancerBaseDriver):
             if stats.get('type') == STATS_TYPE_SERVER_RESPONSE:
                 res[stats['svname']] = {
                     lb_const.STATS_STATUS: (constants.INACTIVE
-                                            if stats['status'] == 'DOWN'
+                                            if stats['status'] in
+                                            ('DOWN', 'MAINT')
                                             else constants.ACTIVE),
                     lb_const.STATS_HEALTH: stats['check_status'],
                     lb_const.STATS_FAILED_CHECKS: stats['chkfail']
@@ -338,6 +353,7 @@ class HaproxyNSDriver(driver_base.LoadBalancerBaseDriver):
             self._get_state_file_path(loadbalancer_id, ''))
         if os.path.isdir(conf_dir):
             shutil.rmtree(conf_dir)
+        jinja_cfg.forget_stored_certificates(conf_dir)
         if loadbalancer_id in self.deployed_loadbalancer_ids:
             # If it doesn't exist then didn't need to remove in the first place
             self.deployed_loadbalancer_ids.remove(loadbalancer_id)
@@ -380,15 +396,49 @@ class HaproxyNSDriver(driver_base.LoadBalancerBaseDriver):
         namespace = get_ns_name(loadbalancer.id)
 
         self._plug(context, namespace, loadbalancer.vip_port)
-        self._spawn(loadbalancer)
+        self._save_config(loadbalancer)
+        try:
+            self._spawn(loadbalancer)
+        except Exception:
+            with excutils.save_and_reraise_exception():
+                self._discard_config_digest(loadbalancer)
+
+    def update_member_runtime(self, member):
+        """Applies a member weight or admin state change without a reload.
+
+        :returns: True if the change was applied, False if a reload is needed
+        """
+        loadbalancer = member.pool.listener.loadbalancer
+        if (not self.load_balancer.deployable(loadbalancer) or
+                not self.exists(loadbalancer)):
+            return False
+
+        sock_path = self._get_state_file_path(loadbalancer.id,
+                                              jinja_cfg.ADMIN_SOCKET_NAME)
+        try:
+            admin_socket.run_commands(sock_path,
+                                      admin_socket.member_commands(member))
+        except (socket.error, admin_socket.AdminSocketCommandFailed) as e:
+            LOG.info(_LI('Reloading load balancer %(lb)s, runtime update of '
+                         'member %(member)s failed: %(err)s'),
+                     {'lb': loadbalancer.id, 'member': member.id, 'err': e})
+            return False
+        return True
 
     def update_instance(self, loadbalancer):
+        # keep a running process when nothing haproxy reads has changed
+        if not self._save_config(loadbalancer) and self.exists(loadbalancer):
+            return
         pid_path = self._get_state_file_path(loadbalancer.id,
                                              'haproxy.pid')
 
-        extra_args = ['-sf']
-        extra_args.extend(p.strip() for p in open(pid_path, 'r'))
-        self._spawn(loadbalancer, extra_args)
+        try:
+            extra_args = ['-sf']
+            extra_args.extend(p.strip() for p in open(pid_path, 'r'))
+            self._spawn(loadbalancer, extra_args)
+        except Exception:
+            with excutils.save_and_reraise_exception():
+                self._discard_config_digest(loadbalancer)
 
     def delete_instance(self, loadbalancer, cleanup_namespace=False):
         self._kill_processes(loadbalancer.id)
@@ -598,8 +648,11 @@ class MemberManager(driver_base.BaseMemberManager):
     def update(self, context, old_member, new_member):
         super(MemberManager, self).update(context, old_member, new_member)
         try:
-            self.driver.load_balancer.refresh(
-                context, new_member.pool.listener.loadbalancer)
+            # weight and admin state changes keep the backend topology, so
+            # they go through the admin socket; anything else needs a reload
+            if not self.driver.update_member_runtime(new_member):
+                self.driver.load_balancer.refresh(
+                    context, new_member.pool.listener.loadbalancer)
         except Exception as e:
             self.failed_completion(context, new_member)
             raise e
@@ -629,6 +682,18 @@ class MemberManager(driver_base.BaseMemberManager):
 
         self.successful_completion(context, member, delete=True)
 
+    def batch_update(self, context, old_pool, pool):
+        # members pending deletion are not rendered, so a single refresh
+        # applies the whole batch
+        try:
+            self.driver.load_balancer.refresh(
+                context, pool.listener.loadbalancer)
+        except Exception as e:
+            self.failed_batch_completion(context, pool)
+            raise e
+
+        self.successful_batch_completion(context, pool)
+
 
 class HealthMonitorManager(driver_base.BaseHealthMonitorManager):
 
@@ -23,7 +23,7 @@ from neutron import context as ncontext
 from neutron.plugins.common import constants
 from oslo_service import service
 
-from neutron_lbaas._i18n import _LE
+from neutron_lbaas._i18n import _LE, _LW
 from neutron_lbaas.drivers import driver_base
 from neutron_lbaas.drivers.driver_mixins import BaseManagerMixin
 from neutron_lbaas.services.loadbalancer.drivers.netscaler import ncc_client
@@ -31,6 +31,7 @@ from neutron_lbaas.services.loadbalancer.drivers.netscaler import ncc_client
 DEFAULT_PERIODIC_TASK_INTERVAL = "2"
 DEFAULT_STATUS_COLLECTION = "True"
 DEFAULT_PAGE_SIZE = "300"
+DEFAULT_BULK_STATUS_THRESHOLD = 10
 DEFAULT_IS_SYNCRONOUS = "True"
 
 PROV = "provisioning_status"
@@ -74,12 +75,20 @@ NETSCALER_CC_OPTS = [
         default=DEFAULT_STATUS_COLLECTION + "," + DEFAULT_PAGE_SIZE,
         help=_('Setting for member status collection from'
                'NetScaler Control Center Server.'),
-    )
+    ),
+    cfg.IntOpt(
+        'netscaler_status_collection_bulk_threshold',
+        default=DEFAULT_BULK_STATUS_THRESHOLD,
+        help=_('Number of pending loadbalancers above which their statuses '
+               'are read from the paged collection of all the statuses '
+               'instead of one request per loadbalancer.'),
+    ),
 ]
 
 
 if not hasattr(cfg.CONF, "netscaler_driver"):
     cfg.CONF.register_opts(NETSCALER_CC_OPTS, 'netscaler_driver')
+ncc_client.register_opts()
 
 
 LBS_RESOURCE = 'loadbalancers'
@@ -103,7 +112,7 @@ PAGE = 'page'
 SIZE = 'size'
 
 
-PROVISIONING_STATUS_TRACKER = []
+PROVISIONING_STATUS_TRACKER = set()
 
 
 class NetScalerLoadBalancerDriverV2(driver_base.LoadBalancerBaseDriver):
@@ -122,10 +131,15 @@ class NetScalerLoadBalancerDriverV2(driver_base.LoadBalancerBaseDriver):
         ncc_username = self.driver_conf.netscaler_ncc_username
         ncc_password = self.driver_conf.netscaler_ncc_password
         ncc_cleanup_mode = cfg.CONF.netscaler_driver.netscaler_ncc_cleanup_mode
-        self.client = ncc_client.NSClient(ncc_uri,
-                                          ncc_username,
-                                          ncc_password,
-                                          ncc_cleanup_mode)
+        self.client = ncc_client.NSClient(
+            ncc_uri,
+            ncc_username,
+            ncc_password,
+            ncc_cleanup_mode,
+            pool_size=self.driver_conf.netscaler_ncc_pool_size,
+            session_ttl=self.driver_conf.netscaler_ncc_session_ttl,
+            stats_log_interval=(
+                self.driver_conf.netscaler_ncc_stats_log_interval))
 
     def _init_managers(self):
         self.load_balancer = NetScalerLoadBalancerManager(self)
@@ -144,6 +158,9 @@ class NetScalerLoadBalancerDriverV2(driver_base.LoadBalancerBaseDriver):
         if is_status_collection.lower() == "false":
             self.is_status_collection = False
         self.pagesize_status_collection = pagesize_status_collection
+        self.bulk_status_threshold = (
+            self.driver_conf.netscaler_status_collection_bulk_threshold)
+        self.is_bulk_status_supported = True
 
         self._init_pending_status_tracker()
 
@@ -152,13 +169,9 @@ class NetScalerLoadBalancerDriverV2(driver_base.LoadBalancerBaseDriver):
     def _init_pending_status_tracker(self):
         # Initialize PROVISIONING_STATUS_TRACKER for loadbalancers in
         # pending state
-        db_lbs = self.plugin.db.get_loadbalancers(
-            self.admin_ctx)
-        for db_lb in db_lbs:
-            if ((db_lb.id not in PROVISIONING_STATUS_TRACKER) and
-                (db_lb.provider.provider_name == NETSCALER) and
-                    (db_lb.provisioning_status.startswith("PENDING_"))):
-                PROVISIONING_STATUS_TRACKER.append(db_lb.id)
+        PROVISIONING_STATUS_TRACKER.update(
+            self.plugin.db.get_pending_loadbalancer_ids(
+                self.admin_ctx, provider_name=NETSCALER))
 
     def collect_provision_status(self):
 
@@ -167,12 +180,65 @@ class NetScalerLoadBalancerDriverV2(driver_base.LoadBalancerBaseDriver):
         self._update_loadbalancers_provision_status()
 
     def _update_loadbalancers_provision_status(self):
-        for lb_id in PROVISIONING_STATUS_TRACKER:
-            lb_statuses = self._get_loadbalancer_statuses(lb_id)
+        # the tracker changes while the statuses are updated
+        lb_ids = list(PROVISIONING_STATUS_TRACKER)
+        lbs_statuses = self._get_loadbalancers_statuses(lb_ids)
+        for lb_id in lb_ids:
+            lb_statuses = lbs_statuses.get(lb_id)
             if lb_statuses:
                 self._update_status_tree_in_db(
                     lb_id, lb_statuses["lb_statuses"])
 
+    def _get_loadbalancers_statuses(self, lb_ids):
+        """Retrieve the statuses of several loadbalancers.
+
+        More than bulk_status_threshold loadbalancers are looked up in the
+        paged collection of all the statuses, one request per loadbalancer
+        is made for fewer of them, if Control Center does not provide the
+        collection or for the loadbalancers missing from it.
+
+        :returns: the results of _get_loadbalancer_statuses by lb id
+        """
+        statuses = {}
+        if (len(lb_ids) > self.bulk_status_threshold and
+                self.is_bulk_status_supported):
+            statuses = self._get_all_loadbalancer_statuses() or {}
+        lbs_statuses = {}
+        for lb_id in lb_ids:
+            if lb_id in statuses:
+                lbs_statuses[lb_id] = {"lb_statuses": statuses[lb_id]}
+            else:
+                lbs_statuses[lb_id] = self._get_loadbalancer_statuses(lb_id)
+        return lbs_statuses
+
+    def _get_all_loadbalancer_statuses(self):
+        """Retrieve the statuses of all loadbalancers from Control Center.
+
+        :returns: the statuses by lb id, None if they could not be
+                  retrieved
+        """
+        page_size = int(self.pagesize_status_collection)
+        statuses = {}
+        page = 1
+        while True:
+            resource_path = "%s/%s/statuses?%s=%d&%s=%d" % (
+                RESOURCE_PREFIX, LBS_RESOURCE, PAGE, page, SIZE, page_size)
+            try:
+                page_statuses = self.client.retrieve_resource(
+                    "GLOBAL", resource_path)[1]['dict']["statuses"]
+            except ncc_client.NCCException as e:
+                if e.is_not_found_exception():
+                    LOG.warning(_LW("Control Center does not provide the "
+                                    "statuses of all loadbalancers, "
+                                    "retrieving them one by one"))
+                    self.is_bulk_status_supported = False
+                return None
+            for lb_statuses in page_statuses:
+                statuses[lb_statuses["loadbalancer"]["id"]] = lb_statuses
+            if len(page_statuses) < page_size:
+                return statuses
+            page += 1
+
     def _get_loadbalancer_statuses(self, lb_id):
         """Retrieve listener status from Control Center."""
         resource_path = "%s/%s/%s/statuses" % (RESOURCE_PREFIX,
@@ -191,8 +257,9 @@ class NetScalerLoadBalancerDriverV2(driver_base.LoadBalancerBaseDriver):
 
     def _update_status_tree_in_db(self, lb_id, loadbalancer_statuses):
         track_loadbalancer = {"track": False}
-        db_lb = self.plugin.db.get_loadbalancer(self.admin_ctx,
-                                                lb_id)
+        # only the ids and statuses of the graph are needed
+        db_lb = self.plugin.db.get_loadbalancer_status_tree(self.admin_ctx,
+                                                            lb_id)
 
         if (not loadbalancer_statuses and
                 db_lb.provisioning_status == constants.PENDING_DELETE):
@@ -201,12 +268,12 @@ class NetScalerLoadBalancerDriverV2(driver_base.LoadBalancerBaseDriver):
                     self.admin_ctx, db_lb, delete=True)
             except Exception:
                 LOG.error(_LE("error with successful completion"))
-            PROVISIONING_STATUS_TRACKER.remove(lb_id)
+            PROVISIONING_STATUS_TRACKER.discard(lb_id)
             return
         else:
             status_lb = loadbalancer_statuses["loadbalancer"]
 
-        status_listeners = status_lb["listeners"]
+        status_listeners = self._index_statuses(status_lb["listeners"])
         for db_listener in db_lb.listeners:
             db_listener.loadbalancer = db_lb
             status_listener = (self.
@@ -223,7 +290,7 @@ class NetScalerLoadBalancerDriverV2(driver_base.LoadBalancerBaseDriver):
                 continue
             db_pool.listener = db_listener
 
-            status_pools = status_listener['pools']
+            status_pools = self._index_statuses(status_listener['pools'])
             status_pool = self._update_entity_status_in_db(track_loadbalancer,
                                                            db_pool,
                                                            status_pools,
@@ -232,7 +299,7 @@ class NetScalerLoadBalancerDriverV2(driver_base.LoadBalancerBaseDriver):
             db_members = db_pool.members
             if not status_pool:
                 continue
-            status_members = status_pool['members']
+            status_members = self._index_statuses(status_pool['members'])
 
             for db_member in db_members:
                 db_member.pool = db_pool
@@ -244,37 +311,34 @@ class NetScalerLoadBalancerDriverV2(driver_base.LoadBalancerBaseDriver):
             db_hm = db_pool.healthmonitor
             if db_hm:
                 db_hm.pool = db_pool
-                status_hm = status_pool['healthmonitor']
+                status_hm = self._index_statuses(
+                    [status_pool['healthmonitor']])
                 self._update_entity_status_in_db(track_loadbalancer,
                                                  db_hm,
-                                                 [status_hm],
+                                                 status_hm,
                                                  self.health_monitor)
 
         if not track_loadbalancer['track']:
-            self._update_entity_status_in_db(
+            self._check_and_update_entity_status_in_db(
                 track_loadbalancer, db_lb, status_lb, self.load_balancer)
             if not track_loadbalancer['track']:
-                PROVISIONING_STATUS_TRACKER.remove(lb_id)
+                PROVISIONING_STATUS_TRACKER.discard(lb_id)
 
     def _update_entity_status_in_db(self, track_loadbalancer,
                                     db_entity,
                                     status_entities,
                                     entity_manager):
-        if isinstance(status_entities, list):
-            entity_status = self._get_entity_status(
-                db_entity.id, status_entities)
-        else:
-            entity_status = status_entities
-
+        entity_status = status_entities.get(db_entity.id)
         self._check_and_update_entity_status_in_db(
             track_loadbalancer, db_entity, entity_status, entity_manager)
         return entity_status
 
-    def _get_entity_status(self, entity_id, entities_status):
-        for entity_status in entities_status:
-            if entity_status and entity_status['id'] == entity_id:
-                return entity_status
-        return None
+    @staticmethod
+    def _index_statuses(entities_status):
+        """Index a list of entity statuses by entity id."""
+        return dict((entity_status['id'], entity_status)
+                    for entity_status in entities_status or []
+                    if entity_status)
 
     def _check_and_update_entity_status_in_db(self, track_loadbalancer,
                                               db_entity,
@@ -380,8 +444,7 @@ class NetScalerCommonManager(BaseManagerMixin):
 
     def track_provision_status(self, obj):
         for lb in self._get_loadbalancers(obj):
-            if lb.id not in PROVISIONING_STATUS_TRACKER:
-                PROVISIONING_STATUS_TRACKER.append(lb.id)
+            PROVISIONING_STATUS_TRACKER.add(lb.id)
 
     def _get_loadbalancers(self, obj):
         lbs = []
@@ -11,7 +11,6 @@
 #    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
 #    License for the specific language governing permissions and limitations
 #    under the License.
-from datetime import datetime
 from functools import wraps
 import threading
 import time
@@ -23,6 +22,8 @@ from oslo_serialization import jsonutils
 from oslo_utils import excutils
 import requests
 
+from neutron_lbaas._i18n import _LE, _LW
+from neutron_lbaas.common import request_stats
 from neutron_lbaas.drivers import driver_base
 
 LOG = logging.getLogger(__name__)
@@ -40,6 +41,12 @@ OPTS = [
         help=_('Interval in seconds to poll octavia when an entity is created,'
                ' updated, or deleted.')
     ),
+    cfg.IntOpt(
+        'request_poll_max_interval',
+        default=15,
+        help=_('Longest interval in seconds between two polls of a load '
+               'balancer that stays in a pending state.')
+    ),
     cfg.IntOpt(
         'request_poll_timeout',
         default=100,
@@ -52,41 +59,217 @@ OPTS = [
         help=_('True if Octavia will be responsible for allocating the VIP.'
                ' False if neutron-lbaas will allocate it and pass to Octavia.')
     ),
+    cfg.IntOpt(
+        'request_pool_size',
+        default=10,
+        help=_('Number of keep-alive connections to the Octavia controller '
+               'kept open for reuse.')
+    ),
+    cfg.FloatOpt(
+        'request_connect_timeout',
+        default=5,
+        help=_('Seconds to wait for a connection to the Octavia controller.')
+    ),
+    cfg.FloatOpt(
+        'request_read_timeout',
+        default=30,
+        help=_('Seconds to wait for the Octavia controller to answer a '
+               'request.')
+    ),
+    cfg.IntOpt(
+        'request_retries',
+        default=3,
+        help=_('Number of times a failed GET request to the Octavia '
+               'controller is retried.')
+    ),
+    cfg.FloatOpt(
+        'request_retry_backoff',
+        default=0.5,
+        help=_('Seconds to wait before the first retry of a GET request, '
+               'doubled for every further retry.')
+    ),
+    cfg.IntOpt(
+        'request_stats_log_interval',
+        default=300,
+        help=_('Seconds between two logs of the request counters of the '
+               'Octavia controller, 0 to disable them.')
+    ),
 ]
 cfg.CONF.register_opts(OPTS, 'octavia')
 
 
-def thread_op(manager, entity, delete=False, lb_create=False):
-    context = ncontext.get_admin_context()
-    poll_interval = cfg.CONF.octavia.request_poll_interval
-    poll_timeout = cfg.CONF.octavia.request_poll_timeout
-    start_dt = datetime.now()
-    prov_status = None
-    while (datetime.now() - start_dt).seconds < poll_timeout:
-        octavia_lb = manager.driver.load_balancer.get(entity.root_loadbalancer)
-        prov_status = octavia_lb.get('provisioning_status')
-        LOG.debug("Octavia reports load balancer {0} has provisioning status "
-                  "of {1}".format(entity.root_loadbalancer.id, prov_status))
-        if prov_status == 'ACTIVE' or prov_status == 'DELETED':
-            kwargs = {'delete': delete}
-            if manager.driver.allocates_vip and lb_create:
-                kwargs['lb_create'] = lb_create
+class _PendingOperation(object):
+
+    def __init__(self, manager, entity, added, deadline, delete=False,
+                 lb_create=False):
+        self.manager = manager
+        self.entity = entity
+        self.added = added
+        self.deadline = deadline
+        self.delete = delete
+        self.lb_create = lb_create
+
+
+class _PendingLoadBalancer(object):
+
+    def __init__(self, loadbalancer, interval, next_poll):
+        self.loadbalancer = loadbalancer
+        self.interval = interval
+        self.next_poll = next_poll
+        self.last_status = None
+        self.operations = []
+
+
+class StatusPoller(object):
+    """Completes the driver operations once Octavia has carried them out.
+
+    Octavia reports the outcome of an operation through the provisioning
+    status of the root load balancer, so the pending operations are kept
+    per load balancer and a single thread polls each of them once per
+    cycle, completing every operation waiting on it from the same
+    answer.  When several load balancers are due they are read with one
+    list call.  The poll interval of a load balancer starts at
+    request_poll_interval and doubles, up to request_poll_max_interval,
+    for every poll that finds it still pending.
+    """
+
+    def __init__(self, driver):
+        self.driver = driver
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._pending = {}
+        self._thread = None
+
+    def add(self, manager, entity, delete=False, lb_create=False):
+        lb = entity.root_loadbalancer
+        interval = cfg.CONF.octavia.request_poll_interval
+        now = time.time()
+        operation = _PendingOperation(
+            manager, entity, now, now + cfg.CONF.octavia.request_poll_timeout,
+            delete=delete, lb_create=lb_create)
+        with self._lock:
+            pending = self._pending.get(lb.id)
+            if pending is None:
+                pending = _PendingLoadBalancer(lb, interval, now + interval)
+                self._pending[lb.id] = pending
+            else:
+                # a new operation is expected to finish soon, poll at the
+                # base rate again
+                pending.interval = interval
+                pending.next_poll = min(pending.next_poll, now + interval)
+            pending.operations.append(operation)
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run)
+                self._thread.setDaemon(True)
+                self._thread.start()
+        self._wakeup.set()
+
+    def _run(self):
+        while True:
+            self._wakeup.clear()
+            try:
+                delay = self.poll()
+            except Exception:
+                LOG.exception(_LE("Polling Octavia for the status of "
+                                  "pending operations failed"))
+                delay = cfg.CONF.octavia.request_poll_interval
+            self._wakeup.wait(delay)
+
+    def _get_statuses(self, due):
+        statuses = {}
+        if len(due) > 1:
+            try:
+                octavia_lbs = self.driver.req.get(
+                    LoadBalancerManager._url(None))
+                if isinstance(octavia_lbs, dict):
+                    octavia_lbs = octavia_lbs.get('loadbalancers', [])
+                for octavia_lb in octavia_lbs:
+                    statuses[octavia_lb.get('id')] = octavia_lb
+            except Exception:
+                LOG.warning(_LW("Listing load balancers from Octavia failed, "
+                                "polling them one at a time"))
+        for pending in due:
+            lb = pending.loadbalancer
+            if lb.id not in statuses:
+                try:
+                    statuses[lb.id] = self.driver.load_balancer.get(lb)
+                except Exception:
+                    LOG.warning(_LW("Getting load balancer %s from Octavia "
+                                    "failed"), lb.id)
+        return statuses
+
+    def _complete(self, context, operation, octavia_lb, prov_status):
+        entity = operation.entity
+        if prov_status in ('ACTIVE', 'DELETED'):
+            kwargs = {'delete': operation.delete}
+            if self.driver.allocates_vip and operation.lb_create:
+                kwargs['lb_create'] = operation.lb_create
                 # TODO(blogan): drop fk constraint on vip_port_id to ports
                 # table because the port can't be removed unless the load
                 # balancer has been deleted.  Until then we won't populate the
                 # vip_port_id field.
                 # entity.vip_port_id = octavia_lb.get('vip').get('port_id')
                 entity.vip_address = octavia_lb.get('vip').get('ip_address')
-            manager.successful_completion(context, entity, **kwargs)
-            return
-        elif prov_status == 'ERROR':
-            manager.failed_completion(context, entity)
-            return
-        time.sleep(poll_interval)
-    LOG.debug("Timeout has expired for load balancer {0} to complete an "
-              "operation.  The last reported status was "
-              "{1}".format(entity.root_loadbalancer.id, prov_status))
-    manager.failed_completion(context, entity)
+            operation.manager.successful_completion(context, entity,
+                                                    **kwargs)
+        else:
+            operation.manager.failed_completion(context, entity)
+
+    def poll(self, now=None):
+        """Polls the load balancers that are due and completes operations.
+
+        :returns: the number of seconds until the next load balancer is
+                  due, or None if no operation is pending
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            due = [pending for pending in self._pending.values()
+                   if pending.next_poll <= now]
+        # operations added while the statuses are read may have been sent
+        # after Octavia answered, they wait for the next poll
+        fetched = time.time()
+        statuses = self._get_statuses(due) if due else {}
+        context = ncontext.get_admin_context()
+        for pending in due:
+            lb_id = pending.loadbalancer.id
+            octavia_lb = statuses.get(lb_id) or {}
+            prov_status = octavia_lb.get('provisioning_status')
+            LOG.debug("Octavia reports load balancer %(id)s has "
+                      "provisioning status of %(status)s",
+                      {'id': lb_id, 'status': prov_status})
+            finished = prov_status in ('ACTIVE', 'DELETED', 'ERROR')
+            with self._lock:
+                done = [op for op in pending.operations
+                        if (finished and op.added <= fetched) or
+                        op.deadline <= now]
+                pending.operations = [op for op in pending.operations
+                                      if op not in done]
+                if not finished and done:
+                    LOG.debug("Timeout has expired for load balancer "
+                              "%(id)s to complete an operation.  The "
+                              "last reported status was %(status)s",
+                              {'id': lb_id, 'status': prov_status})
+                if finished:
+                    pending.interval = cfg.CONF.octavia.request_poll_interval
+                else:
+                    pending.interval = min(
+                        pending.interval * 2,
+                        cfg.CONF.octavia.request_poll_max_interval)
+                pending.next_poll = now + pending.interval
+                if not pending.operations:
+                    del self._pending[lb_id]
+            for operation in done:
+                try:
+                    self._complete(context, operation, octavia_lb,
+                                   prov_status)
+                except Exception:
+                    LOG.exception(_LE("Completing an operation on load "
+                                      "balancer %s failed"), lb_id)
+        with self._lock:
+            if not self._pending:
+                return None
+            return max(0, min(pending.next_poll
+                              for pending in self._pending.values()) - now)
 
 
 # A decorator for wrapping driver operations, which will automatically
@@ -100,12 +283,8 @@ def async_op(func):
                      isinstance(args[0], LoadBalancerManager))
         try:
             r = func(*args, **kwargs)
-            thread = threading.Thread(target=thread_op,
-                                      args=(args[0], args[2]),
-                                      kwargs={'delete': d,
-                                              'lb_create': lb_create})
-            thread.setDaemon(True)
-            thread.start()
+            args[0].driver.poller.add(args[0], args[2], delete=d,
+                                      lb_create=lb_create)
             return r
         except Exception:
             with excutils.save_and_reraise_exception():
@@ -113,10 +292,66 @@ def async_op(func):
     return func_wrapper
 
 
+def request_endpoint(url):
+    """Returns the endpoint of an Octavia URL, with the ids left out."""
+    # URLs alternate between collections and ids after the version,
+    # e.g. /v1/loadbalancers/<id>/listeners/<id>
+    segments = url.split('?')[0].strip('/').split('/')
+    return '/' + '/'.join('{id}' if i > 1 and i % 2 == 0 else segment
+                          for i, segment in enumerate(segments))
+
+
 class OctaviaRequest(object):
+    """Sends requests to the Octavia controller over a shared session.
+
+    The session keeps up to pool_size connections alive so the status
+    polls do not pay for a new connection each time.  GET requests are
+    idempotent and retried with an exponential backoff when the
+    connection fails, times out or the controller answers with a server
+    error; other requests are sent once.
+    """
 
-    def __init__(self, base_url):
+    RETRY_STATUS_CODES = (500, 502, 503, 504)
+
+    def __init__(self, base_url, pool_size=10, connect_timeout=5,
+                 read_timeout=30, retries=3, retry_backoff=0.5,
+                 stats_log_interval=0):
         self.base_url = base_url
+        self.timeout = (connect_timeout, read_timeout)
+        self.retries = retries
+        self.retry_backoff = retry_backoff
+        self.stats = request_stats.RequestStats(
+            request_endpoint, name='Octavia',
+            log_interval=stats_log_interval)
+        self.session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=1,
+                                                pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def _send(self, method, url, data, headers, attempt):
+        retry = attempt < self.retries and method == 'GET'
+        start = time.time()
+        try:
+            r = self.session.request(method,
+                                     '%s%s' % (self.base_url, url),
+                                     data=data,
+                                     headers=headers,
+                                     timeout=self.timeout)
+        except (requests.ConnectionError, requests.Timeout) as e:
+            self.stats.record(method, url, time.time() - start, error=True,
+                              retry=retry)
+            if not retry:
+                raise
+            LOG.warning(_LW("Octavia request %(method)s %(url)s failed: "
+                            "%(error)s"),
+                        {'method': method, 'url': url, 'error': e})
+            return None
+        failed = r.status_code >= 400
+        retry = retry and r.status_code in self.RETRY_STATUS_CODES
+        self.stats.record(method, url, time.time() - start, error=failed,
+                          retry=retry)
+        return None if retry else r
 
     def request(self, method, url, args=None, headers=None):
         if args:
@@ -125,12 +360,15 @@ class OctaviaRequest(object):
                     'Content-type': 'application/json'
                 }
             args = jsonutils.dumps(args)
-        LOG.debug("url = %s", '%s%s' % (self.base_url, str(url)))
+        url = str(url)
+        LOG.debug("url = %s", '%s%s' % (self.base_url, url))
         LOG.debug("args = %s", args)
-        r = requests.request(method,
-                             '%s%s' % (self.base_url, str(url)),
-                             data=args,
-                             headers=headers)
+        attempt = 0
+        r = self._send(method, url, args, headers, attempt)
+        while r is None:
+            time.sleep(self.retry_backoff * 2 ** attempt)
+            attempt += 1
+            r = self._send(method, url, args, headers, attempt)
         LOG.debug("Octavia Response Code: {0}".format(r.status_code))
         LOG.debug("Octavia Response Body: {0}".format(r.content))
         LOG.debug("Octavia Response Headers: {0}".format(r.headers))
@@ -155,7 +393,15 @@ class OctaviaDriver(driver_base.LoadBalancerBaseDriver):
     def __init__(self, plugin):
         super(OctaviaDriver, self).__init__(plugin)
 
-        self.req = OctaviaRequest(cfg.CONF.octavia.base_url)
+        self.poller = StatusPoller(self)
+        self.req = OctaviaRequest(
+            cfg.CONF.octavia.base_url,
+            pool_size=cfg.CONF.octavia.request_pool_size,
+            connect_timeout=cfg.CONF.octavia.request_connect_timeout,
+            read_timeout=cfg.CONF.octavia.request_read_timeout,
+            retries=cfg.CONF.octavia.request_retries,
+            retry_backoff=cfg.CONF.octavia.request_retry_backoff,
+            stats_log_interval=cfg.CONF.octavia.request_stats_log_interval)
 
         self.load_balancer = LoadBalancerManager(self)
         self.listener = ListenerManager(self)
@@ -90,7 +90,31 @@ driver_opts = [
     cfg.StrOpt('stats_action_name',
                default='stats',
                help=_('Name of the workflow action for statistics. '
-                      'Default: stats.'))
+                      'Default: stats.')),
+    cfg.StrOpt('workflow_diff_action_name',
+               default='',
+               help=_('Name of the workflow action applying only the part '
+                      'of the objects graph changed since the previous '
+                      'action, if the workflow template has one. The whole '
+                      'graph is always sent to workflow_action_name when '
+                      'empty. Default: empty.')),
+    cfg.IntOpt('vdirect_connection_pool_size',
+               default=10,
+               help=_('Number of idle connections kept open to each '
+                      'vDirect server. Default: 10.')),
+    cfg.IntOpt('completion_poll_interval',
+               default=1,
+               help=_('Seconds before the completion of a vDirect '
+                      'operation is first polled. Default: 1.')),
+    cfg.IntOpt('completion_poll_max_interval',
+               default=30,
+               help=_('Longest interval between two polls of an '
+                      'incomplete vDirect operation, the interval being '
+                      'doubled after every poll. Default: 30.')),
+    cfg.IntOpt('completion_poll_concurrency',
+               default=10,
+               help=_('Number of vDirect operations polled in parallel. '
+                      'Default: 10.'))
 ]
 
 driver_debug_opts = [
@@ -0,0 +1,127 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import heapq
+import itertools
+import threading
+import time
+
+import eventlet
+from oslo_log import log as logging
+from six.moves import queue as Queue
+
+from neutron_lbaas._i18n import _LE
+
+LOG = logging.getLogger(__name__)
+
+# Longest wait for new operations, bounding the reaction to a stop request.
+MAX_WAIT = 1
+
+
+class CompletionScheduler(threading.Thread):
+    """Polls the completion of the vDirect operations put on a queue.
+
+    Every operation has its own next poll time.  An operation is first
+    polled poll_interval seconds after being queued, and the interval is
+    doubled after every poll that finds it incomplete, up to
+    max_poll_interval.  The operations due are polled in parallel, at most
+    concurrency at a time.
+
+    Subclasses implement handle_operation_completion, which returns whether
+    the operation has completed.  Every queued operation is marked done on
+    the queue once it has completed.
+    """
+
+    def __init__(self, queue, poll_interval=1, max_poll_interval=30,
+                 concurrency=10):
+        threading.Thread.__init__(self)
+        self.queue = queue
+        self.poll_interval = poll_interval
+        self.max_poll_interval = max(max_poll_interval, poll_interval)
+        self.concurrency = concurrency
+        self.stoprequest = threading.Event()
+        # heap of (next poll time, sequence, operation, interval)
+        self._scheduled = []
+        self._sequence = itertools.count()
+
+    def join(self, timeout=None):
+        self.stoprequest.set()
+        super(CompletionScheduler, self).join(timeout)
+
+    def handle_operation_completion(self, oper):
+        raise NotImplementedError()
+
+    def _schedule(self, oper, interval, now):
+        heapq.heappush(self._scheduled,
+                       (now + interval, next(self._sequence), oper,
+                        interval))
+
+    def _receive(self, timeout):
+        """Schedules the queued operations, waiting at most timeout."""
+        try:
+            oper = self.queue.get(timeout=timeout)
+        except Queue.Empty:
+            return
+        while True:
+            LOG.debug('Operation consumed from the queue: %s', oper)
+            self._schedule(oper, self.poll_interval, time.time())
+            try:
+                oper = self.queue.get_nowait()
+            except Queue.Empty:
+                return
+
+    def _check(self, oper):
+        try:
+            return self.handle_operation_completion(oper)
+        except Exception:
+            LOG.exception(_LE('Exception was thrown inside '
+                              'OperationCompletionHandler'))
+            return False
+
+    def poll(self, now=None):
+        """Polls the operations due and reschedules the incomplete ones.
+
+        :returns: seconds until the next operation is due, None if there is
+                  no operation left
+        """
+        now = time.time() if now is None else now
+        due = []
+        while self._scheduled and self._scheduled[0][0] <= now:
+            due.append(heapq.heappop(self._scheduled))
+        if due:
+            pool = eventlet.GreenPool(min(len(due), self.concurrency))
+            opers = [entry[2] for entry in due]
+            now = time.time()
+            for entry, completed in zip(due, pool.imap(self._check, opers)):
+                if completed:
+                    # queue.join() waits for the operations to complete,
+                    # not only to be scheduled
+                    self.queue.task_done()
+                else:
+                    LOG.debug('Operation %s is not completed yet..', entry[2])
+                    self._schedule(entry[2],
+                                   min(entry[3] * 2, self.max_poll_interval),
+                                   now)
+        if not self._scheduled:
+            return None
+        return max(self._scheduled[0][0] - time.time(), 0)
+
+    def run(self):
+        delay = None
+        while not self.stoprequest.isSet():
+            try:
+                timeout = MAX_WAIT if delay is None else min(delay, MAX_WAIT)
+                self._receive(timeout)
+                delay = self.poll()
+            except Exception:
+                LOG.exception(_LE('Exception was thrown inside '
+                                  'OperationCompletionHandler'))
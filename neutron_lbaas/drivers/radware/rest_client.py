@@ -13,7 +13,10 @@
 #    under the License.
 
 import base64
+import collections
 import httplib
+import socket
+import threading
 
 from oslo_log import helpers as log_helpers
 from oslo_log import log as logging
@@ -30,6 +33,90 @@ RESP_STR = 2
 RESP_DATA = 3
 
 
+class ConnectionPool(object):
+    """Keep-alive connections to vDirect servers, kept for reuse.
+
+    Idle connections are kept per server, so flipping to the secondary
+    server neither reuses nor drops the connections to the primary one
+    until they are cleared.
+    """
+
+    def __init__(self, ssl=True, timeout=5000, size=10):
+        self.ssl = ssl
+        self.timeout = timeout
+        self.size = size
+        self._lock = threading.Lock()
+        self._idle = collections.defaultdict(list)
+
+    def _get(self, server, port):
+        with self._lock:
+            idle = self._idle.get((server, port))
+            if idle:
+                return idle.pop(), True
+        if self.ssl:
+            conn = httplib.HTTPSConnection(server, port, timeout=self.timeout)
+        else:
+            conn = httplib.HTTPConnection(server, port, timeout=self.timeout)
+        return conn, False
+
+    def _put(self, server, port, conn):
+        with self._lock:
+            idle = self._idle[(server, port)]
+            if len(idle) < self.size:
+                idle.append(conn)
+                return
+        conn.close()
+
+    def clear(self, server=None):
+        """Closes the idle connections, to the given server or to all."""
+        with self._lock:
+            keys = [key for key in self._idle
+                    if server is None or key[0] == server]
+            conns = [conn for key in keys for conn in self._idle.pop(key)]
+        for conn in conns:
+            conn.close()
+
+    def request(self, server, port, action, uri, body, headers):
+        """Sends a request over a pooled connection.
+
+        A connection that was idle may have been closed by the server in
+        the meantime.  The request is sent once more over a new connection
+        when it could not be written on such a connection, or when it is a
+        GET; other requests may already have been executed by the server
+        and are not repeated.  Timeouts are never retried.
+
+        :returns: a tuple of the response status, reason and body
+        :raises: any error of the connection
+        """
+        conn, reused = self._get(server, port)
+        sent = False
+        try:
+            conn.request(action, uri, body, headers)
+            sent = True
+            response = conn.getresponse()
+            respstr = response.read()
+        except (httplib.HTTPException, socket.error) as e:
+            conn.close()
+            if (not reused or isinstance(e, socket.timeout) or
+                    (sent and action != 'GET')):
+                raise
+            # the other idle connections are likely just as stale
+            self.clear(server)
+            LOG.debug('Resending %(action)s %(uri)s over a new connection '
+                      'to %(server)s: %(error)s',
+                      {'action': action, 'uri': uri, 'server': server,
+                       'error': e})
+            return self.request(server, port, action, uri, body, headers)
+        except Exception:
+            conn.close()
+            raise
+        if response.will_close:
+            conn.close()
+        else:
+            self._put(server, port, conn)
+        return response.status, response.reason, respstr
+
+
 class vDirectRESTClient(object):
     """REST server proxy to Radware vDirect."""
     @log_helpers.log_method_call
@@ -41,13 +128,15 @@ class vDirectRESTClient(object):
                  port=2189,
                  ssl=True,
                  timeout=5000,
-                 base_uri=''):
+                 base_uri='',
+                 pool_size=10):
         self.server = server
         self.secondary_server = secondary_server
         self.port = port
         self.ssl = ssl
         self.base_uri = base_uri
         self.timeout = timeout
+        self.pool = ConnectionPool(ssl=ssl, timeout=timeout, size=pool_size)
         if user and password:
             self.auth = base64.encodestring('%s:%s' % (user, password))
             self.auth = self.auth.replace('\n', '')
@@ -68,6 +157,8 @@ class vDirectRESTClient(object):
                  'switching to %(secondary)s'),
                  {'server': self.server,
                  'secondary': self.secondary_server})
+        # the connections kept to the failing server are likely dead
+        self.pool.clear(self.server)
         self.server, self.secondary_server = self.secondary_server, self.server
 
     def _recover(self, action, resource, data, headers, binary=False):
@@ -112,37 +203,19 @@ class vDirectRESTClient(object):
             headers = {'Authorization': 'Basic %s' % self.auth}
         else:
             headers['Authorization'] = 'Basic %s' % self.auth
-        conn = None
-        if self.ssl:
-            conn = httplib.HTTPSConnection(
-                self.server, self.port, timeout=self.timeout)
-            if conn is None:
-                LOG.error(_LE('vdirectRESTClient: Could not establish HTTPS '
-                          'connection'))
-                return 0, None, None, None
-        else:
-            conn = httplib.HTTPConnection(
-                self.server, self.port, timeout=self.timeout)
-            if conn is None:
-                LOG.error(_LE('vdirectRESTClient: Could not establish HTTP '
-                          'connection'))
-                return 0, None, None, None
-
         try:
-            conn.request(action, uri, body, headers)
-            response = conn.getresponse()
-            respstr = response.read()
+            status, reason, respstr = self.pool.request(
+                self.server, self.port, action, uri, body, headers)
             respdata = respstr
             try:
                 respdata = jsonutils.loads(respstr)
             except ValueError:
                 # response was not JSON, ignore the exception
                 pass
-            ret = (response.status, response.reason, respstr, respdata)
+            ret = (status, reason, respstr, respdata)
         except Exception as e:
             log_dict = {'action': action, 'e': e}
             LOG.error(_LE('vdirectRESTClient: %(action)s failure, %(e)r'),
                       log_dict)
             ret = -1, None, None, None
-        conn.close()
         return ret
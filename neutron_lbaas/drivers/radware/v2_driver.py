@@ -14,7 +14,6 @@
 
 import copy
 import netaddr
-import threading
 import time
 
 from neutron.api.v2 import attributes
@@ -29,10 +28,11 @@ from six.moves import queue as Queue
 from neutron_lbaas._i18n import _LE, _LW, _LI
 import neutron_lbaas.common.cert_manager
 from neutron_lbaas.drivers.radware import base_v2_driver
+from neutron_lbaas.drivers.radware import completion_scheduler
 from neutron_lbaas.drivers.radware import exceptions as r_exc
 from neutron_lbaas.drivers.radware import rest_client as rest
 
-CERT_MANAGER_PLUGIN = neutron_lbaas.common.cert_manager.get_backend()
+CERT_MANAGER = neutron_lbaas.common.cert_manager.get_cached_cert_manager()
 TEMPLATE_HEADER = {'Content-Type':
                    'application/vnd.com.radware.vdirect.'
                    'template-parameters+json'}
@@ -118,21 +118,27 @@ class RadwareLBaaSV2Driver(base_v2_driver.RadwareLBaaSBaseV2Driver):
         self.workflow_params = rad.workflow_params
         self.workflow_action_name = rad.workflow_action_name
         self.stats_action_name = rad.stats_action_name
+        self.workflow_diff_action_name = rad.workflow_diff_action_name
+        # _LoadBalancerState of the load balancers by id
+        self._lb_states = {}
         vdirect_address = rad.vdirect_address
         sec_server = rad.ha_secondary_address
         self.rest_client = rest.vDirectRESTClient(
             server=vdirect_address,
             secondary_server=sec_server,
             user=rad.vdirect_user,
-            password=rad.vdirect_password)
+            password=rad.vdirect_password,
+            pool_size=rad.vdirect_connection_pool_size)
         self.workflow_params['provision_service'] = rad_debug.provision_service
         self.workflow_params['configure_l3'] = rad_debug.configure_l3
         self.workflow_params['configure_l4'] = rad_debug.configure_l4
 
         self.queue = Queue.Queue()
-        self.completion_handler = OperationCompletionHandler(self.queue,
-                                                             self.rest_client,
-                                                             plugin)
+        self.completion_handler = OperationCompletionHandler(
+            self.queue, self.rest_client, plugin,
+            poll_interval=rad.completion_poll_interval,
+            max_poll_interval=rad.completion_poll_max_interval,
+            concurrency=rad.completion_poll_concurrency)
         self.workflow_templates_exists = False
         self.completion_handler.setDaemon(True)
         self.completion_handler_started = False
@@ -238,58 +244,103 @@ class RadwareLBaaSV2Driver(base_v2_driver.RadwareLBaaSBaseV2Driver):
         # network, meaning no second leg or static routes are required.
         # Otherwise, create proxy port on found member's subnet and get its
         # address as a proxy address for loadbalancer instance
-        lb_subnet = self.plugin.db._core_plugin.get_subnet(
-            ctx, lb.vip_subnet_id)
-        proxy_subnet = lb_subnet
-        proxy_port_address = lb.vip_address
-
-        if not self.workflow_exists(lb):
-            # Create proxy port if needed
-            proxy_port_subnet_id = self._get_proxy_port_subnet_id(lb)
-            if proxy_port_subnet_id != lb.vip_subnet_id:
-                proxy_port = self._create_proxy_port(
-                    ctx, lb, proxy_port_subnet_id)
-                proxy_subnet = self.plugin.db._core_plugin.get_subnet(
-                    ctx, proxy_port['subnet_id'])
-                proxy_port_address = proxy_port['ip_address']
-
-            self._create_workflow(lb,
-                                  lb_subnet['network_id'],
-                                  proxy_subnet['network_id'])
-        else:
-            # Check if proxy port exists
-            proxy_port = self._get_proxy_port(ctx, lb)
-            if proxy_port:
-                proxy_subnet = self.plugin.db._core_plugin.get_subnet(
-                    ctx, proxy_port['subnet_id'])
-                proxy_port_address = proxy_port['ip_address']
+        # The proxy port only changes with the workflow, so it is looked up
+        # once for the workflow and remembered for the next operations.
+        lb_state = self._lb_states.get(lb.id)
+        workflow_exists = self.workflow_exists(lb)
+        if not workflow_exists or lb_state is None:
+            lb_subnet = self.plugin.db._core_plugin.get_subnet(
+                ctx, lb.vip_subnet_id)
+            proxy_subnet = lb_subnet
+            proxy_port_address = lb.vip_address
+
+            if not workflow_exists:
+                # Create proxy port if needed
+                proxy_port_subnet_id = self._get_proxy_port_subnet_id(lb)
+                if proxy_port_subnet_id != lb.vip_subnet_id:
+                    proxy_port = self._create_proxy_port(
+                        ctx, lb, proxy_port_subnet_id)
+                    proxy_subnet = self.plugin.db._core_plugin.get_subnet(
+                        ctx, proxy_port['subnet_id'])
+                    proxy_port_address = proxy_port['ip_address']
+
+                self._create_workflow(lb,
+                                      lb_subnet['network_id'],
+                                      proxy_subnet['network_id'])
+            else:
+                # Check if proxy port exists
+                proxy_port = self._get_proxy_port(ctx, lb)
+                if proxy_port:
+                    proxy_subnet = self.plugin.db._core_plugin.get_subnet(
+                        ctx, proxy_port['subnet_id'])
+                    proxy_port_address = proxy_port['ip_address']
+            lb_state = _LoadBalancerState(proxy_port_address, proxy_subnet)
+            self._lb_states[lb.id] = lb_state
 
         # Build objects graph
         objects_graph = self._build_objects_graph(ctx, lb, data_model,
-                                                  proxy_port_address,
-                                                  proxy_subnet)
+                                                  lb_state)
         LOG.debug("Radware vDirect LB object graph is " + str(objects_graph))
 
-        wf_name = self._get_wf_name(lb)
-        resource = '/api/workflow/%s/action/%s' % (
-            wf_name, self.workflow_action_name)
-        response = _rest_wrapper(self.rest_client.call('POST', resource,
-                                 {'parameters': objects_graph},
-                                 TEMPLATE_HEADER), success_codes=[202])
+        response = self._apply_objects_graph(lb, lb_state, objects_graph)
         LOG.debug('_update_workflow response: %s ', response)
 
         oper = OperationAttributes(
             manager, response['uri'], lb,
             data_model, old_data_model,
-            delete=delete)
+            delete=delete,
+            post_failure_function=self._forget_objects_graph)
 
         LOG.debug('Pushing operation %s to the queue', oper)
         self._start_completion_handling_thread()
         self.queue.put_nowait(oper)
 
+    def _apply_objects_graph(self, lb, lb_state, objects_graph):
+        """Runs the workflow action applying the objects graph.
+
+        When a diff action is configured and the graph previously applied
+        is known, only the changes to the graph are sent, falling back to
+        the whole graph if the diff action fails.
+        """
+        wf_name = self._get_wf_name(lb)
+        previous_graph, lb_state.graph = lb_state.graph, objects_graph
+        if self.workflow_diff_action_name and previous_graph is not None:
+            resource = '/api/workflow/%s/action/%s' % (
+                wf_name, self.workflow_diff_action_name)
+            try:
+                return _rest_wrapper(self.rest_client.call(
+                    'POST', resource,
+                    {'parameters': _diff_objects_graph(previous_graph,
+                                                       objects_graph)},
+                    TEMPLATE_HEADER), success_codes=[202])
+            except r_exc.RESTRequestFailure as e:
+                LOG.warning(_LW('Workflow %(wf_name)s diff action failed, '
+                                'applying the whole graph: %(e)s'),
+                            {'wf_name': wf_name, 'e': e})
+
+        resource = '/api/workflow/%s/action/%s' % (
+            wf_name, self.workflow_action_name)
+        try:
+            return _rest_wrapper(self.rest_client.call(
+                'POST', resource, {'parameters': objects_graph},
+                TEMPLATE_HEADER), success_codes=[202])
+        except Exception:
+            with excutils.save_and_reraise_exception():
+                lb_state.graph = None
+
+    def _forget_objects_graph(self, ctx, data_model):
+        """Makes the next action on the load balancer apply a whole graph.
+
+        Run when an action fails, as what vDirect applied is then unknown.
+        """
+        lb_state = self._lb_states.get(data_model.root_loadbalancer.id)
+        if lb_state is not None:
+            lb_state.graph = None
+
     def remove_workflow(self, ctx, manager, lb):
         wf_name = self._get_wf_name(lb)
         LOG.debug('Remove the workflow %s' % wf_name)
+        self._lb_states.pop(lb.id, None)
         resource = '/api/workflow/%s' % (wf_name)
         rest_return = self.rest_client.call('DELETE', resource, None, None)
         response = _rest_wrapper(rest_return, [204, 202, 404])
@@ -312,11 +363,12 @@ class RadwareLBaaSV2Driver(base_v2_driver.RadwareLBaaSBaseV2Driver):
             self._start_completion_handling_thread()
             self.queue.put_nowait(oper)
 
-    def _build_objects_graph(self, ctx, lb, data_model,
-                             proxy_port_address, proxy_subnet):
+    def _build_objects_graph(self, ctx, lb, data_model, lb_state):
         """Iterate over the LB model starting from root lb entity
         and build its JSON representtaion for vDirect
         """
+        proxy_port_address = lb_state.proxy_port_address
+        proxy_subnet = lb_state.proxy_subnet
         graph = {}
         for prop in LOADBALANCER_PROPERTIES:
             graph[prop] = getattr(lb, prop, PROPERTY_DEFAULTS.get(prop))
@@ -328,6 +380,9 @@ class RadwareLBaaSV2Driver(base_v2_driver.RadwareLBaaSBaseV2Driver):
             listener for listener in lb.listeners
             if listener.provisioning_status != constants.PENDING_DELETE and
             (listener.default_pool and listener.default_pool.members)]
+        certs = self._get_cert_payloads(lb_state, listeners)
+        member_routes = lb_state.member_routes
+        lb_state.member_routes = {}
         for listener in listeners:
             listener_dict = {}
             for prop in LISTENER_PROPERTIES:
@@ -335,30 +390,18 @@ class RadwareLBaaSV2Driver(base_v2_driver.RadwareLBaaSBaseV2Driver):
                     listener, prop, PROPERTY_DEFAULTS.get(prop))
 
             if listener.default_tls_container_id:
-                default_cert = CERT_MANAGER_PLUGIN.CertManager.get_cert(
-                    listener.default_tls_container_id,
-                    service_name='Neutron LBaaS v2 Radware provider')
-                cert_dict = {
-                    'id': listener.default_tls_container_id,
-                    'certificate': default_cert.get_certificate(),
-                    'intermediates': default_cert.get_intermediates(),
-                    'private_key': default_cert.get_private_key(),
-                    'passphrase': default_cert.get_private_key_passphrase()}
+                cert_dict = dict(
+                    certs[listener.default_tls_container_id],
+                    id=listener.default_tls_container_id)
                 listener_dict['default_tls_certificate'] = cert_dict
 
             if listener.sni_containers:
                 listener_dict['sni_tls_certificates'] = []
                 for sni_container in listener.sni_containers:
-                    sni_cert = CERT_MANAGER_PLUGIN.CertManager.get_cert(
-                        sni_container.tls_container_id,
-                        service_name='Neutron LBaaS v2 Radware provider')
-                    listener_dict['sni_tls_certificates'].append(
-                        {'id': sni_container.tls_container_id,
-                         'position': sni_container.position,
-                         'certificate': sni_cert.get_certificate(),
-                         'intermediates': sni_cert.get_intermediates(),
-                         'private_key': sni_cert.get_private_key(),
-                         'passphrase': sni_cert.get_private_key_passphrase()})
+                    listener_dict['sni_tls_certificates'].append(dict(
+                        certs[sni_container.tls_container_id],
+                        id=sni_container.tls_container_id,
+                        position=sni_container.position))
 
             if (listener.default_pool and
                 listener.default_pool.provisioning_status !=
@@ -397,18 +440,55 @@ class RadwareLBaaSV2Driver(base_v2_driver.RadwareLBaaSBaseV2Driver):
                         member_dict[prop] = getattr(
                             member, prop,
                             PROPERTY_DEFAULTS.get(prop))
-                    if (proxy_port_address != lb.vip_address and
-                        netaddr.IPAddress(member.address)
-                        not in netaddr.IPNetwork(proxy_subnet['cidr'])):
+                    route_key = (member.id, member.address)
+                    if route_key in member_routes:
+                        member_dict.update(member_routes[route_key])
+                    elif (proxy_port_address != lb.vip_address and
+                          netaddr.IPAddress(member.address)
+                          not in netaddr.IPNetwork(proxy_subnet['cidr'])):
                         self._accomplish_member_static_route_data(
                             ctx, member, member_dict,
                             proxy_subnet['gateway_ip'])
+                    lb_state.member_routes[route_key] = dict(
+                        (key, member_dict[key])
+                        for key in ('subnet', 'mask', 'gw'))
                     pool_dict['members'].append(member_dict)
 
                 listener_dict['default_pool'] = pool_dict
             graph['listeners'].append(listener_dict)
         return graph
 
+    @staticmethod
+    def _get_cert_payloads(lb_state, listeners):
+        """Returns the certificate payloads of the listeners by container id.
+
+        The payloads are kept in the load balancer state, so only the
+        containers new to the load balancer are read from the cert manager.
+        """
+        cert_refs = set()
+        for listener in listeners:
+            cert_refs.update(
+                sni_container.tls_container_id
+                for sni_container in listener.sni_containers or [])
+            if listener.default_tls_container_id:
+                cert_refs.add(listener.default_tls_container_id)
+        certs = dict((cert_ref, lb_state.certs[cert_ref])
+                     for cert_ref in cert_refs if cert_ref in lb_state.certs)
+        to_fetch = [cert_ref for cert_ref in cert_refs
+                    if cert_ref not in certs]
+        if to_fetch:
+            fetched = CERT_MANAGER.get_certs(
+                to_fetch, service_name='Neutron LBaaS v2 Radware provider')
+            for cert_ref, cert in zip(to_fetch, fetched):
+                certs[cert_ref] = {
+                    'certificate': cert.get_certificate(),
+                    'intermediates': cert.get_intermediates(),
+                    'private_key': cert.get_private_key(),
+                    'passphrase': cert.get_private_key_passphrase()}
+        # containers no longer used by the load balancer are dropped
+        lb_state.certs = certs
+        return certs
+
     def _get_proxy_port_subnet_id(self, lb):
         """Look for at least one member of any listener's pool
         that is located on subnet different than loabalancer's subnet.
@@ -515,21 +595,84 @@ class RadwareLBaaSV2Driver(base_v2_driver.RadwareLBaaSBaseV2Driver):
         member_data['gw'] = proxy_gateway_ip
 
 
-class OperationCompletionHandler(threading.Thread):
+class _LoadBalancerState(object):
+
+    """What the driver keeps of a load balancer between operations."""
+
+    def __init__(self, proxy_port_address, proxy_subnet):
+        self.proxy_port_address = proxy_port_address
+        self.proxy_subnet = proxy_subnet
+        # certificate payloads by container id
+        self.certs = {}
+        # static route data of the members by (member id, address)
+        self.member_routes = {}
+        # the objects graph of the last action, None if unknown
+        self.graph = None
+
+
+def _diff_members(old_members, new_members):
+    old_members = dict((member['id'], member) for member in old_members)
+    new_ids = set(member['id'] for member in new_members)
+    return ([member for member in new_members
+             if old_members.get(member['id']) != member],
+            [member_id for member_id in old_members
+             if member_id not in new_ids])
+
+
+def _diff_pool(old_pool, new_pool):
+    if old_pool is None or old_pool['id'] != new_pool['id']:
+        return new_pool
+    pool_diff = dict((key, value) for key, value in new_pool.items()
+                     if key != 'members')
+    pool_diff['members'], pool_diff['removed_members'] = _diff_members(
+        old_pool['members'], new_pool['members'])
+    return pool_diff
+
+
+def _diff_objects_graph(old_graph, new_graph):
+    """Returns the part of new_graph that differs from old_graph.
+
+    The load balancer properties are always given.  Only the listeners
+    added or changed are listed, each with its properties, the
+    certificates and pool that changed, and the removed listeners are
+    given by id.  A changed pool of the same id lists only its added or
+    changed members and the ids of the removed ones.
+    """
+    diff = dict((key, value) for key, value in new_graph.items()
+                if key != 'listeners')
+    old_listeners = dict((listener['id'], listener)
+                         for listener in old_graph['listeners'])
+    diff['listeners'] = []
+    for listener in new_graph['listeners']:
+        old_listener = old_listeners.pop(listener['id'], None)
+        if old_listener == listener:
+            continue
+        if old_listener is None:
+            diff['listeners'].append(listener)
+            continue
+        listener_diff = dict(
+            (key, value) for key, value in listener.items()
+            if key in LISTENER_PROPERTIES or
+            old_listener.get(key) != value)
+        # certificates or pool removed from the listener
+        listener_diff.update((key, None) for key in old_listener
+                             if key not in listener)
+        if listener_diff.get('default_pool') is not None:
+            listener_diff['default_pool'] = _diff_pool(
+                old_listener.get('default_pool'), listener['default_pool'])
+        diff['listeners'].append(listener_diff)
+    diff['removed_listeners'] = list(old_listeners)
+    return diff
+
+
+class OperationCompletionHandler(completion_scheduler.CompletionScheduler):
 
     """Update DB with operation status or delete the entity from DB."""
 
-    def __init__(self, queue, rest_client, plugin):
-        threading.Thread.__init__(self)
-        self.queue = queue
+    def __init__(self, queue, rest_client, plugin, **kwargs):
+        super(OperationCompletionHandler, self).__init__(queue, **kwargs)
         self.rest_client = rest_client
         self.plugin = plugin
-        self.stoprequest = threading.Event()
-        self.opers_to_handle_before_rest = 0
-
-    def join(self, timeout=None):
-        self.stoprequest.set()
-        super(OperationCompletionHandler, self).join(timeout)
 
     def handle_operation_completion(self, oper):
         result = self.rest_client.call('GET',
@@ -571,40 +714,6 @@ class OperationCompletionHandler(threading.Thread):
 
         return completed
 
-    def run(self):
-        while not self.stoprequest.isSet():
-            try:
-                oper = self.queue.get(timeout=1)
-
-                # Get the current queue size (N) and set the counter with it.
-                # Handle N operations with no intermission.
-                # Once N operations handles, get the size again and repeat.
-                if self.opers_to_handle_before_rest <= 0:
-                    self.opers_to_handle_before_rest = self.queue.qsize() + 1
-
-                LOG.debug('Operation consumed from the queue: ' +
-                          str(oper))
-                # check the status - if oper is done: update the db ,
-                # else push the oper again to the queue
-                if not self.handle_operation_completion(oper):
-                    LOG.debug('Operation %s is not completed yet..' % oper)
-                    # Not completed - push to the queue again
-                    self.queue.put_nowait(oper)
-
-                self.queue.task_done()
-                self.opers_to_handle_before_rest -= 1
-
-                # Take one second rest before start handling
-                # new operations or operations handled before
-                if self.opers_to_handle_before_rest <= 0:
-                    time.sleep(1)
-
-            except Queue.Empty:
-                continue
-            except Exception:
-                LOG.error(_LE(
-                    "Exception was thrown inside OperationCompletionHandler"))
-
     @staticmethod
     def _run_post_success_function(oper):
         try:
@@ -626,6 +735,8 @@ class OperationCompletionHandler(threading.Thread):
     def _run_post_failure_function(oper):
         try:
             ctx = context.get_admin_context()
+            if oper.post_failure_function:
+                oper.post_failure_function(ctx, oper.data_model)
             oper.manager.failed_completion(ctx, oper.data_model)
             LOG.debug('Post-operation failure function completed '
                       'for operation %s',
@@ -648,7 +759,8 @@ class OperationAttributes(object):
                  data_model=None,
                  old_data_model=None,
                  delete=False,
-                 post_operation_function=None):
+                 post_operation_function=None,
+                 post_failure_function=None):
         self.manager = manager
         self.operation_url = operation_url
         self.lb = lb
@@ -656,6 +768,7 @@ class OperationAttributes(object):
         self.old_data_model = old_data_model
         self.delete = delete
         self.post_operation_function = post_operation_function
+        self.post_failure_function = post_failure_function
         self.creation_time = time.time()
 
     def __repr__(self):
@@ -31,6 +31,7 @@ from neutron_lbaas.services.loadbalancer import constants as lb_const
 LOADBALANCER = 'agent-loadbalancer'
 LOADBALANCERS = LOADBALANCER + 's'
 LOADBALANCER_AGENT = 'loadbalancer-hosting-agent'
+LOADBALANCER_EVACUATION = 'loadbalancer-evacuation'
 
 
 class LoadBalancerSchedulerController(wsgi.Controller):
@@ -64,6 +65,22 @@ class LbaasAgentHostingLoadBalancerController(wsgi.Controller):
             request.context, kwargs['loadbalancer_id'])
 
 
+class LoadBalancerEvacuationController(wsgi.Controller):
+    def create(self, request, body=None, **kwargs):
+        lbaas_plugin = manager.NeutronManager.get_service_plugins().get(
+            plugin_const.LOADBALANCERV2)
+        if not lbaas_plugin:
+            return {'loadbalancers': []}
+
+        policy.enforce(request.context,
+                       "create_%s" % LOADBALANCER_EVACUATION,
+                       {},
+                       plugin=lbaas_plugin)
+        loadbalancer_ids = lbaas_plugin.db.evacuate_lbaas_agent(
+            request.context, lbaas_plugin, kwargs['agent_id'])
+        return {'loadbalancers': loadbalancer_ids}
+
+
 class Lbaas_agentschedulerv2(extensions.ExtensionDescriptor):
     """Extension class supporting LBaaS agent scheduler.
     """
@@ -100,6 +117,11 @@ class Lbaas_agentschedulerv2(extensions.ExtensionDescriptor):
         exts.append(extensions.ResourceExtension(
             LOADBALANCERS, controller, parent))
 
+        controller = resource.Resource(LoadBalancerEvacuationController(),
+                                       base.FAULT_MAP)
+        exts.append(extensions.ResourceExtension(
+            LOADBALANCER_EVACUATION, controller, parent))
+
         parent = dict(member_name="loadbalancer",
                       collection_name="loadbalancers")
 
@@ -124,6 +146,10 @@ class NoActiveLbaasAgent(agent.AgentNotFound):
                 "for loadbalancer %(loadbalancer_id)s.")
 
 
+class InvalidLbaasAgent(agent.AgentNotFound):
+    message = _("Agent %(id)s is not a LBaaS agent.")
+
+
 class LbaasAgentSchedulerPluginBase(object):
     """REST API to operate the lbaas agent scheduler.
 
@@ -138,3 +164,7 @@ class LbaasAgentSchedulerPluginBase(object):
     def get_agent_hosting_loadbalancer(self, context, loadbalancer_id,
                                        active=None):
         pass
+
+    @abc.abstractmethod
+    def evacuate_lbaas_agent(self, context, plugin, agent_id):
+        pass
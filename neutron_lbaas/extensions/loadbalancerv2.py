@@ -93,6 +93,10 @@ class MemberExists(nexception.Conflict):
                 "already present in pool %(pool)s")
 
 
+class MemberBatchInvalid(nexception.BadRequest):
+    message = _("Invalid member batch for pool %(pool_id)s: %(reason)s")
+
+
 class MemberAddressTypeSubnetTypeMismatch(nexception.NeutronException):
     message = _("Member with address %(address)s and subnet %(subnet_id) "
                 "have mismatched IP versions")
@@ -449,7 +453,8 @@ class Loadbalancerv2(extensions.ExtensionDescriptor):
     def get_resources(cls):
         plural_mappings = resource_helper.build_plural_mappings(
             {}, RESOURCE_ATTRIBUTE_MAP)
-        action_map = {'loadbalancer': {'stats': 'GET', 'statuses': 'GET'}}
+        action_map = {'loadbalancer': {'stats': 'GET', 'statuses': 'GET'},
+                      'pool': {'update_members': 'PUT'}}
         plural_mappings['members'] = 'member'
         plural_mappings['sni_container_refs'] = 'sni_container_ref'
         attr.PLURALS.update(plural_mappings)
@@ -513,7 +518,9 @@ class LoadBalancerPluginBaseV2(service_base.ServicePluginBase):
         return 'LoadBalancer service plugin v2'
 
     @abc.abstractmethod
-    def get_loadbalancers(self, context, filters=None, fields=None):
+    def get_loadbalancers(self, context, filters=None, fields=None,
+                          sorts=None, limit=None, marker=None,
+                          page_reverse=False):
         pass
 
     @abc.abstractmethod
@@ -541,7 +548,9 @@ class LoadBalancerPluginBaseV2(service_base.ServicePluginBase):
         pass
 
     @abc.abstractmethod
-    def get_listeners(self, context, filters=None, fields=None):
+    def get_listeners(self, context, filters=None, fields=None,
+                      sorts=None, limit=None, marker=None,
+                      page_reverse=False):
         pass
 
     @abc.abstractmethod
@@ -553,7 +562,9 @@ class LoadBalancerPluginBaseV2(service_base.ServicePluginBase):
         pass
 
     @abc.abstractmethod
-    def get_pools(self, context, filters=None, fields=None):
+    def get_pools(self, context, filters=None, fields=None,
+                  sorts=None, limit=None, marker=None,
+                  page_reverse=False):
         pass
 
     @abc.abstractmethod
@@ -579,7 +590,9 @@ class LoadBalancerPluginBaseV2(service_base.ServicePluginBase):
     @abc.abstractmethod
     def get_pool_members(self, context, pool_id,
                          filters=None,
-                         fields=None):
+                         fields=None,
+                         sorts=None, limit=None, marker=None,
+                         page_reverse=False):
         pass
 
     @abc.abstractmethod
@@ -600,7 +613,13 @@ class LoadBalancerPluginBaseV2(service_base.ServicePluginBase):
         pass
 
     @abc.abstractmethod
-    def get_healthmonitors(self, context, filters=None, fields=None):
+    def update_members(self, context, pool_id, body):
+        pass
+
+    @abc.abstractmethod
+    def get_healthmonitors(self, context, filters=None, fields=None,
+                           sorts=None, limit=None, marker=None,
+                           page_reverse=False):
         pass
 
     @abc.abstractmethod
@@ -21,12 +21,14 @@ import neutron_lbaas.common.cert_manager
 import neutron_lbaas.common.cert_manager.local_cert_manager
 import neutron_lbaas.common.keystone
 import neutron_lbaas.drivers.common.agent_driver_base
+import neutron_lbaas.drivers.haproxy.namespace_driver
 import neutron_lbaas.drivers.octavia.driver
 import neutron_lbaas.drivers.radware.base_v2_driver
 import neutron_lbaas.extensions.loadbalancerv2
 import neutron_lbaas.services.loadbalancer.agent.agent_manager
 import neutron_lbaas.services.loadbalancer.drivers.haproxy.jinja_cfg
 import neutron_lbaas.services.loadbalancer.drivers.haproxy.namespace_driver
+import neutron_lbaas.services.loadbalancer.drivers.netscaler.ncc_client
 import neutron_lbaas.services.loadbalancer.drivers.netscaler.netscaler_driver
 import neutron_lbaas.services.loadbalancer.drivers.radware.driver
 
@@ -41,8 +43,11 @@ def list_agent_opts():
              neutron.agent.common.config.INTERFACE_DRIVER_OPTS)
          ),
         ('haproxy',
-         neutron_lbaas.services.loadbalancer.drivers.haproxy.
-         namespace_driver.OPTS)
+         itertools.chain(
+             neutron_lbaas.services.loadbalancer.drivers.haproxy.
+             namespace_driver.OPTS,
+             neutron_lbaas.drivers.haproxy.namespace_driver.OPTS)
+         )
     ]
 
 
@@ -75,8 +80,12 @@ def list_service_opts():
         ('radwarev2_debug',
          neutron_lbaas.drivers.radware.base_v2_driver.driver_debug_opts),
         ('netscaler_driver',
-         neutron_lbaas.services.loadbalancer.drivers.netscaler.
-         netscaler_driver.NETSCALER_CC_OPTS),
+         itertools.chain(
+             neutron_lbaas.services.loadbalancer.drivers.netscaler.
+             netscaler_driver.NETSCALER_CC_OPTS,
+             neutron_lbaas.services.loadbalancer.drivers.netscaler.
+             ncc_client.NCC_CLIENT_OPTS)
+         ),
         ('haproxy',
          itertools.chain(
              neutron.agent.common.config.INTERFACE_DRIVER_OPTS,
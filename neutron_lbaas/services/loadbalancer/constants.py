@@ -77,6 +77,10 @@ SUPPORTED_SP_TYPES = (SESSION_PERSISTENCE_SOURCE_IP,
                       SESSION_PERSISTENCE_HTTP_COOKIE,
                       SESSION_PERSISTENCE_APP_COOKIE)
 
+# Member attributes that a batch member update is allowed to change in place;
+# any other difference is treated as a different member.
+MEMBER_BATCH_MUTABLE_ATTRIBUTES = ('weight', 'admin_state_up', 'name')
+
 STATS_ACTIVE_CONNECTIONS = 'active_connections'
 STATS_MAX_CONNECTIONS = 'max_connections'
 STATS_TOTAL_CONNECTIONS = 'total_connections'
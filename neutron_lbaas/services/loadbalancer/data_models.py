@@ -28,32 +28,79 @@ and also converting to dictionaries.
 from neutron.db import model_base
 from neutron.db import models_v2
 from neutron.db import servicetype_db
+import six
+import sqlalchemy as sa
 from sqlalchemy.ext import orderinglist
 from sqlalchemy.orm import collections
 
 from neutron_lbaas.db.loadbalancer import models
 
+# Kinds of attributes in a conversion plan, see _conversion_plan.
+_COLUMN, _SCALAR, _COLLECTION, _UNMAPPED = range(4)
+
+# (data model class, SQLAlchemy model class) -> conversion plan
+_CONVERSION_PLANS = {}
+
+
+def _conversion_plan(data_class, sa_class):
+    """Returns how to copy a SQLAlchemy model into a data model.
+
+    The plan lists every public attribute of the data model together with
+    the attribute of the SQLAlchemy model it is read from, what the mapper
+    says that attribute is and, for relationships, the data model of the
+    related rows.  Converting an instance thus does not have to inspect
+    each value.  Plans are computed once per pair of classes.
+    """
+    key = (data_class, sa_class)
+    plan = _CONVERSION_PLANS.get(key)
+    if plan is not None:
+        return plan
+
+    attr_mapping = vars(data_class).get('attr_mapping') or {}
+    mapper = sa.inspect(sa_class)
+    plan = []
+    for attr_name in vars(data_class()):
+        if attr_name.startswith('_'):
+            continue
+        source = attr_mapping.get(attr_name, attr_name)
+        relationship = mapper.relationships.get(source)
+        related_class = None
+        if relationship is not None:
+            related_class = SA_MODEL_TO_DATA_MODEL_MAP.get(
+                relationship.mapper.class_)
+            # anything unexpected is left to the checks done at runtime
+            kind = _UNMAPPED
+            if related_class:
+                kind = _COLLECTION if relationship.uselist else _SCALAR
+        elif source in mapper.column_attrs:
+            kind = _COLUMN
+        else:
+            kind = _UNMAPPED
+        plan.append((attr_name, source, kind, related_class))
+    _CONVERSION_PLANS[key] = plan
+    return plan
+
 
 class BaseDataModel(object):
 
     def to_dict(self, **kwargs):
         ret = {}
-        for attr in self.__dict__:
+        for attr, value in six.iteritems(self.__dict__):
             if attr.startswith('_') or not kwargs.get(attr, True):
                 continue
-            if isinstance(getattr(self, attr), list):
+            if isinstance(value, list):
                 ret[attr] = []
-                for item in self.__dict__[attr]:
+                for item in value:
                     if isinstance(item, BaseDataModel):
                         ret[attr].append(item.to_dict())
                     else:
                         ret[attr] = item
-            elif isinstance(getattr(self, attr), BaseDataModel):
-                ret[attr] = self.__dict__[attr].to_dict()
-            elif isinstance(self.__dict__[attr], unicode):
-                ret[attr.encode('utf8')] = self.__dict__[attr].encode('utf8')
+            elif isinstance(value, BaseDataModel):
+                ret[attr] = value.to_dict()
+            elif isinstance(value, unicode):
+                ret[attr.encode('utf8')] = value.encode('utf8')
             else:
-                ret[attr] = self.__dict__[attr]
+                ret[attr] = value
         return ret
 
     def to_api_dict(self, **kwargs):
@@ -65,36 +112,51 @@ class BaseDataModel(object):
 
     @classmethod
     def from_sqlalchemy_model(cls, sa_model, calling_class=None):
-        attr_mapping = vars(cls).get("attr_mapping")
         instance = cls()
-        for attr_name in vars(instance):
-            if attr_name.startswith('_'):
-                continue
-            if attr_mapping and attr_name in attr_mapping.keys():
-                attr = getattr(sa_model, attr_mapping[attr_name])
-            else:
-                attr = getattr(sa_model, attr_name)
-            # Handles M:1 or 1:1 relationships
-            if isinstance(attr, model_base.BASEV2):
-                if hasattr(instance, attr_name):
-                    data_class = SA_MODEL_TO_DATA_MODEL_MAP[attr.__class__]
-                    if calling_class != data_class and data_class:
-                        setattr(instance, attr_name,
-                                data_class.from_sqlalchemy_model(
-                                    attr, calling_class=cls))
-            # Handles 1:M or M:M relationships
-            elif (isinstance(attr, collections.InstrumentedList) or
-                 isinstance(attr, orderinglist.OrderingList)):
-                for item in attr:
-                    if hasattr(instance, attr_name):
-                        data_class = SA_MODEL_TO_DATA_MODEL_MAP[item.__class__]
-                        attr_list = getattr(instance, attr_name) or []
-                        attr_list.append(data_class.from_sqlalchemy_model(
-                            item, calling_class=cls))
-                        setattr(instance, attr_name, attr_list)
-            # This isn't a relationship so it must be a "primitive"
-            else:
-                setattr(instance, attr_name, attr)
+        # The graph is walked with a stack of (data model, SQLAlchemy model,
+        # class of the data model referring to it) rather than by recursion.
+        # A M:1 or 1:1 reference back to the referring class is not
+        # followed, which keeps the result a tree.
+        stack = [(instance, sa_model, calling_class)]
+        while stack:
+            target, source, referrer = stack.pop()
+            target_class = target.__class__
+            attrs = target.__dict__
+            plan = _conversion_plan(target_class, source.__class__)
+            for attr_name, source_name, kind, related_class in plan:
+                if kind == _SCALAR and related_class == referrer:
+                    # not even loaded, it would not be converted anyway
+                    continue
+                value = getattr(source, source_name)
+                if kind == _UNMAPPED:
+                    if isinstance(value, model_base.BASEV2):
+                        kind = _SCALAR
+                    elif isinstance(value, (collections.InstrumentedList,
+                                            orderinglist.OrderingList)):
+                        kind = _COLLECTION
+                    else:
+                        kind = _COLUMN
+
+                # Handles M:1 or 1:1 relationships
+                if kind == _SCALAR and value is not None:
+                    data_class = SA_MODEL_TO_DATA_MODEL_MAP[value.__class__]
+                    if referrer != data_class and data_class:
+                        child = data_class()
+                        attrs[attr_name] = child
+                        stack.append((child, value, target_class))
+                # Handles 1:M or M:M relationships
+                elif kind == _COLLECTION:
+                    if not value:
+                        continue
+                    items = attrs[attr_name] or []
+                    for item in value:
+                        child = SA_MODEL_TO_DATA_MODEL_MAP[item.__class__]()
+                        items.append(child)
+                        stack.append((child, item, target_class))
+                    attrs[attr_name] = items
+                # This isn't a relationship so it must be a "primitive"
+                else:
+                    attrs[attr_name] = value
         return instance
 
     @property
@@ -12,6 +12,7 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import hashlib
 import os
 
 import jinja2
@@ -26,7 +27,12 @@ from neutron_lbaas.common.tls_utils import cert_parser
 from neutron_lbaas.services.loadbalancer import constants
 from neutron_lbaas.services.loadbalancer import data_models
 
-CERT_MANAGER_PLUGIN = cert_manager.get_backend()
+CERT_MANAGER = cert_manager.get_cached_cert_manager()
+
+# Digests of the PEM bundles last written, keyed by their path.  The
+# entries of a load balancer are dropped by forget_stored_certificates when
+# its directory is removed.
+_STORED_PEM_DIGESTS = {}
 
 PROTOCOL_MAP = {
     constants.PROTOCOL_TCP: 'tcp',
@@ -57,6 +63,14 @@ STATS_MAP = {
 MEMBER_STATUSES = plugin_constants.ACTIVE_PENDING_STATUSES + (
     plugin_constants.INACTIVE,)
 
+# stored next to the configuration file, holds the hash of the last saved
+# configuration and certificates
+DIGEST_SUFFIX = '.sha256'
+
+# admin level socket accepting runtime changes, created next to the stats
+# socket and only reachable by its owner and the haproxy user group
+ADMIN_SOCKET_NAME = 'haproxy_admin.sock'
+
 TEMPLATES_DIR = os.path.abspath(
     os.path.join(os.path.dirname(__file__), 'templates/'))
 JINJA_ENV = None
@@ -77,17 +91,74 @@ def save_config(conf_path, loadbalancer, socket_path, user_group,
                 haproxy_base_dir):
     """Convert a logical configuration to the HAProxy version.
 
+    The configuration file is left untouched when neither the rendered
+    configuration nor the stored certificates changed since the last save.
+
     :param conf_path: location of Haproxy configuration
     :param loadbalancer: the load balancer object
     :param socket_path: location of haproxy socket data
     :param user_group: user group
     :param haproxy_base_dir: location of the instances state data
+    :returns: True if the configuration or certificates changed
     """
     config_str = render_loadbalancer_obj(loadbalancer,
                                          user_group,
                                          socket_path,
                                          haproxy_base_dir)
+    digest = _config_digest(config_str, loadbalancer, haproxy_base_dir)
+    digest_path = conf_path + DIGEST_SUFFIX
+    if os.path.exists(conf_path) and _read_file(digest_path) == digest:
+        return False
     n_utils.replace_file(conf_path, config_str)
+    n_utils.replace_file(digest_path, digest)
+    return True
+
+
+def discard_digest(conf_path):
+    """Forget which configuration was saved last
+
+    For when haproxy did not load the saved configuration: the next
+    save_config writes it again and reports it as changed.
+
+    :param conf_path: location of Haproxy configuration
+    """
+    try:
+        os.remove(conf_path + DIGEST_SUFFIX)
+    except OSError:
+        pass
+
+
+def _config_digest(config_str, loadbalancer, haproxy_base_dir):
+    """Hash the configuration together with the stored certificates
+
+    :param config_str: the rendered configuration
+    :param loadbalancer: the load balancer object
+    :param haproxy_base_dir: location of the instances state data
+    :returns: hex digest
+    """
+    digest = hashlib.sha256(config_str.encode('utf-8'))
+    for listener in loadbalancer.listeners:
+        crt_dir = os.path.join(haproxy_base_dir, listener.id)
+        if not os.path.isdir(crt_dir):
+            continue
+        for name in sorted(os.listdir(crt_dir)):
+            if name.endswith('.pem'):
+                with open(os.path.join(crt_dir, name), 'rb') as crt:
+                    digest.update(crt.read())
+    return digest.hexdigest()
+
+
+def _read_file(path):
+    """Read a state file
+
+    :param path: location of the file
+    :returns: the file content or None if it can not be read
+    """
+    try:
+        with open(path, 'r') as f:
+            return f.read()
+    except IOError:
+        return None
 
 
 def _get_template():
@@ -117,10 +188,32 @@ def _store_listener_crt(haproxy_base_dir, listener, cert):
                                    cert.primary_cn)
     # build a string that represents the pem file to be saved
     pem = _build_pem(cert)
-    n_utils.replace_file(cert_path, pem)
+    digest = hashlib.sha256(pem.encode('utf-8')).hexdigest()
+    # the bundle written last time is known by its digest, the file only
+    # needs to be compared when the rendered bundle differs from it
+    if (_STORED_PEM_DIGESTS.get(cert_path) == digest and
+            os.path.exists(cert_path)):
+        return cert_path
+    if _read_file(cert_path) != pem:
+        n_utils.replace_file(cert_path, pem)
+    _STORED_PEM_DIGESTS[cert_path] = digest
     return cert_path
 
 
+def forget_stored_certificates(haproxy_base_dir):
+    """Forget the certificates stored under a load balancer directory
+
+    For when the directory is removed along with the load balancer.
+
+    :param haproxy_base_dir: location of the instances state data
+    """
+    confs_dir = os.path.join(
+        os.path.abspath(os.path.normpath(haproxy_base_dir)), '')
+    for cert_path in list(_STORED_PEM_DIGESTS):
+        if cert_path.startswith(confs_dir):
+            _STORED_PEM_DIGESTS.pop(cert_path, None)
+
+
 def _retrieve_crt_path(haproxy_base_dir, listener, primary_cn):
     """Retrieve TLS certificate location
 
@@ -146,22 +239,18 @@ def _process_tls_certificates(listener):
     :param listener: the listener object
     :returns: TLS_CERT and SNI_CERTS
     """
-    cert_mgr = CERT_MANAGER_PLUGIN.CertManager()
+    cert_refs = [sni_cont.tls_container_id
+                 for sni_cont in listener.sni_containers or []]
+    if listener.default_tls_container_id:
+        cert_refs.insert(0, listener.default_tls_container_id)
+    certs = CERT_MANAGER.get_certs(cert_refs, check_only=True)
 
     tls_cert = None
-    sni_certs = []
-    # Retrieve, map and store default TLS certificate
+    # Map the default TLS certificate
     if listener.default_tls_container_id:
-        tls_cert = _map_cert_tls_container(
-            cert_mgr.get_cert(
-                listener.default_tls_container_id,
-                check_only=True))
-    if listener.sni_containers:
-        # Retrieve, map and store SNI certificates
-        for sni_cont in listener.sni_containers:
-            cert_container = _map_cert_tls_container(
-                cert_mgr.get_cert(sni_cont.tls_container_id, check_only=True))
-            sni_certs.append(cert_container)
+        tls_cert = _map_cert_tls_container(certs.pop(0))
+    # Map the SNI certificates
+    sni_certs = [_map_cert_tls_container(cert) for cert in certs]
 
     return {'tls_cert': tls_cert, 'sni_certs': sni_certs}
 
@@ -219,9 +308,12 @@ def render_loadbalancer_obj(loadbalancer, user_group, socket_path,
     :returns: rendered load balancer configuration
     """
     loadbalancer = _transform_loadbalancer(loadbalancer, haproxy_base_dir)
+    admin_socket_path = os.path.join(os.path.dirname(socket_path),
+                                     ADMIN_SOCKET_NAME)
     return _get_template().render({'loadbalancer': loadbalancer,
                                    'user_group': user_group,
-                                   'stats_sock': socket_path},
+                                   'stats_sock': socket_path,
+                                   'admin_sock': admin_socket_path},
                                   constants=constants)
 
 
@@ -352,11 +444,14 @@ def _transform_health_monitor(monitor):
 def _include_member(member):
     """Helper for verifying member statues
 
+    Members that are administratively down are still included and rendered
+    as disabled servers, so they can be enabled through the admin socket
+    without reloading haproxy.
+
     :param member: the member object
     :returns: boolean of status check
     """
-    return (member.provisioning_status in
-            MEMBER_STATUSES and member.admin_state_up)
+    return member.provisioning_status in MEMBER_STATUSES
 
 
 def _expand_expected_codes(codes):
@@ -13,13 +13,19 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import threading
+import time
+
 import requests
 
 from neutron.common import exceptions as n_exc
+from oslo_config import cfg
 from oslo_log import log as logging
 from oslo_serialization import jsonutils
+from oslo_utils import uuidutils
 
 from neutron_lbaas._i18n import _LE, _LI
+from neutron_lbaas.common import request_stats
 
 LOG = logging.getLogger(__name__)
 
@@ -32,6 +38,39 @@ JSON_CONTENT_TYPE = 'application/json'
 DRIVER_HEADER_VALUE = 'netscaler-openstack-lbaas'
 NITRO_LOGIN_URI = 'nitro/v2/config/login'
 
+DEFAULT_POOL_SIZE = 10
+DEFAULT_SESSION_TTL = 600
+DEFAULT_STATS_LOG_INTERVAL = 300
+
+# Options of the client, registered by the v1 and v2 drivers along with
+# their own options.
+NCC_CLIENT_OPTS = [
+    cfg.IntOpt(
+        'netscaler_ncc_pool_size',
+        default=DEFAULT_POOL_SIZE,
+        help=_('Number of connections kept open to the NetScaler Control '
+               'Center Server.'),
+    ),
+    cfg.IntOpt(
+        'netscaler_ncc_session_ttl',
+        default=DEFAULT_SESSION_TTL,
+        help=_('Seconds after which the session with the NetScaler '
+               'Control Center Server is renewed before being used, 0 to '
+               'renew it only once rejected. Should be shorter than the '
+               'session timeout of the server.'),
+    ),
+    cfg.IntOpt(
+        'netscaler_ncc_stats_log_interval',
+        default=DEFAULT_STATS_LOG_INTERVAL,
+        help=_('Seconds between two logs of the request counters of the '
+               'NetScaler Control Center Server, 0 to disable them.'),
+    ),
+]
+
+
+def register_opts(conf=cfg.CONF):
+    conf.register_opts(NCC_CLIENT_OPTS, 'netscaler_driver')
+
 
 class NCCException(n_exc.NeutronException):
 
@@ -53,18 +92,42 @@ class NCCException(n_exc.NeutronException):
             return True
 
 
+def request_resource(resource_path):
+    """Returns a Control Center resource path with the ids left out."""
+    return '/'.join('{id}' if uuidutils.is_uuid_like(segment) else segment
+                    for segment in resource_path.split('?')[0].split('/'))
+
+
 class NSClient(object):
 
-    """Client to operate on REST resources of NetScaler Control Center."""
+    """Client to operate on REST resources of NetScaler Control Center.
+
+    Requests go through a session keeping up to pool_size connections
+    alive.  The login session is renewed session_ttl seconds after being
+    opened, before Control Center rejects it.  The request counters are
+    logged every stats_log_interval seconds, never if it is 0.
+    """
 
     def __init__(self, service_uri, username, password,
-                 ncc_cleanup_mode="False"):
+                 ncc_cleanup_mode="False", pool_size=DEFAULT_POOL_SIZE,
+                 session_ttl=DEFAULT_SESSION_TTL, stats_log_interval=0):
         if not service_uri:
             LOG.exception(_LE("No NetScaler Control Center URI specified. "
                               "Cannot connect."))
             raise NCCException(NCCException.CONNECTION_ERROR)
         self.service_uri = service_uri.strip('/')
         self.auth = None
+        self.auth_expires = None
+        self.session_ttl = session_ttl
+        self._login_lock = threading.Lock()
+        self.stats = request_stats.RequestStats(
+            request_resource, name='NetScaler Control Center',
+            log_interval=stats_log_interval)
+        self.session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=1,
+                                                pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
         self.cleanup_mode = False
         if username and password:
             self.username = username
@@ -115,6 +178,8 @@ class NSClient(object):
                 {"session_id": session_id})
             # Update sessin_id in auth
             self.auth = "SessId=%s" % session_id
+            if self.session_ttl > 0:
+                self.auth_expires = time.time() + self.session_ttl
         else:
             raise NCCException(NCCException.RESPONSE_ERROR)
 
@@ -140,9 +205,12 @@ class NSClient(object):
     def _resource_operation(self, method, tenant_id, resource_path,
                             object_name=None, object_data=None):
         resource_uri = "%s/%s" % (self.service_uri, resource_path)
-        if not self.auth and not self.is_login(resource_uri):
-            # Creating a session for the first time
-            self.login()
+        if not self.is_login(resource_uri) and self._is_login_needed():
+            with self._login_lock:
+                # another thread may have logged in meanwhile
+                if self._is_login_needed():
+                    # Creating a session for the first time or renewing it
+                    self.login()
         headers = self._setup_req_headers(tenant_id)
         request_body = None
         if object_data:
@@ -165,6 +233,29 @@ class NSClient(object):
 
         return response_status, resp_dict
 
+    def _is_login_needed(self):
+        return (not self.auth or (self.auth_expires is not None and
+                                  time.time() >= self.auth_expires))
+
+    def _send(self, method, resource_uri, headers, body):
+        resource_path = resource_uri[len(self.service_uri) + 1:]
+        start = time.time()
+        try:
+            response = self.session.request(method, url=resource_uri,
+                                            headers=headers, data=body)
+        except Exception:
+            self.stats.record(method, resource_path, time.time() - start,
+                              error=True)
+            raise
+        elapsed = time.time() - start
+        self.stats.record(
+            method, resource_path, elapsed,
+            error=not self._is_valid_response(int(response.status_code)))
+        LOG.debug("%(method)s %(path)s: %(status)s in %(elapsed).3f s",
+                  {"method": method, "path": resource_path,
+                   "status": response.status_code, "elapsed": elapsed})
+        return response
+
     def _is_valid_response(self, response_status):
         # when status is less than 400, the response is fine
         return response_status < requests.codes.bad_request
@@ -189,8 +280,7 @@ class NSClient(object):
     def _execute_request(self, method, resource_uri, headers, body=None):
         service_uri_dict = {"service_uri": self.service_uri}
         try:
-            response = requests.request(method, url=resource_uri,
-                                        headers=headers, data=body)
+            response = self._send(method, resource_uri, headers, body)
         except requests.exceptions.SSLError:
             LOG.exception(_LE("SSL error occurred while connecting "
                               "to %(service_uri)s"),
@@ -236,10 +326,10 @@ class NSClient(object):
                 self.login()
                 # Retry the operation
                 headers.update({AUTH_HEADER: self.auth})
-                self._execute_request(method,
-                                      resource_uri,
-                                      headers,
-                                      body)
+                return self._execute_request(method,
+                                             resource_uri,
+                                             headers,
+                                             body)
             else:
                 raise NCCException(NCCException.RESPONSE_ERROR)
         if not self._is_valid_response(response_status):
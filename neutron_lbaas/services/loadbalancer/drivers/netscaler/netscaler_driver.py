@@ -40,6 +40,7 @@ NETSCALER_CC_OPTS = [
 ]
 
 cfg.CONF.register_opts(NETSCALER_CC_OPTS, 'netscaler_driver')
+ncc_client.register_opts()
 
 VIPS_RESOURCE = 'vips'
 VIP_RESOURCE = 'vip'
@@ -64,9 +65,14 @@ class NetScalerPluginDriver(abstract_driver.LoadBalancerAbstractDriver):
         ncc_uri = cfg.CONF.netscaler_driver.netscaler_ncc_uri
         ncc_username = cfg.CONF.netscaler_driver.netscaler_ncc_username
         ncc_password = cfg.CONF.netscaler_driver.netscaler_ncc_password
-        self.client = ncc_client.NSClient(ncc_uri,
-                                          ncc_username,
-                                          ncc_password)
+        self.client = ncc_client.NSClient(
+            ncc_uri,
+            ncc_username,
+            ncc_password,
+            pool_size=cfg.CONF.netscaler_driver.netscaler_ncc_pool_size,
+            session_ttl=cfg.CONF.netscaler_driver.netscaler_ncc_session_ttl,
+            stats_log_interval=(
+                cfg.CONF.netscaler_driver.netscaler_ncc_stats_log_interval))
 
     def create_vip(self, context, vip):
         """Create a vip on a NetScaler device."""
@@ -14,9 +14,7 @@
 
 import base64
 import copy
-import httplib
 import netaddr
-import threading
 import time
 
 
@@ -35,6 +33,8 @@ from six.moves import queue as Queue
 
 from neutron_lbaas._i18n import _LE, _LI, _LW
 from neutron_lbaas.db.loadbalancer import loadbalancer_db as lb_db
+from neutron_lbaas.drivers.radware import completion_scheduler
+from neutron_lbaas.drivers.radware import rest_client
 from neutron_lbaas.extensions import loadbalancer
 from neutron_lbaas.services.loadbalancer.drivers import abstract_driver
 from neutron_lbaas.services.loadbalancer.drivers.radware \
@@ -130,7 +130,24 @@ driver_opts = [
     cfg.BoolOpt('service_session_mirroring_enabled',
                 default=False,
                 help=_('Enable or disable Alteon interswitch link for '
-                       'stateful session failover. Default: False.'))
+                       'stateful session failover. Default: False.')),
+    cfg.IntOpt('vdirect_connection_pool_size',
+               default=10,
+               help=_('Number of idle connections kept open to each '
+                      'vDirect server. Default: 10.')),
+    cfg.IntOpt('completion_poll_interval',
+               default=1,
+               help=_('Seconds before the completion of a vDirect '
+                      'operation is first polled. Default: 1.')),
+    cfg.IntOpt('completion_poll_max_interval',
+               default=30,
+               help=_('Longest interval between two polls of an '
+                      'incomplete vDirect operation, the interval being '
+                      'doubled after every poll. Default: 30.')),
+    cfg.IntOpt('completion_poll_concurrency',
+               default=10,
+               help=_('Number of vDirect operations polled in parallel. '
+                      'Default: 10.'))
 ]
 
 cfg.CONF.register_opts(driver_opts, "radware")
@@ -177,14 +194,18 @@ class LoadBalancerDriver(abstract_driver.LoadBalancerAbstractDriver):
         self.actions_to_skip = rad.actions_to_skip
         vdirect_address = rad.vdirect_address
         sec_server = rad.ha_secondary_address
-        self.rest_client = vDirectRESTClient(server=vdirect_address,
-                                             secondary_server=sec_server,
-                                             user=rad.vdirect_user,
-                                             password=rad.vdirect_password)
+        self.rest_client = vDirectRESTClient(
+            server=vdirect_address,
+            secondary_server=sec_server,
+            user=rad.vdirect_user,
+            password=rad.vdirect_password,
+            pool_size=rad.vdirect_connection_pool_size)
         self.queue = Queue.Queue()
-        self.completion_handler = OperationCompletionHandler(self.queue,
-                                                             self.rest_client,
-                                                             plugin)
+        self.completion_handler = OperationCompletionHandler(
+            self.queue, self.rest_client, plugin,
+            poll_interval=rad.completion_poll_interval,
+            max_poll_interval=rad.completion_poll_max_interval,
+            concurrency=rad.completion_poll_concurrency)
         self.workflow_templates_exists = False
         self.completion_handler.setDaemon(True)
         self.completion_handler_started = False
@@ -664,13 +685,16 @@ class vDirectRESTClient(object):
                  port=2189,
                  ssl=True,
                  timeout=5000,
-                 base_uri=''):
+                 base_uri='',
+                 pool_size=10):
         self.server = server
         self.secondary_server = secondary_server
         self.port = port
         self.ssl = ssl
         self.base_uri = base_uri
         self.timeout = timeout
+        self.pool = rest_client.ConnectionPool(ssl=ssl, timeout=timeout,
+                                               size=pool_size)
         if user and password:
             self.auth = base64.encodestring('%s:%s' % (user, password))
             self.auth = self.auth.replace('\n', '')
@@ -691,6 +715,8 @@ class vDirectRESTClient(object):
                         'switching to %(secondary)s'),
                     {'server': self.server,
                      'secondary': self.secondary_server})
+        # the connections kept to the failing server are likely dead
+        self.pool.clear(self.server)
         self.server, self.secondary_server = self.secondary_server, self.server
 
     def _recover(self, action, resource, data, headers, binary=False):
@@ -735,39 +761,21 @@ class vDirectRESTClient(object):
             headers = {'Authorization': 'Basic %s' % self.auth}
         else:
             headers['Authorization'] = 'Basic %s' % self.auth
-        conn = None
-        if self.ssl:
-            conn = httplib.HTTPSConnection(
-                self.server, self.port, timeout=self.timeout)
-            if conn is None:
-                LOG.error(_LE('vdirectRESTClient: Could not establish HTTPS '
-                          'connection'))
-                return 0, None, None, None
-        else:
-            conn = httplib.HTTPConnection(
-                self.server, self.port, timeout=self.timeout)
-            if conn is None:
-                LOG.error(_LE('vdirectRESTClient: Could not establish HTTP '
-                          'connection'))
-                return 0, None, None, None
-
         try:
-            conn.request(action, uri, body, headers)
-            response = conn.getresponse()
-            respstr = response.read()
+            status, reason, respstr = self.pool.request(
+                self.server, self.port, action, uri, body, headers)
             respdata = respstr
             try:
                 respdata = jsonutils.loads(respstr)
             except ValueError:
                 # response was not JSON, ignore the exception
                 pass
-            ret = (response.status, response.reason, respstr, respdata)
+            ret = (status, reason, respstr, respdata)
         except Exception as e:
             log_dict = {'action': action, 'e': e}
             LOG.error(_LE('vdirectRESTClient: %(action)s failure, %(e)r'),
                       log_dict)
             ret = -1, None, None, None
-        conn.close()
         return ret
 
 
@@ -801,21 +809,14 @@ class OperationAttributes(object):
         return "<%s: {%s}>" % (self.__class__.__name__, ', '.join(items))
 
 
-class OperationCompletionHandler(threading.Thread):
+class OperationCompletionHandler(completion_scheduler.CompletionScheduler):
 
     """Update DB with operation status or delete the entity from DB."""
 
-    def __init__(self, queue, rest_client, plugin):
-        threading.Thread.__init__(self)
-        self.queue = queue
+    def __init__(self, queue, rest_client, plugin, **kwargs):
+        super(OperationCompletionHandler, self).__init__(queue, **kwargs)
         self.rest_client = rest_client
         self.plugin = plugin
-        self.stoprequest = threading.Event()
-        self.opers_to_handle_before_rest = 0
-
-    def join(self, timeout=None):
-        self.stoprequest.set()
-        super(OperationCompletionHandler, self).join(timeout)
 
     def handle_operation_completion(self, oper):
         result = self.rest_client.call('GET',
@@ -862,39 +863,6 @@ class OperationCompletionHandler(threading.Thread):
 
         return completed
 
-    def run(self):
-        while not self.stoprequest.isSet():
-            try:
-                oper = self.queue.get(timeout=1)
-
-                # Get the current queue size (N) and set the counter with it.
-                # Handle N operations with no intermission.
-                # Once N operations handles, get the size again and repeat.
-                if self.opers_to_handle_before_rest <= 0:
-                    self.opers_to_handle_before_rest = self.queue.qsize() + 1
-
-                LOG.debug('Operation consumed from the queue: %s', oper)
-                # check the status - if oper is done: update the db ,
-                # else push the oper again to the queue
-                if not self.handle_operation_completion(oper):
-                    LOG.debug('Operation %s is not completed yet..', oper)
-                    # Not completed - push to the queue again
-                    self.queue.put_nowait(oper)
-
-                self.queue.task_done()
-                self.opers_to_handle_before_rest -= 1
-
-                # Take one second rest before start handling
-                # new operations or operations handled before
-                if self.opers_to_handle_before_rest <= 0:
-                    time.sleep(1)
-
-            except Queue.Empty:
-                continue
-            except Exception:
-                m = _("Exception was thrown inside OperationCompletionHandler")
-                LOG.exception(m)
-
     @staticmethod
     def _run_post_op_function(success, oper):
         if oper.post_op_function:
@@ -44,6 +44,7 @@ from neutron_lbaas.services.loadbalancer import constants as lb_const
 from neutron_lbaas.services.loadbalancer import data_models
 LOG = logging.getLogger(__name__)
 CERT_MANAGER_PLUGIN = neutron_lbaas.common.cert_manager.get_backend()
+CERT_MANAGER = neutron_lbaas.common.cert_manager.get_cached_cert_manager()
 
 
 def verify_lbaas_mutual_exclusion():
@@ -386,6 +387,10 @@ class LoadBalancerPluginv2(loadbalancerv2.LoadBalancerPluginBaseV2):
                                    "service-type"]
     path_prefix = loadbalancerv2.LOADBALANCERV2_PREFIX
 
+    # list calls are paginated and sorted by the database
+    __native_pagination_support = True
+    __native_sorting_support = True
+
     agent_notifiers = (
         agent_scheduler_v2.LbaasAgentSchedulerDbMixin.agent_notifiers)
 
@@ -448,9 +453,10 @@ class LoadBalancerPluginv2(loadbalancerv2.LoadBalancerPluginBaseV2):
                                     "%s") % provider)
 
     def _get_driver_for_loadbalancer(self, context, loadbalancer_id):
-        lb = self.db.get_loadbalancer(context, loadbalancer_id)
+        provider_name = self.db.get_loadbalancer_provider_name(
+            context, loadbalancer_id)
         try:
-            return self.drivers[lb.provider.provider_name]
+            return self.drivers[provider_name]
         except KeyError:
             raise n_exc.Invalid(
                 _LE("Error retrieving provider for load balancer. Possible "
@@ -490,6 +496,12 @@ class LoadBalancerPluginv2(loadbalancerv2.LoadBalancerPluginBaseV2):
             self._handle_driver_error(context, db_entity)
             raise loadbalancerv2.DriverError()
 
+    def _refresh_status(self, context, model, db_entity):
+        # The driver may have completed the operation already, only the
+        # statuses are read again instead of the whole object.
+        db_entity.provisioning_status, db_entity.operating_status = (
+            self.db.get_status(context, model, db_entity.id))
+
     def _handle_driver_error(self, context, db_entity):
         lb_id = db_entity.root_loadbalancer.id
         self.db.update_status(context, models.LoadBalancer, lb_id,
@@ -615,9 +627,22 @@ class LoadBalancerPluginv2(loadbalancerv2.LoadBalancerPluginBaseV2):
     def get_loadbalancer(self, context, id, fields=None):
         return self.db.get_loadbalancer(context, id).to_api_dict()
 
-    def get_loadbalancers(self, context, filters=None, fields=None):
-        return [listener.to_api_dict() for listener in
-                self.db.get_loadbalancers(context, filters=filters)]
+    def _get_api_collection(self, context, model, get_resources,
+                            filters=None, fields=None, **pagination):
+        items = self.db.get_resource_columns(context, model, fields,
+                                             filters=filters, **pagination)
+        if items is None:
+            items = [item.to_api_dict() for item in
+                     get_resources(context, filters=filters, **pagination)]
+        return items
+
+    def get_loadbalancers(self, context, filters=None, fields=None,
+                          sorts=None, limit=None, marker=None,
+                          page_reverse=False):
+        return self._get_api_collection(
+            context, models.LoadBalancer, self.db.get_loadbalancers,
+            filters=filters, fields=fields, sorts=sorts, limit=limit,
+            marker=marker, page_reverse=page_reverse)
 
     def _validate_tls(self, listener, curr_listener=None):
         def validate_tls_container(container_ref):
@@ -630,9 +655,8 @@ class LoadBalancerPluginv2(loadbalancerv2.LoadBalancerPluginBaseV2):
                 lb_id = listener.get('loadbalancer_id')
 
             try:
-                cert_container = CERT_MANAGER_PLUGIN.CertManager.get_cert(
-                    container_ref,
-                    lb_id=lb_id)
+                cert_container = CERT_MANAGER.get_cert(container_ref,
+                                                       lb_id=lb_id)
             except Exception as e:
                 if hasattr(e, 'status_code') and e.status_code == 404:
                     raise loadbalancerv2.TLSContainerNotFound(
@@ -651,12 +675,13 @@ class LoadBalancerPluginv2(loadbalancerv2.LoadBalancerPluginBaseV2):
                         cert_container.get_private_key_passphrase()),
                     intermediates=cert_container.get_intermediates())
             except Exception as e:
-                CERT_MANAGER_PLUGIN.CertManager.delete_cert(
-                    container_ref, lb_id)
+                CERT_MANAGER.delete_cert(container_ref, lb_id)
                 raise loadbalancerv2.TLSContainerInvalid(
                     container_id=container_ref, reason=str(e))
 
         def validate_tls_containers(to_validate):
+            # the containers of the listener change, read them afresh
+            CERT_MANAGER.invalidate(*to_validate)
             for container_ref in to_validate:
                 validate_tls_container(container_ref)
 
@@ -707,8 +732,9 @@ class LoadBalancerPluginv2(loadbalancerv2.LoadBalancerPluginBaseV2):
             context, listener_db.loadbalancer_id)
         self._call_driver_operation(
             context, driver.listener.create, listener_db)
+        self._refresh_status(context, models.Listener, listener_db)
 
-        return self.db.get_listener(context, listener_db.id).to_api_dict()
+        return listener_db.to_api_dict()
 
     def update_listener(self, context, id, listener):
         listener = listener.get('listener')
@@ -781,9 +807,12 @@ class LoadBalancerPluginv2(loadbalancerv2.LoadBalancerPluginBaseV2):
     def get_listener(self, context, id, fields=None):
         return self.db.get_listener(context, id).to_api_dict()
 
-    def get_listeners(self, context, filters=None, fields=None):
-        return [listener.to_api_dict() for listener in self.db.get_listeners(
-            context, filters=filters)]
+    def get_listeners(self, context, filters=None, fields=None, sorts=None,
+                      limit=None, marker=None, page_reverse=False):
+        return self._get_api_collection(
+            context, models.Listener, self.db.get_listeners,
+            filters=filters, fields=fields, sorts=sorts, limit=limit,
+            marker=marker, page_reverse=page_reverse)
 
     def create_pool(self, context, pool):
         pool = pool.get('pool')
@@ -841,9 +870,12 @@ class LoadBalancerPluginv2(loadbalancerv2.LoadBalancerPluginBaseV2):
             context, db_pool.listener.loadbalancer_id)
         self._call_driver_operation(context, driver.pool.delete, db_pool)
 
-    def get_pools(self, context, filters=None, fields=None):
-        return [pool.to_api_dict() for pool in self.db.get_pools(
-            context, filters=filters)]
+    def get_pools(self, context, filters=None, fields=None, sorts=None,
+                  limit=None, marker=None, page_reverse=False):
+        return self._get_api_collection(
+            context, models.PoolV2, self.db.get_pools,
+            filters=filters, fields=fields, sorts=sorts, limit=limit,
+            marker=marker, page_reverse=page_reverse)
 
     def get_pool(self, context, id, fields=None):
         return self.db.get_pool(context, id).to_api_dict()
@@ -855,25 +887,23 @@ class LoadBalancerPluginv2(loadbalancerv2.LoadBalancerPluginBaseV2):
 
     def create_pool_member(self, context, pool_id, member):
         self._check_pool_exists(context, pool_id)
-        db_pool = self.db.get_pool(context, pool_id)
-        self.db.test_and_set_status(context, models.LoadBalancer,
-                                    db_pool.root_loadbalancer.id,
+        lb_id = self.db.get_pool_loadbalancer_id(context, pool_id)
+        self.db.test_and_set_status(context, models.LoadBalancer, lb_id,
                                     constants.PENDING_UPDATE)
         member = member.get('member')
         try:
             member_db = self.db.create_pool_member(context, member, pool_id)
         except Exception as exc:
-            self.db.update_loadbalancer_provisioning_status(
-                context, db_pool.root_loadbalancer.id)
+            self.db.update_loadbalancer_provisioning_status(context, lb_id)
             raise exc
 
-        driver = self._get_driver_for_loadbalancer(
-            context, member_db.pool.listener.loadbalancer_id)
+        driver = self._get_driver_for_loadbalancer(context, lb_id)
         self._call_driver_operation(context,
                                     driver.member.create,
                                     member_db)
+        self._refresh_status(context, models.MemberV2, member_db)
 
-        return self.db.get_pool_member(context, member_db.id).to_api_dict()
+        return member_db.to_api_dict()
 
     def update_pool_member(self, context, id, pool_id, member):
         self._check_pool_exists(context, pool_id)
@@ -909,13 +939,94 @@ class LoadBalancerPluginv2(loadbalancerv2.LoadBalancerPluginBaseV2):
                                     driver.member.delete,
                                     db_member)
 
-    def get_pool_members(self, context, pool_id, filters=None, fields=None):
+    def _prepare_member_batch(self, context, pool_id, members):
+        """Fills defaults and validates a desired member list.
+
+        The member action bypasses the API attribute handling, so the member
+        sub-resource attribute map is applied here the same way the API
+        controller would apply it on a member create.
+        """
+        if not isinstance(members, list):
+            raise loadbalancerv2.MemberBatchInvalid(
+                pool_id=pool_id, reason=_("'members' must be a list"))
+        params = loadbalancerv2.SUB_RESOURCE_ATTRIBUTE_MAP[
+            'members']['parameters']
+        prepared = []
+        for member in members:
+            if not isinstance(member, dict):
+                raise loadbalancerv2.MemberBatchInvalid(
+                    pool_id=pool_id, reason=_("members must be objects"))
+            unknown = set(member) - set(
+                name for name, attr_vals in six.iteritems(params)
+                if attr_vals['allow_post'])
+            if unknown:
+                raise loadbalancerv2.MemberBatchInvalid(
+                    pool_id=pool_id,
+                    reason=_("unrecognized attributes %s") %
+                    ', '.join(sorted(unknown)))
+            member = dict(member)
+            for name, attr_vals in six.iteritems(params):
+                if not attr_vals['allow_post']:
+                    continue
+                if name not in member:
+                    if name == 'tenant_id':
+                        member[name] = context.tenant_id
+                    elif 'default' in attr_vals:
+                        member[name] = attr_vals['default']
+                    else:
+                        raise loadbalancerv2.RequiredAttributeNotSpecified(
+                            attr_name=name)
+                if 'convert_to' in attr_vals:
+                    member[name] = attr_vals['convert_to'](member[name])
+                for rule, rule_data in six.iteritems(
+                        attr_vals.get('validate', {})):
+                    msg = attrs.validators[rule](member[name], rule_data)
+                    if msg:
+                        raise loadbalancerv2.MemberBatchInvalid(
+                            pool_id=pool_id, reason=msg)
+            prepared.append(member)
+        return prepared
+
+    def update_members(self, context, pool_id, body):
+        """Replaces the members of a pool with a desired member list.
+
+        The whole batch is diffed against the database in one transaction,
+        the root load balancer is locked once and the provider receives a
+        single member batch operation.
+        """
+        self._check_pool_exists(context, pool_id)
+        old_pool = self.db.get_pool(context, pool_id)
+        members = self._prepare_member_batch(
+            context, pool_id, (body or {}).get('members'))
+        lb_id = old_pool.root_loadbalancer.id
+        self.db.test_and_set_status(context, models.LoadBalancer, lb_id,
+                                    constants.PENDING_UPDATE)
+        try:
+            pool = self.db.update_pool_members(context, pool_id, members)
+        except Exception as exc:
+            self.db.update_loadbalancer_provisioning_status(context, lb_id)
+            raise exc
+
+        driver = self._get_driver_for_loadbalancer(context, lb_id)
+        self._call_driver_operation(context,
+                                    driver.member.batch_update,
+                                    pool,
+                                    old_db_entity=old_pool)
+
+        return {'members': [member.to_api_dict() for member in
+                            self.db.get_pool(context, pool_id).members]}
+
+    def get_pool_members(self, context, pool_id, filters=None, fields=None,
+                         sorts=None, limit=None, marker=None,
+                         page_reverse=False):
         self._check_pool_exists(context, pool_id)
         if not filters:
             filters = {}
         filters['pool_id'] = [pool_id]
-        return [mem.to_api_dict() for mem in self.db.get_pool_members(
-            context, filters=filters)]
+        return self._get_api_collection(
+            context, models.MemberV2, self.db.get_pool_members,
+            filters=filters, fields=fields, sorts=sorts, limit=limit,
+            marker=marker, page_reverse=page_reverse)
 
     def get_pool_member(self, context, id, pool_id, fields=None):
         self._check_pool_exists(context, pool_id)
@@ -985,9 +1096,13 @@ class LoadBalancerPluginv2(loadbalancerv2.LoadBalancerPluginBaseV2):
     def get_healthmonitor(self, context, id, fields=None):
         return self.db.get_healthmonitor(context, id).to_api_dict()
 
-    def get_healthmonitors(self, context, filters=None, fields=None):
-        return [hm.to_api_dict() for hm in self.db.get_healthmonitors(
-            context, filters=filters)]
+    def get_healthmonitors(self, context, filters=None, fields=None,
+                           sorts=None, limit=None, marker=None,
+                           page_reverse=False):
+        return self._get_api_collection(
+            context, models.HealthMonitorV2, self.db.get_healthmonitors,
+            filters=filters, fields=fields, sorts=sorts, limit=limit,
+            marker=marker, page_reverse=page_reverse)
 
     def stats(self, context, loadbalancer_id):
         lb = self.db.get_loadbalancer(context, loadbalancer_id)
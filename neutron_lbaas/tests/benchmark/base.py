@@ -0,0 +1,50 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Helpers shared by the micro-benchmarks.
+
+The benchmarks are not part of the unit test suite, run them with
+``tox -e benchmark -- <module>``, e.g. ``tox -e benchmark -- data_models``.
+"""
+
+from __future__ import print_function
+
+import argparse
+import time
+
+
+def parse_args(description, **defaults):
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument('--number', type=int,
+                        default=defaults.pop('number', 10),
+                        help='Number of timed runs of each benchmark')
+    for name, default in sorted(defaults.items()):
+        parser.add_argument('--%s' % name.replace('_', '-'),
+                            type=type(default), default=default)
+    return parser.parse_args()
+
+
+def run(name, func, number, setup=None):
+    """Times number calls of func and prints the best and mean run.
+
+    :param setup: called before every run, its result is passed to func as
+                  positional arguments and is not part of the timing
+    """
+    timings = []
+    for _i in range(number):
+        args = setup() if setup else ()
+        start = time.time()
+        func(*args)
+        timings.append(time.time() - start)
+    print('%-40s best %9.3f ms  mean %9.3f ms' %
+          (name, min(timings) * 1000, sum(timings) / len(timings) * 1000))
+    return timings
@@ -0,0 +1,96 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Micro-benchmarks of the conversions done by the data models.
+
+The load balancer graphs are built from transient SQLAlchemy models, no
+database is needed.
+"""
+
+import copy
+
+from neutron.db import servicetype_db
+from oslo_utils import uuidutils
+
+from neutron_lbaas.db.loadbalancer import models
+from neutron_lbaas.services.loadbalancer import data_models
+from neutron_lbaas.tests.benchmark import base
+
+
+def build_loadbalancer(listeners, members):
+    """Returns a load balancer with members spread over its listeners."""
+    lb_id = uuidutils.generate_uuid()
+    lb = models.LoadBalancer(
+        id=lb_id, tenant_id=u'tenant', name=u'lb', description=u'',
+        vip_subnet_id=uuidutils.generate_uuid(), vip_address=u'10.0.0.2',
+        provisioning_status=u'ACTIVE', operating_status=u'ONLINE',
+        admin_state_up=True)
+    lb.provider = servicetype_db.ProviderResourceAssociation(
+        provider_name=u'haproxy', resource_id=lb_id)
+    lb.stats = models.LoadBalancerStatistics(
+        loadbalancer_id=lb_id, bytes_in=0, bytes_out=0,
+        active_connections=0, total_connections=0)
+    for i in range(listeners):
+        pool = models.PoolV2(
+            id=uuidutils.generate_uuid(), tenant_id=u'tenant',
+            name=u'pool%d' % i, protocol=u'HTTP',
+            lb_algorithm=u'ROUND_ROBIN', admin_state_up=True,
+            provisioning_status=u'ACTIVE', operating_status=u'ONLINE')
+        pool.healthmonitor = models.HealthMonitorV2(
+            id=uuidutils.generate_uuid(), tenant_id=u'tenant', type=u'HTTP',
+            delay=5, timeout=5, max_retries=3, http_method=u'GET',
+            url_path=u'/', expected_codes=u'200', admin_state_up=True,
+            provisioning_status=u'ACTIVE')
+        pool.session_persistence = models.SessionPersistenceV2(
+            type=u'HTTP_COOKIE')
+        pool.members = [
+            models.MemberV2(
+                id=uuidutils.generate_uuid(), tenant_id=u'tenant',
+                address=u'10.0.%d.%d' % (m // 250, m % 250 + 1),
+                protocol_port=80, weight=1, admin_state_up=True,
+                subnet_id=lb.vip_subnet_id, provisioning_status=u'ACTIVE',
+                operating_status=u'ONLINE')
+            for m in range(i, members, listeners)]
+        models.Listener(
+            id=uuidutils.generate_uuid(), tenant_id=u'tenant',
+            name=u'listener%d' % i, protocol=u'HTTP', protocol_port=80 + i,
+            admin_state_up=True, provisioning_status=u'ACTIVE',
+            operating_status=u'ONLINE', default_pool=pool, loadbalancer=lb)
+    return lb
+
+
+def main():
+    args = base.parse_args(__doc__, listeners=1, members=2000)
+    lb_db = build_loadbalancer(args.listeners, args.members)
+    members_db = [member for listener in lb_db.listeners
+                  for member in listener.default_pool.members]
+    lb = data_models.LoadBalancer.from_sqlalchemy_model(lb_db)
+    lb_dict = lb.to_dict(stats=False)
+
+    base.run('LoadBalancer.from_sqlalchemy_model',
+             data_models.LoadBalancer.from_sqlalchemy_model, args.number,
+             setup=lambda: (lb_db,))
+    # a member brings its pool along, and with it all the other members
+    base.run('Member.from_sqlalchemy_model (x10)',
+             lambda: [data_models.Member.from_sqlalchemy_model(member)
+                      for member in members_db[:10]], args.number)
+    base.run('LoadBalancer.to_dict', lb.to_dict, args.number)
+    base.run('LoadBalancer.from_dict', data_models.LoadBalancer.from_dict,
+             args.number, setup=lambda: (copy.deepcopy(lb_dict),))
+    base.run('LoadBalancer.to_api_dict', lb.to_api_dict, args.number)
+    pools = [listener.default_pool for listener in lb.listeners]
+    base.run('Pool.to_api_dict',
+             lambda: [pool.to_api_dict() for pool in pools], args.number)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,109 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Cost of adding a member to pools of growing size.
+
+Members are added to a pool in an in-memory sqlite database and the cost
+of creating one more member is printed at every checkpoint.  Storing the
+member must not depend on the size of the pool: the number of statements
+it runs is counted at every checkpoint and the benchmark fails if it
+changes.  The data model handed to the driver carries the whole pool and
+so grows with it.
+"""
+
+from __future__ import print_function
+
+import sys
+
+from neutron import context as ncontext
+from neutron.db import api as db_api
+from neutron.db import model_base
+from oslo_config import cfg
+from oslo_db import options as db_options
+from oslo_utils import uuidutils
+from sqlalchemy import event
+
+from neutron_lbaas.db.loadbalancer import loadbalancer_dbv2
+from neutron_lbaas.db.loadbalancer import models
+from neutron_lbaas.services.loadbalancer import data_models
+from neutron_lbaas.tests.benchmark import base
+from neutron_lbaas.tests.benchmark import data_models as dm_benchmark
+
+
+def _member(i):
+    return {'address': u'10.%d.%d.%d' % (i // 62500, i // 250 % 250,
+                                         i % 250 + 1),
+            'protocol_port': 80, 'weight': 1, 'admin_state_up': True,
+            'subnet_id': None, 'tenant_id': u'tenant'}
+
+
+def _count_statements(func, *args):
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    engine = db_api.get_engine()
+    event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        func(*args)
+    finally:
+        event.remove(engine, 'before_cursor_execute', before_cursor_execute)
+    return len(statements)
+
+
+def main():
+    args = base.parse_args(__doc__, number=20, checkpoints=5, step=500)
+    db_options.set_defaults(cfg.CONF, connection='sqlite://')
+    model_base.BASEV2.metadata.create_all(db_api.get_engine())
+    context = ncontext.get_admin_context()
+    db = loadbalancer_dbv2.LoadBalancerPluginDbv2()
+
+    lb_db = dm_benchmark.build_loadbalancer(listeners=1, members=0)
+    with context.session.begin():
+        context.session.add(lb_db)
+    pool_id = lb_db.listeners[0].default_pool_id
+    counter = iter(range(1 << 24))
+    statement_counts = []
+
+    def next_member():
+        return (context, _member(next(counter)), pool_id)
+
+    for checkpoint in range(args.checkpoints):
+        size = context.session.query(models.MemberV2).count()
+        statement_counts.append(_count_statements(
+            db._create_pool_member_db, *next_member()))
+        print('%-40s %d statements' % ('store member, pool of %d' % size,
+                                       statement_counts[-1]))
+        base.run('store member, pool of %d' % size,
+                 db._create_pool_member_db, args.number, setup=next_member)
+        base.run('create_pool_member, pool of %d' % size,
+                 db.create_pool_member, args.number, setup=next_member)
+        member_db = context.session.query(models.MemberV2).first()
+        base.run('Member.from_sqlalchemy_model, pool of %d' % size,
+                 data_models.Member.from_sqlalchemy_model, args.number,
+                 setup=lambda: (member_db,))
+        with context.session.begin():
+            for _i in range(args.step):
+                member = _member(next(counter))
+                context.session.add(models.MemberV2(
+                    id=uuidutils.generate_uuid(), pool_id=pool_id,
+                    provisioning_status=u'ACTIVE',
+                    operating_status=u'ONLINE', **member))
+        context.session.expunge_all()
+    if len(set(statement_counts)) > 1:
+        sys.exit('Storing a member ran %s statements as the pool grew' %
+                 statement_counts)
+
+
+if __name__ == '__main__':
+    main()
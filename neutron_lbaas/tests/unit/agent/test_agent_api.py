@@ -31,14 +31,17 @@ class TestApiCache(base.BaseTestCase):
         self.assertEqual('host', self.api.host)
         self.assertEqual(mock.sentinel.context, self.api.context)
 
-    def _test_method(self, method, **kwargs):
+    casts = ('update_loadbalancers_stats', 'update_statuses')
+
+    def _test_method(self, method, version=None, **kwargs):
         add_host = ('get_ready_devices', 'plug_vip_port', 'unplug_vip_port')
+        rpc_method = 'cast' if method in self.casts else 'call'
         expected_kwargs = copy.copy(kwargs)
         if method in add_host:
             expected_kwargs['host'] = self.api.host
 
         with contextlib.nested(
-            mock.patch.object(self.api.client, 'call'),
+            mock.patch.object(self.api.client, rpc_method),
             mock.patch.object(self.api.client, 'prepare'),
         ) as (
             rpc_mock, prepare_mock
@@ -50,6 +53,8 @@ class TestApiCache(base.BaseTestCase):
         self.assertEqual('foo', rv)
 
         prepare_args = {}
+        if version:
+            prepare_args['version'] = version
         prepare_mock.assert_called_once_with(**prepare_args)
 
         rpc_mock.assert_called_once_with(mock.sentinel.context, method,
@@ -62,6 +67,10 @@ class TestApiCache(base.BaseTestCase):
         self._test_method('get_loadbalancer',
                           loadbalancer_id='loadbalancer_id')
 
+    def test_get_loadbalancers(self):
+        self._test_method('get_loadbalancers', version='1.1',
+                          loadbalancer_ids=['lb1', 'lb2'])
+
     def test_loadbalancer_destroyed(self):
         self._test_method('loadbalancer_destroyed',
                           loadbalancer_id='loadbalancer_id')
@@ -84,3 +93,11 @@ class TestApiCache(base.BaseTestCase):
     def test_update_loadbalancer_stats(self):
         self._test_method('update_loadbalancer_stats', loadbalancer_id='id',
                           stats='stats')
+
+    def test_update_statuses(self):
+        self._test_method('update_statuses', version='1.2',
+                          statuses=[('member', 'id', 'ACTIVE', 'ONLINE')])
+
+    def test_update_loadbalancers_stats(self):
+        self._test_method('update_loadbalancers_stats', version='1.1',
+                          stats=[{'loadbalancer_id': 'id', 'stats': 'stats'}])
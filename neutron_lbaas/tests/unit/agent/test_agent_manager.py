@@ -17,6 +17,7 @@ import contextlib
 
 import mock
 from neutron.plugins.common import constants
+import oslo_messaging
 
 from neutron_lbaas.agent import agent_manager as manager
 from neutron_lbaas.services.loadbalancer import constants as lb_const
@@ -30,6 +31,9 @@ class TestManager(base.BaseTestCase):
 
         mock_conf = mock.Mock()
         mock_conf.device_driver = ['devdriver']
+        mock_conf.sync_state_workers = 4
+        mock_conf.sync_state_order = 'none'
+        mock_conf.status_update_window = 0
 
         self.mock_importer = mock.patch.object(manager, 'importutils').start()
 
@@ -44,6 +48,7 @@ class TestManager(base.BaseTestCase):
         self.rpc_mock = rpc_mock_cls.return_value
         self.log = mock.patch.object(manager, 'LOG').start()
         self.driver_mock = mock.Mock()
+        self.driver_mock.defer_completion.return_value = False
         self.mgr.device_drivers = {'devdriver': self.driver_mock}
         self.mgr.instance_mapping = {'1': 'devdriver', '2': 'devdriver'}
         self.mgr.needs_resync = False
@@ -75,6 +80,41 @@ class TestManager(base.BaseTestCase):
             mock.call('2', mock.ANY)
         ], any_order=True)
 
+    def test_collect_stats_batched(self):
+        self.mgr.bulk_rpc_supported = True
+        self.driver_mock.loadbalancer.get_stats.side_effect = (
+            lambda lb_id: {'bytes_in': lb_id})
+        self.mgr.collect_stats(mock.Mock())
+        self.assertFalse(self.rpc_mock.update_loadbalancer_stats.called)
+        stats = self.rpc_mock.update_loadbalancers_stats.call_args[0][0]
+        self.assertEqual(
+            [{'loadbalancer_id': '1', 'stats': {'bytes_in': '1'}},
+             {'loadbalancer_id': '2', 'stats': {'bytes_in': '2'}}],
+            sorted(stats, key=lambda s: s['loadbalancer_id']))
+
+    def test_collect_stats_only_changed(self):
+        self.mgr.bulk_rpc_supported = True
+        self.mgr.sent_stats = {'1': {'bytes_in': '1'}, '3': {}}
+        self.driver_mock.loadbalancer.get_stats.side_effect = (
+            lambda lb_id: {'bytes_in': lb_id})
+        self.mgr.collect_stats(mock.Mock())
+        self.rpc_mock.update_loadbalancers_stats.assert_called_once_with(
+            [{'loadbalancer_id': '2', 'stats': {'bytes_in': '2'}}])
+        self.assertEqual({'1': {'bytes_in': '1'}, '2': {'bytes_in': '2'}},
+                         self.mgr.sent_stats)
+
+        self.rpc_mock.reset_mock()
+        self.mgr.collect_stats(mock.Mock())
+        self.assertFalse(self.rpc_mock.update_loadbalancers_stats.called)
+
+    def test_collect_stats_batched_exception(self):
+        self.mgr.bulk_rpc_supported = True
+        self.rpc_mock.update_loadbalancers_stats.side_effect = Exception
+        self.mgr.collect_stats(mock.Mock())
+        self.assertEqual({}, self.mgr.sent_stats)
+        self.assertTrue(self.mgr.needs_resync)
+        self.assertTrue(self.log.exception.called)
+
     def test_collect_stats_exception(self):
         self.driver_mock.loadbalancer.get_stats.side_effect = Exception
 
@@ -91,13 +131,16 @@ class TestManager(base.BaseTestCase):
         ) as (reload, destroy):
 
             self.rpc_mock.get_ready_devices.return_value = ready
+            self.rpc_mock.get_loadbalancers.return_value = [
+                {'id': i} for i in reloaded]
 
             self.mgr.sync_state()
 
             self.assertEqual(len(reloaded), len(reload.mock_calls))
             self.assertEqual(len(destroyed), len(destroy.mock_calls))
 
-            reload.assert_has_calls([mock.call(i) for i in reloaded],
+            reload.assert_has_calls([mock.call(i, {'id': i})
+                                     for i in reloaded],
                                     any_order=True)
             destroy.assert_has_calls([mock.call(i) for i in destroyed],
                                      any_order=True)
@@ -117,6 +160,62 @@ class TestManager(base.BaseTestCase):
         self.mgr.instance_mapping = {'1': 'devdriver'}
         self._sync_state_helper(['2'], ['2'], ['1'])
 
+    def test_sync_state_worker_pool(self):
+        with contextlib.nested(
+            mock.patch.object(manager.eventlet, 'GreenPool'),
+            mock.patch.object(self.mgr, '_sync_order',
+                              return_value=['2', '1'])
+        ) as (green_pool, sync_order):
+            self.rpc_mock.get_ready_devices.return_value = ['1', '2']
+            self.rpc_mock.get_loadbalancers.return_value = [{'id': '1'}]
+            self.mgr.sync_state()
+            green_pool.assert_called_once_with(4)
+            sync_order.assert_called_once_with(set(['1', '2']))
+            pool = green_pool.return_value
+            pool.spawn_n.assert_has_calls([
+                mock.call(self.mgr._reload_loadbalancer, '2', None),
+                mock.call(self.mgr._reload_loadbalancer, '1', {'id': '1'})])
+            pool.waitall.assert_called_once_with()
+
+    def test_get_loadbalancers(self):
+        self.rpc_mock.get_loadbalancers.return_value = [{'id': '1'},
+                                                        {'id': '2'}]
+        self.assertEqual({'1': {'id': '1'}, '2': {'id': '2'}},
+                         self.mgr._get_loadbalancers(set(['1', '2'])))
+        self.assertEqual(
+            1, len(self.rpc_mock.get_loadbalancers.mock_calls))
+
+    def test_get_loadbalancers_empty(self):
+        self.rpc_mock.get_loadbalancers.return_value = []
+        self.assertEqual({}, self.mgr._get_loadbalancers(set()))
+        self.rpc_mock.get_loadbalancers.assert_called_once_with([])
+        self.assertTrue(self.mgr.bulk_rpc_supported)
+
+    def test_get_loadbalancers_unsupported_by_plugin(self):
+        self.rpc_mock.get_loadbalancers.side_effect = (
+            oslo_messaging.RemoteError('UnsupportedVersion'))
+        self.mgr.bulk_rpc_supported = True
+        self.assertEqual({}, self.mgr._get_loadbalancers(set(['1'])))
+        self.assertFalse(self.mgr.bulk_rpc_supported)
+
+    def test_get_loadbalancers_remote_error(self):
+        self.rpc_mock.get_loadbalancers.side_effect = (
+            oslo_messaging.RemoteError('ValueError'))
+        self.assertRaises(oslo_messaging.RemoteError,
+                          self.mgr._get_loadbalancers, set(['1']))
+
+    def test_sync_order_none(self):
+        self.assertEqual(['1'], self.mgr._sync_order(set(['1'])))
+        self.assertFalse(self.driver_mock.get_last_update_time.called)
+
+    def test_sync_order_recently_updated(self):
+        self.mgr.conf.sync_state_order = 'recently_updated'
+        update_times = {'1': 10.0, '2': None, '3': 30.0}
+        self.driver_mock.get_last_update_time.side_effect = (
+            lambda lb_id: update_times[lb_id])
+        self.assertEqual(['2', '3', '1'],
+                         self.mgr._sync_order(set(['1', '2', '3'])))
+
     def test_sync_state_exception(self):
         self.rpc_mock.get_ready_devices.side_effect = Exception
 
@@ -141,6 +240,17 @@ class TestManager(base.BaseTestCase):
         self.assertIn(lb['id'], self.mgr.instance_mapping)
         self.rpc_mock.loadbalancer_deployed.assert_called_once_with(lb_id)
 
+    def test_reload_loadbalancer_prefetched(self):
+        lb = data_models.LoadBalancer(id='1').to_dict()
+        lb['provider'] = {'device_driver': 'devdriver'}
+
+        self.mgr._reload_loadbalancer('1', lb)
+
+        self.assertFalse(self.rpc_mock.get_loadbalancer.called)
+        called_lb = self.driver_mock.deploy_instance.call_args[0][0]
+        self.assertEqual('1', called_lb.id)
+        self.rpc_mock.loadbalancer_deployed.assert_called_once_with('1')
+
     def test_reload_loadbalancer_driver_not_found(self):
         lb = data_models.LoadBalancer(id='1').to_dict()
         lb['provider'] = {'device_driver': 'unknowndriver'}
@@ -346,6 +456,37 @@ class TestManager(base.BaseTestCase):
                            operating_status=None)]
         self.rpc_mock.update_status.assert_has_calls(calls)
 
+    @mock.patch('eventlet.spawn_after')
+    def test_statuses_coalesced(self, spawn_after):
+        self.mgr.conf.status_update_window = 0.2
+        self.update_statuses_patcher.stop()
+        lb = data_models.LoadBalancer(id='1')
+        listener = data_models.Listener(id='l1', loadbalancer=lb)
+        self.mgr._update_statuses(lb, error=True)
+        self.mgr._update_statuses(listener)
+        spawn_after.assert_called_once_with(0.2, self.mgr.flush_statuses)
+        self.assertFalse(self.rpc_mock.update_status.called)
+        self.assertFalse(self.rpc_mock.update_statuses.called)
+
+        self.mgr.flush_statuses()
+        self.rpc_mock.update_statuses.assert_called_once_with(
+            [('loadbalancer', '1', constants.ACTIVE, lb_const.OFFLINE),
+             ('listener', 'l1', constants.ACTIVE, lb_const.ONLINE)])
+        self.assertEqual({}, self.mgr.pending_statuses)
+
+        self.mgr._update_statuses(lb)
+        self.assertEqual(2, spawn_after.call_count)
+
+    def test_flush_statuses_nothing_pending(self):
+        self.mgr.flush_statuses()
+        self.assertFalse(self.rpc_mock.update_statuses.called)
+
+    def test_flush_statuses_failed(self):
+        self.mgr.pending_statuses[('member', 'm1')] = [constants.ACTIVE, None]
+        self.rpc_mock.update_statuses.side_effect = Exception
+        self.mgr.flush_statuses()
+        self.assertTrue(self.mgr.needs_resync)
+
     @mock.patch.object(data_models.LoadBalancer, 'from_dict')
     def test_create_loadbalancer(self, mlb):
         loadbalancer = data_models.LoadBalancer(id='1')
@@ -358,6 +499,15 @@ class TestManager(base.BaseTestCase):
             loadbalancer)
         self.update_statuses.assert_called_once_with(loadbalancer)
 
+    def test_create_loadbalancers(self):
+        with mock.patch.object(self.mgr, 'create_loadbalancer') as create_lb:
+            self.mgr.create_loadbalancers(mock.sentinel.context,
+                                          ['lb1', 'lb2'], 'devdriver')
+        self.assertEqual(
+            [mock.call(mock.sentinel.context, 'lb1', 'devdriver'),
+             mock.call(mock.sentinel.context, 'lb2', 'devdriver')],
+            create_lb.call_args_list)
+
     @mock.patch.object(data_models.LoadBalancer, 'from_dict')
     def test_create_loadbalancer_failed(self, mlb):
         loadbalancer = data_models.LoadBalancer(id='1')
@@ -423,6 +573,23 @@ class TestManager(base.BaseTestCase):
         self.driver_mock.listener.create.assert_called_once_with(listener)
         self.update_statuses.assert_called_once_with(listener)
 
+    @mock.patch.object(data_models.Listener, 'from_dict')
+    def test_create_listener_deferred(self, mlistener):
+        loadbalancer = data_models.LoadBalancer(id='1')
+        listener = data_models.Listener(id=1, loadbalancer_id='1',
+                                        loadbalancer=loadbalancer)
+        self.driver_mock.defer_completion.return_value = True
+        mlistener.return_value = listener
+        self.mgr.create_listener(mock.Mock(), listener.to_dict())
+        self.driver_mock.listener.create.assert_called_once_with(listener)
+        self.assertFalse(self.update_statuses.called)
+
+        loadbalancer_id, report = (
+            self.driver_mock.defer_completion.call_args[0])
+        self.assertEqual('1', loadbalancer_id)
+        report(error=True)
+        self.update_statuses.assert_called_once_with(listener, error=True)
+
     @mock.patch.object(data_models.Listener, 'from_dict')
     def test_create_listener_failed(self, mlistener):
         loadbalancer = data_models.LoadBalancer(id='1')
@@ -606,6 +773,52 @@ class TestManager(base.BaseTestCase):
         self.mgr.delete_member(mock.Mock(), member.to_dict())
         self.driver_mock.member.delete.assert_called_once_with(member)
 
+    @mock.patch.object(data_models.Pool, 'from_dict')
+    def test_update_members(self, mpool):
+        loadbalancer = data_models.LoadBalancer(id='1')
+        listener = data_models.Listener(id=1, loadbalancer_id='1',
+                                        loadbalancer=loadbalancer)
+        pool = data_models.Pool(id='1', listener=listener, protocol='HTTPS')
+        old_pool = data_models.Pool(id='1', listener=listener,
+                                    protocol='HTTPS')
+        pool.members = [
+            data_models.Member(id='1', pool_id='1',
+                               provisioning_status=constants.PENDING_CREATE),
+            data_models.Member(id='2', pool_id='1',
+                               provisioning_status=constants.ACTIVE)]
+        mpool.side_effect = [pool, old_pool]
+        self.mgr.update_members(mock.Mock(), old_pool.to_dict(),
+                                pool.to_dict())
+        self.driver_mock.member.batch_update.assert_called_once_with(
+            old_pool, pool)
+        self.rpc_mock.update_status.assert_has_calls([
+            mock.call('member', '1', provisioning_status=constants.ACTIVE,
+                      operating_status=lb_const.ONLINE),
+            mock.call('loadbalancer', '1',
+                      provisioning_status=constants.ACTIVE)])
+        self.assertEqual(2, self.rpc_mock.update_status.call_count)
+
+    @mock.patch.object(data_models.Pool, 'from_dict')
+    def test_update_members_failed(self, mpool):
+        loadbalancer = data_models.LoadBalancer(id='1')
+        listener = data_models.Listener(id=1, loadbalancer_id='1',
+                                        loadbalancer=loadbalancer)
+        pool = data_models.Pool(id='1', listener=listener, protocol='HTTPS')
+        old_pool = data_models.Pool(id='1', listener=listener,
+                                    protocol='HTTPS')
+        pool.members = [
+            data_models.Member(id='1', pool_id='1',
+                               provisioning_status=constants.PENDING_UPDATE)]
+        mpool.side_effect = [pool, old_pool]
+        self.driver_mock.member.batch_update.side_effect = Exception
+        self.mgr.update_members(mock.Mock(), old_pool.to_dict(),
+                                pool.to_dict())
+        self.rpc_mock.update_status.assert_has_calls([
+            mock.call('member', '1', provisioning_status=constants.ERROR,
+                      operating_status=lb_const.OFFLINE),
+            mock.call('loadbalancer', '1',
+                      provisioning_status=constants.ACTIVE)])
+
     @mock.patch.object(data_models.HealthMonitor, 'from_dict')
     def test_create_monitor(self, mmonitor):
         loadbalancer = data_models.LoadBalancer(id='1')
@@ -0,0 +1,96 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import mock
+from oslo_config import cfg
+
+from neutron_lbaas.common.cert_manager import cached_cert_manager
+from neutron_lbaas.common.cert_manager import cert_manager
+from neutron_lbaas.tests import base
+
+
+class TestCachingCertManager(base.BaseTestCase):
+
+    def setUp(self):
+        super(TestCachingCertManager, self).setUp()
+        self.backend = mock.Mock(spec=cert_manager.CertManager)
+        self.backend.get_cert.side_effect = lambda ref, **kwargs: 'cert-' + ref
+        self.cert_manager = cached_cert_manager.CachingCertManager(
+            self.backend)
+        self.time = mock.patch('time.time', return_value=1000).start()
+
+    def test_get_cert_cached(self):
+        self.assertEqual('cert-a',
+                         self.cert_manager.get_cert('a', check_only=True))
+        self.assertEqual('cert-a',
+                         self.cert_manager.get_cert('a', check_only=True))
+        self.backend.get_cert.assert_called_once_with('a', check_only=True)
+
+    def test_get_cert_expires(self):
+        cfg.CONF.set_override('cache_ttl', 10, group='certificates')
+        self.cert_manager.get_cert('a', check_only=True)
+        self.time.return_value = 1010
+        self.cert_manager.get_cert('a', check_only=True)
+        self.assertEqual(2, self.backend.get_cert.call_count)
+
+    def test_get_cert_cache_disabled(self):
+        cfg.CONF.set_override('cache_ttl', 0, group='certificates')
+        self.cert_manager.get_cert('a', check_only=True)
+        self.cert_manager.get_cert('a', check_only=True)
+        self.assertEqual(2, self.backend.get_cert.call_count)
+
+    def test_least_recently_used_dropped(self):
+        cfg.CONF.set_override('cache_size', 2, group='certificates')
+        for cert_ref in ('a', 'b', 'a', 'c', 'a', 'b'):
+            self.cert_manager.get_cert(cert_ref, check_only=True)
+        self.assertEqual(
+            [mock.call('a', check_only=True),
+             mock.call('b', check_only=True),
+             mock.call('c', check_only=True),
+             mock.call('b', check_only=True)],
+            self.backend.get_cert.call_args_list)
+
+    def test_consumer_registered_once(self):
+        self.cert_manager.get_cert('a', lb_id='lb1')
+        self.cert_manager.get_cert('a', lb_id='lb1')
+        self.cert_manager.get_cert('a', check_only=True)
+        self.cert_manager.get_cert('a', lb_id='lb2')
+        self.assertEqual(
+            [mock.call('a', check_only=False, lb_id='lb1'),
+             mock.call('a', check_only=False, lb_id='lb2')],
+            self.backend.get_cert.call_args_list)
+
+    def test_get_certs(self):
+        self.cert_manager.get_cert('b', check_only=True)
+        self.assertEqual(
+            ['cert-a', 'cert-b', 'cert-c', 'cert-a'],
+            self.cert_manager.get_certs(['a', 'b', 'c', 'a'],
+                                        check_only=True))
+        self.assertEqual(3, self.backend.get_cert.call_count)
+
+    def test_get_certs_error(self):
+        self.backend.get_cert.side_effect = ValueError
+        self.assertRaises(ValueError, self.cert_manager.get_certs,
+                          ['a', 'b'], check_only=True)
+
+    def test_invalidate(self):
+        self.cert_manager.get_cert('a', check_only=True)
+        self.cert_manager.invalidate('a')
+        self.cert_manager.get_cert('a', check_only=True)
+        self.assertEqual(2, self.backend.get_cert.call_count)
+
+    def test_delete_cert_invalidates(self):
+        self.cert_manager.get_cert('a', check_only=True)
+        self.cert_manager.delete_cert('a', 'lb1')
+        self.backend.delete_cert.assert_called_once_with('a', 'lb1')
+        self.cert_manager.get_cert('a', check_only=True)
+        self.assertEqual(2, self.backend.get_cert.call_count)
@@ -0,0 +1,67 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import mock
+
+from neutron_lbaas.common import request_stats
+from neutron_lbaas.tests import base
+
+
+class TestRequestStats(base.BaseTestCase):
+
+    def setUp(self):
+        super(TestRequestStats, self).setUp()
+        self.stats = request_stats.RequestStats(
+            lambda path: path.split('/')[0])
+
+    def test_record(self):
+        self.stats.record('GET', 'pools/1', 0.5)
+        self.stats.record('GET', 'pools/2', 1.5, error=True, retry=True)
+        self.stats.record('DELETE', 'pools/1', 0.25)
+        self.assertEqual(
+            {('GET', 'pools'): {'requests': 2, 'errors': 1, 'retries': 1,
+                                'total_time': 2.0, 'max_time': 1.5},
+             ('DELETE', 'pools'): {'requests': 1, 'errors': 0, 'retries': 0,
+                                   'total_time': 0.25, 'max_time': 0.25}},
+            self.stats.get())
+
+    def test_get_snapshot(self):
+        self.stats.record('GET', 'pools/1', 0.5)
+        snapshot = self.stats.get()
+        self.stats.record('GET', 'pools/1', 0.5)
+        self.assertEqual(1, snapshot[('GET', 'pools')]['requests'])
+
+    @mock.patch.object(request_stats, 'LOG')
+    @mock.patch('time.time')
+    def test_periodic_log(self, time_mock, log):
+        time_mock.return_value = 1000
+        stats = request_stats.RequestStats(
+            lambda path: path.split('/')[0], name='backend', log_interval=60)
+        time_mock.return_value = 1059
+        stats.record('GET', 'pools/1', 0.5)
+        self.assertFalse(log.info.called)
+        time_mock.return_value = 1060
+        stats.record('GET', 'pools/1', 1.5)
+        self.assertEqual(1, log.info.call_count)
+        self.assertEqual(
+            {'name': 'backend', 'method': 'GET', 'endpoint': 'pools',
+             'requests': 2, 'errors': 0, 'retries': 0, 'mean': 1.0,
+             'max': 1.5},
+            log.info.call_args[0][1])
+        time_mock.return_value = 1119
+        stats.record('GET', 'pools/1', 0.5)
+        self.assertEqual(1, log.info.call_count)
+
+    @mock.patch.object(request_stats, 'LOG')
+    def test_no_log_without_interval(self, log):
+        self.stats.record('GET', 'pools/1', 0.5)
+        self.assertFalse(log.info.called)
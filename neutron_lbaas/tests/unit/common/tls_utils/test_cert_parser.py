@@ -13,6 +13,8 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import mock
+
 import neutron_lbaas.common.exceptions as exceptions
 import neutron_lbaas.common.tls_utils.cert_parser as cert_parser
 from neutron_lbaas.tests import base
@@ -304,3 +306,59 @@ class TestTLSParseUtils(base.BaseTestCase):
 
         for i in range(0, len(imds)):
             self.assertEqual(EXPECTED_IMD_SUBJS[i], imds[i].get_subject().CN)
+
+
+class TestParseMemos(base.BaseTestCase):
+
+    def setUp(self):
+        super(TestParseMemos, self).setUp()
+        cert_parser.clear_memos()
+        self.addCleanup(cert_parser.clear_memos)
+
+    def test_get_host_names_memoized(self):
+        with mock.patch.object(cert_parser, '_get_host_names',
+                               wraps=cert_parser._get_host_names) as parse:
+            hosts = cert_parser.get_host_names(ALT_EXT_CRT)
+            hosts['dns_names'].append('modified')
+            self.assertEqual(hosts['dns_names'][:-1],
+                             cert_parser.get_host_names(ALT_EXT_CRT)[
+                                 'dns_names'])
+            parse.assert_called_once_with(ALT_EXT_CRT)
+
+    def test_dump_private_key_memoized(self):
+        with mock.patch.object(cert_parser, '_dump_private_key',
+                               wraps=cert_parser._dump_private_key) as dump:
+            key = cert_parser.dump_private_key(
+                ENCRYPTED_PKCS8_CRT_KEY, ENCRYPTED_PKCS8_CRT_KEY_PASSPHRASE)
+            self.assertEqual(key, cert_parser.dump_private_key(
+                ENCRYPTED_PKCS8_CRT_KEY, ENCRYPTED_PKCS8_CRT_KEY_PASSPHRASE))
+            self.assertEqual(1, dump.call_count)
+            self.assertRaises(exceptions.NeedsPassphrase,
+                              cert_parser.dump_private_key,
+                              ENCRYPTED_PKCS8_CRT_KEY)
+
+    def test_validate_cert_memoized(self):
+        with mock.patch.object(cert_parser, '_validate_cert',
+                               wraps=cert_parser._validate_cert) as validate:
+            for _i in range(2):
+                self.assertTrue(cert_parser.validate_cert(
+                    ALT_EXT_CRT, private_key=ALT_EXT_CRT_KEY))
+                self.assertRaises(exceptions.MisMatchedKey,
+                                  cert_parser.validate_cert,
+                                  ALT_EXT_CRT, private_key=SOME_OTHER_RSA_KEY)
+            # the failing validation is not remembered
+            self.assertEqual(3, validate.call_count)
+
+    def test_memo_bounded(self):
+        memo = cert_parser._DigestMemo(size=2)
+        for name in ('a', 'b', 'a', 'c'):
+            memo.set(memo.digest(name), name)
+        self.assertIsNone(memo.get(memo.digest('b')))
+        self.assertEqual('a', memo.get(memo.digest('a')))
+        self.assertEqual('c', memo.get(memo.digest('c')))
+
+    def test_digest_distinguishes_arguments(self):
+        digest = cert_parser._DigestMemo.digest
+        self.assertNotEqual(digest('ab', 'c'), digest('a', 'bc'))
+        self.assertNotEqual(digest('a', None), digest('a', ''))
+        self.assertEqual(digest(u'a'), digest(b'a'))
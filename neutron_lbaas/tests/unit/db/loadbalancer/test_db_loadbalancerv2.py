@@ -25,11 +25,13 @@ from neutron.common import config
 from neutron.common import constants as n_constants
 from neutron.common import exceptions as n_exc
 from neutron import context
+from neutron.db import api as db_api
 import neutron.db.l3_db  # noqa
 from neutron.plugins.common import constants
 from neutron.tests.unit.db import test_db_base_plugin_v2
 from oslo_config import cfg
 from oslo_utils import uuidutils
+from sqlalchemy import event
 import testtools
 import webob.exc
 
@@ -41,6 +43,7 @@ from neutron_lbaas.drivers.logging_noop import driver as noop_driver
 import neutron_lbaas.extensions
 from neutron_lbaas.extensions import loadbalancerv2
 from neutron_lbaas.services.loadbalancer import constants as lb_const
+from neutron_lbaas.services.loadbalancer import data_models
 from neutron_lbaas.services.loadbalancer import plugin as loadbalancer_plugin
 from neutron_lbaas.tests import base
 
@@ -437,6 +440,21 @@ class LbaasPluginDbTestCase(LbaasTestMixin, base.NeutronDbPluginV2TestCase):
                     self.assertEqual(constants.ACTIVE,
                                      hm_status['provisioning_status'])
 
+    @contextlib.contextmanager
+    def _count_statements(self):
+        statements = []
+
+        def before_cursor_execute(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        engine = db_api.get_engine()
+        event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+        try:
+            yield statements
+        finally:
+            event.remove(engine, 'before_cursor_execute',
+                         before_cursor_execute)
+
 
 class LbaasLoadBalancerTests(LbaasPluginDbTestCase):
 
@@ -505,6 +523,16 @@ class LbaasLoadBalancerTests(LbaasPluginDbTestCase):
                 self._validate_statuses(loadbalancer_id,
                                         loadbalancer_disabled=True)
 
+    def test_update_loadbalancer_plugin_response_status(self):
+        with self.loadbalancer() as loadbalancer:
+            loadbalancer_id = loadbalancer['loadbalancer']['id']
+            ctx = context.get_admin_context()
+            # loads the load balancer in the session of the update
+            self.plugin.db.get_loadbalancer(ctx, loadbalancer_id)
+            lb = self.plugin.update_loadbalancer(
+                ctx, loadbalancer_id, {'loadbalancer': {'name': 'new'}})
+            self.assertEqual(constants.ACTIVE, lb['provisioning_status'])
+
     def test_delete_loadbalancer(self):
         with self.subnet() as subnet:
             with self.loadbalancer(subnet=subnet,
@@ -579,6 +607,99 @@ class LbaasLoadBalancerTests(LbaasPluginDbTestCase):
                     self.assertEqual(expected_values[k],
                                      body['loadbalancers'][0][k])
 
+    def test_get_pending_loadbalancer_ids(self):
+        ctx = context.get_admin_context()
+        with self.subnet() as subnet:
+            with self.loadbalancer(subnet=subnet) as lb1:
+                with self.loadbalancer(subnet=subnet):
+                    lb_id = lb1['loadbalancer']['id']
+                    self.plugin.db.update_status(
+                        ctx, models.LoadBalancer, lb_id,
+                        provisioning_status=constants.PENDING_UPDATE)
+                    self.assertEqual(
+                        [lb_id], self.plugin.db.get_pending_loadbalancer_ids(
+                            ctx, provider_name='lbaas'))
+                    self.assertEqual(
+                        [], self.plugin.db.get_pending_loadbalancer_ids(
+                            ctx, provider_name='other'))
+                    self.plugin.db.update_status(
+                        ctx, models.LoadBalancer, lb_id,
+                        provisioning_status=constants.ACTIVE)
+
+    def test_test_and_set_status(self):
+        ctx = context.get_admin_context()
+        with self.loadbalancer(no_delete=True) as lb:
+            lb_id = lb['loadbalancer']['id']
+            self.assertRaises(loadbalancerv2.StateInvalid,
+                              self.plugin.db.test_and_set_status, ctx,
+                              models.LoadBalancer, lb_id,
+                              constants.PENDING_UPDATE)
+            self.plugin.db.update_loadbalancer_provisioning_status(ctx, lb_id)
+            db_lb = self.plugin.db._get_resource(ctx, models.LoadBalancer,
+                                                 lb_id)
+            self.plugin.db.test_and_set_status(ctx, models.LoadBalancer,
+                                               lb_id, constants.PENDING_DELETE)
+            # the object already loaded in the session is refreshed too
+            self.assertEqual(constants.PENDING_DELETE,
+                             db_lb.provisioning_status)
+
+    def test_test_and_set_status_child(self):
+        ctx = context.get_admin_context()
+        with self.loadbalancer(no_delete=True) as lb:
+            lb_id = lb['loadbalancer']['id']
+            self.plugin.db.update_loadbalancer_provisioning_status(ctx, lb_id)
+            with self.listener(loadbalancer_id=lb_id,
+                               no_delete=True) as listener:
+                listener_id = listener['listener']['id']
+                self.plugin.db.update_loadbalancer_provisioning_status(
+                    ctx, lb_id)
+                self.plugin.db.test_and_set_status(
+                    ctx, models.Listener, listener_id,
+                    constants.PENDING_DELETE)
+                self.assertEqual(constants.PENDING_UPDATE,
+                                 self.plugin.db.get_loadbalancer(
+                                     ctx, lb_id).provisioning_status)
+                self.assertEqual(constants.PENDING_DELETE,
+                                 self.plugin.db.get_listener(
+                                     ctx, listener_id).provisioning_status)
+                self.assertRaises(loadbalancerv2.StateInvalid,
+                                  self.plugin.db.test_and_set_status, ctx,
+                                  models.Listener, listener_id,
+                                  constants.PENDING_UPDATE)
+
+    def test_update_statuses(self):
+        ctx = context.get_admin_context()
+        with self.loadbalancer(no_delete=True) as lb1, \
+                self.loadbalancer(no_delete=True) as lb2:
+            lb1_id = lb1['loadbalancer']['id']
+            lb2_id = lb2['loadbalancer']['id']
+            lb2_o_status = lb2['loadbalancer']['operating_status']
+            updated = self.plugin.db.update_statuses(
+                ctx, models.LoadBalancer,
+                {lb1_id: (constants.ERROR, lb_const.OFFLINE),
+                 lb2_id: (constants.PENDING_UPDATE, None),
+                 'unknown': (constants.ERROR, None)})
+            self.assertEqual(2, updated)
+            db_lb1 = self.plugin.db.get_loadbalancer(ctx, lb1_id)
+            db_lb2 = self.plugin.db.get_loadbalancer(ctx, lb2_id)
+            self.assertEqual((constants.ERROR, lb_const.OFFLINE),
+                             (db_lb1.provisioning_status,
+                              db_lb1.operating_status))
+            self.assertEqual((constants.PENDING_UPDATE, lb2_o_status),
+                             (db_lb2.provisioning_status,
+                              db_lb2.operating_status))
+
+    def test_test_and_set_status_not_found(self):
+        ctx = context.get_admin_context()
+        self.assertRaises(loadbalancerv2.EntityNotFound,
+                          self.plugin.db.test_and_set_status, ctx,
+                          models.LoadBalancer, 'unknown',
+                          constants.PENDING_UPDATE)
+        self.assertRaises(loadbalancerv2.EntityNotFound,
+                          self.plugin.db.test_and_set_status, ctx,
+                          models.MemberV2, 'unknown',
+                          constants.PENDING_UPDATE)
+
     def test_list_loadbalancers_with_sort_emulated(self):
         with self.subnet() as subnet:
             with self.loadbalancer(subnet=subnet, name='lb1') as lb1:
@@ -601,6 +722,44 @@ class LbaasLoadBalancerTests(LbaasPluginDbTestCase):
                             ('name', 'asc'), 2, 2
                         )
 
+    def test_get_loadbalancers_native_pagination(self):
+        with self.subnet() as subnet:
+            with self.loadbalancer(subnet=subnet, name='lb1') as lb1, \
+                    self.loadbalancer(subnet=subnet, name='lb2'), \
+                    self.loadbalancer(subnet=subnet, name='lb3'):
+                ctx = context.get_admin_context()
+                sorts = [('name', True), ('id', True)]
+                lbs = self.plugin.get_loadbalancers(
+                    ctx, sorts=sorts, limit=1,
+                    marker=lb1['loadbalancer']['id'])
+                self.assertEqual(['lb2'], [lb['name'] for lb in lbs])
+                lbs = self.plugin.get_loadbalancers(
+                    ctx, fields=['name'], sorts=sorts, limit=2,
+                    marker=lb1['loadbalancer']['id'])
+                self.assertEqual([{'name': 'lb2'}, {'name': 'lb3'}], lbs)
+
+    def test_get_loadbalancers_fields_from_columns(self):
+        with self.subnet() as subnet:
+            with self.loadbalancer(subnet=subnet, name='lb1') as lb:
+                ctx = context.get_admin_context()
+                with mock.patch.object(data_models.LoadBalancer,
+                                       'from_sqlalchemy_model') as convert:
+                    lbs = self.plugin.get_loadbalancers(
+                        ctx, fields=['id', 'name'])
+                    self.assertFalse(convert.called)
+                self.assertEqual([{'id': lb['loadbalancer']['id'],
+                                   'name': 'lb1'}], lbs)
+
+    def test_get_loadbalancers_fields_not_columns(self):
+        with self.subnet() as subnet:
+            with self.loadbalancer(subnet=subnet):
+                ctx = context.get_admin_context()
+                self.assertIsNone(self.plugin.db.get_resource_columns(
+                    ctx, models.LoadBalancer, ['id', 'listeners']))
+                lbs = self.plugin.get_loadbalancers(
+                    ctx, fields=['id', 'listeners'])
+                self.assertEqual([], lbs[0]['listeners'])
+
     def test_list_loadbalancers_with_pagination_reverse_emulated(self):
         with self.subnet() as subnet:
             with self.loadbalancer(subnet=subnet, name='lb1') as lb1:
@@ -623,6 +782,107 @@ class LbaasLoadBalancerTests(LbaasPluginDbTestCase):
                 resp, body = self._get_loadbalancer_stats_api(lb_id)
                 self.assertEqual(expected_values, body)
 
+    def test_update_loadbalancers_stats(self):
+        stats1 = {lb_const.STATS_TOTAL_CONNECTIONS: 10,
+                  lb_const.STATS_ACTIVE_CONNECTIONS: 2,
+                  lb_const.STATS_OUT_BYTES: 300,
+                  lb_const.STATS_IN_BYTES: 200}
+        stats2 = {lb_const.STATS_TOTAL_CONNECTIONS: 1,
+                  lb_const.STATS_ACTIVE_CONNECTIONS: 0,
+                  lb_const.STATS_OUT_BYTES: 30,
+                  lb_const.STATS_IN_BYTES: 20}
+        ctx = context.get_admin_context()
+        with self.subnet() as subnet:
+            with self.loadbalancer(subnet=subnet) as lb1, \
+                    self.loadbalancer(subnet=subnet) as lb2:
+                lb1_id = lb1['loadbalancer']['id']
+                lb2_id = lb2['loadbalancer']['id']
+                missing = self.plugin.db.update_loadbalancers_stats(
+                    ctx, {lb1_id: stats1, lb2_id: stats2,
+                          'unknown': stats2})
+                self.assertEqual(set(['unknown']), missing)
+                resp, body = self._get_loadbalancer_stats_api(lb1_id)
+                self.assertEqual({'stats': stats1}, body)
+                resp, body = self._get_loadbalancer_stats_api(lb2_id)
+                self.assertEqual({'stats': stats2}, body)
+
+    def test_update_loadbalancer_stats(self):
+        stats = {lb_const.STATS_TOTAL_CONNECTIONS: 10,
+                 lb_const.STATS_ACTIVE_CONNECTIONS: 2,
+                 lb_const.STATS_OUT_BYTES: 300,
+                 lb_const.STATS_IN_BYTES: 200}
+        ctx = context.get_admin_context()
+        with self.subnet() as subnet:
+            with self.loadbalancer(subnet=subnet) as lb:
+                lb_id = lb['loadbalancer']['id']
+                with mock.patch.object(self.plugin.db,
+                                       '_get_resource') as get_resource:
+                    self.plugin.db.update_loadbalancer_stats(ctx, lb_id,
+                                                             stats)
+                    self.assertFalse(get_resource.called)
+                resp, body = self._get_loadbalancer_stats_api(lb_id)
+                self.assertEqual({'stats': stats}, body)
+
+    def test_update_loadbalancer_stats_missing_row(self):
+        stats = {lb_const.STATS_TOTAL_CONNECTIONS: 10,
+                 lb_const.STATS_ACTIVE_CONNECTIONS: 2,
+                 lb_const.STATS_OUT_BYTES: 300,
+                 lb_const.STATS_IN_BYTES: 200}
+        ctx = context.get_admin_context()
+        with self.subnet() as subnet:
+            with self.loadbalancer(subnet=subnet) as lb:
+                lb_id = lb['loadbalancer']['id']
+                self.plugin.db._delete_loadbalancer_stats(ctx, lb_id)
+                self.plugin.db.update_loadbalancer_stats(ctx, lb_id, stats)
+                resp, body = self._get_loadbalancer_stats_api(lb_id)
+                self.assertEqual({'stats': stats}, body)
+
+    def test_update_loadbalancer_stats_unknown_loadbalancer(self):
+        self.assertRaises(loadbalancerv2.EntityNotFound,
+                          self.plugin.db.update_loadbalancer_stats,
+                          context.get_admin_context(), 'unknown', {})
+
+    def test_stats_statement_count(self):
+        with self.subnet() as subnet:
+            with self.loadbalancer(subnet=subnet) as lb:
+                lb_id = lb['loadbalancer']['id']
+                with self.listener(loadbalancer_id=lb_id):
+                    ctx = context.get_admin_context()
+                    with self._count_statements() as statements:
+                        self.plugin.db.stats(ctx, lb_id)
+                    self.assertEqual(1, len(statements))
+                    self.assertNotIn('lbaas_listeners', statements[0])
+
+    def test_update_status_statement_count(self):
+        with self.subnet() as subnet:
+            with self.loadbalancer(subnet=subnet) as lb:
+                lb_id = lb['loadbalancer']['id']
+                with self.listener(loadbalancer_id=lb_id) as listener:
+                    ctx = context.get_admin_context()
+                    with self._count_statements() as statements:
+                        self.plugin.db.update_status(
+                            ctx, models.Listener, listener['listener']['id'],
+                            provisioning_status=constants.ERROR)
+                    selects = [statement for statement in statements
+                               if statement.startswith('SELECT')]
+                    self.assertEqual(1, len(selects))
+                    self.assertNotIn('JOIN', selects[0])
+
+    def test_update_status_unknown_loadbalancer(self):
+        self.assertRaises(loadbalancerv2.EntityNotFound,
+                          self.plugin.db.update_status,
+                          context.get_admin_context(), models.LoadBalancer,
+                          'unknown', provisioning_status=constants.ERROR)
+
+    def test_update_loadbalancer_stats_negative_value(self):
+        with self.subnet() as subnet:
+            with self.loadbalancer(subnet=subnet) as lb:
+                self.assertRaises(ValueError,
+                                  self.plugin.db.update_loadbalancer_stats,
+                                  context.get_admin_context(),
+                                  lb['loadbalancer']['id'],
+                                  {lb_const.STATS_IN_BYTES: -1})
+
     def test_show_loadbalancer_with_listeners(self):
         name = 'lb_show'
         description = 'lb_show description'
@@ -833,6 +1093,19 @@ class LbaasListenerTests(ListenerTestBase):
             self._validate_statuses(self.lb_id, listener_id)
         return listener
 
+    def test_create_listener_response_status_reread(self):
+        to_api_dict = data_models.Listener.to_api_dict
+        with mock.patch.object(data_models.Listener, 'to_api_dict',
+                               autospec=True,
+                               side_effect=to_api_dict) as api_dict:
+            with self.listener(loadbalancer_id=self.lb_id):
+                # the noop driver completed the listener before the
+                # response was built
+                listener = api_dict.call_args_list[0][0][0]
+                self.assertEqual(constants.ACTIVE,
+                                 listener.provisioning_status)
+                self.assertEqual(lb_const.ONLINE, listener.operating_status)
+
     def test_create_listener_same_port_same_load_balancer(self):
         with self.listener(loadbalancer_id=self.lb_id,
                            protocol_port=80):
@@ -1024,6 +1297,23 @@ class LbaasListenerTests(ListenerTestBase):
             self._validate_statuses(self.lb_id, listener_id,
                                     listener_disabled=True)
 
+    def test_update_listener_plugin_session_status(self):
+        with self.listener(loadbalancer_id=self.lb_id) as listener:
+            listener_id = listener['listener']['id']
+            ctx = context.get_admin_context()
+            self.plugin.update_listener(
+                ctx, listener_id, {'listener': {'name': 'new'}})
+            # the objects completed by the driver are read again from the
+            # session of the update
+            self.assertEqual(
+                constants.ACTIVE,
+                self.plugin.db.get_listener(ctx,
+                                            listener_id).provisioning_status)
+            self.assertEqual(
+                constants.ACTIVE,
+                self.plugin.db.get_loadbalancer(
+                    ctx, self.lb_id).provisioning_status)
+
     def test_update_listener_with_tls(self):
         default_tls_container_ref = uuidutils.generate_uuid()
         sni_tls_container_ref_1 = uuidutils.generate_uuid()
@@ -1644,6 +1934,39 @@ class LbaasMemberTests(MemberTestBase):
                                     member_id)
         return member
 
+    def test_create_member_response_status_reread(self):
+        to_api_dict = data_models.Member.to_api_dict
+        with mock.patch.object(data_models.Member, 'to_api_dict',
+                               autospec=True,
+                               side_effect=to_api_dict) as api_dict:
+            with self.member(pool_id=self.pool_id):
+                member = api_dict.call_args_list[0][0][0]
+                self.assertEqual(constants.ACTIVE, member.provisioning_status)
+                self.assertEqual(lb_const.ONLINE, member.operating_status)
+
+    def test_create_member_does_not_load_siblings(self):
+        with self.member(pool_id=self.pool_id):
+            member_data = {
+                'address': '127.0.0.2',
+                'protocol_port': 80,
+                'weight': 1,
+                'subnet_id': self.test_subnet_id,
+                'admin_state_up': True,
+                'tenant_id': self._tenant_id
+            }
+            ctx = context.get_admin_context()
+            with self._count_statements() as statements:
+                member_db = self.plugin.db._create_pool_member_db(
+                    ctx, member_data, self.pool_id)
+            selects = [statement for statement in statements
+                       if statement.startswith('SELECT')]
+            self.assertEqual(1, len(selects))
+            self.assertNotIn('lbaas_members', selects[0])
+            member = data_models.Member.from_sqlalchemy_model(member_db)
+            self.assertEqual(2, len(member.pool.members))
+            self.assertIn(member.id, [m.id for m in member.pool.members])
+            self.plugin.db.delete_pool_member(ctx, member.id)
+
     def test_create_member_with_existing_address_port_pool_combination(self):
         with self.member(pool_id=self.pool_id) as member1:
             member1 = member1['member']
@@ -1691,6 +2014,61 @@ class LbaasMemberTests(MemberTestBase):
             resp, pool_update = self._get_pool_api(self.pool_id)
             self.assertEqual(0, len(pool_update['pool']['members']))
 
+    def test_update_members(self):
+        ctx = context.Context('', self._tenant_id)
+        with self.member(pool_id=self.pool_id, protocol_port=81,
+                         no_delete=True) as member1:
+            with self.member(pool_id=self.pool_id, protocol_port=82) as m2:
+                member2 = m2['member']
+                body = {'members': [
+                    {'address': member2['address'],
+                     'protocol_port': member2['protocol_port'],
+                     'subnet_id': member2['subnet_id'],
+                     'weight': 5},
+                    {'address': '127.0.0.2',
+                     'protocol_port': 83,
+                     'subnet_id': self.test_subnet_id}]}
+                res = self.plugin.update_members(ctx, self.pool_id, body)
+                members = dict((m['protocol_port'], m)
+                               for m in res['members'])
+                self.assertEqual([82, 83], sorted(members))
+                self.assertEqual(member2['id'], members[82]['id'])
+                self.assertEqual(5, members[82]['weight'])
+                self.assertEqual(1, members[83]['weight'])
+                self.assertEqual(self._tenant_id, members[83]['tenant_id'])
+                self.assertRaises(loadbalancerv2.EntityNotFound,
+                                  self.plugin.db.get_pool_member,
+                                  ctx, member1['member']['id'])
+                self._validate_statuses(self.lb_id, self.listener_id,
+                                        self.pool_id, member2['id'])
+                self.plugin.db.delete_pool_member(ctx, members[83]['id'])
+
+    def test_update_members_duplicate_member(self):
+        ctx = context.Context('', self._tenant_id)
+        member = {'address': '127.0.0.2', 'protocol_port': 83,
+                  'subnet_id': self.test_subnet_id}
+        self.assertRaises(loadbalancerv2.MemberExists,
+                          self.plugin.update_members,
+                          ctx, self.pool_id,
+                          {'members': [member, dict(member)]})
+        lb = self.plugin.db.get_loadbalancer(ctx, self.lb_id)
+        self.assertEqual(constants.ACTIVE, lb.provisioning_status)
+
+    def test_update_members_invalid_member(self):
+        ctx = context.Context('', self._tenant_id)
+        self.assertRaises(loadbalancerv2.MemberBatchInvalid,
+                          self.plugin.update_members,
+                          ctx, self.pool_id,
+                          {'members': [{'address': 'not-an-ip',
+                                        'protocol_port': 83,
+                                        'subnet_id': self.test_subnet_id}]})
+
+    def test_update_members_invalid_pool_id(self):
+        ctx = context.Context('', self._tenant_id)
+        self.assertRaises(loadbalancerv2.EntityNotFound,
+                          self.plugin.update_members,
+                          ctx, 'WRONG_POOL_ID', {'members': []})
+
     def test_show_member(self):
         keys = [('address', "127.0.0.1"),
                 ('tenant_id', self._tenant_id),
@@ -1840,6 +2218,33 @@ class HealthMonitorTestBase(MemberTestBase):
 
 class LbaasHealthMonitorTests(HealthMonitorTestBase):
 
+    def test_get_loadbalancer_status_tree(self):
+        with contextlib.nested(
+            self.member(pool_id=self.pool_id),
+            self.healthmonitor(pool_id=self.pool_id)
+        ) as (member, healthmonitor):
+            ctx = context.get_admin_context()
+            with self._count_statements() as statements:
+                lb = self.plugin.db.get_loadbalancer_status_tree(ctx,
+                                                                 self.lb_id)
+            self.assertEqual(5, len(statements))
+            self.assertEqual(constants.ACTIVE, lb.provisioning_status)
+            listeners = dict((l.id, l) for l in lb.listeners)
+            self.assertEqual(set([self.listener_id, self.alt_listener_id]),
+                             set(listeners))
+            pool = listeners[self.listener_id].default_pool
+            self.assertEqual(self.pool_id, pool.id)
+            self.assertIs(lb, pool.root_loadbalancer)
+            self.assertEqual([member['member']['id']],
+                             [m.id for m in pool.members])
+            self.assertEqual(constants.ACTIVE,
+                             pool.members[0].provisioning_status)
+            self.assertIs(pool, pool.members[0].pool)
+            self.assertEqual(healthmonitor['healthmonitor']['id'],
+                             pool.healthmonitor.id)
+            self.assertIsNone(
+                listeners[self.alt_listener_id].default_pool.healthmonitor)
+
     def test_create_healthmonitor(self, **extras):
         expected = {
             'type': 'TCP',
@@ -157,6 +157,37 @@ class TestLoadBalancerCallbacks(
             del expected_lb['stats']
             self.assertEqual(expected_lb, load_balancer)
 
+    def test_get_loadbalancers(self):
+        with self.loadbalancer() as lb1, self.loadbalancer() as lb2:
+            ctx = context.get_admin_context()
+            lb_ids = [lb1['loadbalancer']['id'], lb2['loadbalancer']['id']]
+            expected = [self.callbacks.get_loadbalancer(ctx, lb_id)
+                        for lb_id in lb_ids]
+
+            core_plugin = self.plugin_instance.db._core_plugin
+            with mock.patch.object(core_plugin, 'get_subnets',
+                                   wraps=core_plugin.get_subnets) as subnets:
+                loadbalancers = self.callbacks.get_loadbalancers(
+                    ctx, lb_ids + ['unknown'])
+                self.assertEqual(1, subnets.call_count)
+
+            self.assertEqual(sorted(expected, key=lambda lb: lb['id']),
+                             sorted(loadbalancers, key=lambda lb: lb['id']))
+
+    def test_get_loadbalancers_empty(self):
+        self.assertEqual([], self.callbacks.get_loadbalancers(
+            context.get_admin_context(), []))
+
+    def test_update_loadbalancers_stats(self):
+        ctx = context.get_admin_context()
+        with mock.patch.object(self.plugin_instance.db,
+                               'update_loadbalancers_stats') as update:
+            self.callbacks.update_loadbalancers_stats(
+                ctx, stats=[{'loadbalancer_id': 'lb1', 'stats': 'stats1'},
+                            {'loadbalancer_id': 'lb2', 'stats': 'stats2'}])
+            update.assert_called_once_with(
+                ctx, {'lb1': 'stats1', 'lb2': 'stats2'})
+
     def _update_port_test_helper(self, expected, func, **kwargs):
         core = self.plugin_instance.db._core_plugin
 
@@ -235,6 +266,49 @@ class TestLoadBalancerCallbacks(
                 ctx, loadbalancer['loadbalancer']['id'])
             self.assertEqual('ACTIVE', l.provisioning_status)
 
+    def test_loadbalancer_deployed_graph(self):
+        ctx = context.get_admin_context()
+        db = self.plugin_instance.db
+        with self.loadbalancer(no_delete=True) as loadbalancer:
+            lb_id = loadbalancer['loadbalancer']['id']
+            hm = db.create_healthmonitor(
+                ctx, {'admin_state_up': True,
+                      'type': lb_const.HEALTH_MONITOR_HTTP,
+                      'delay': 1, 'timeout': 1, 'max_retries': 1})
+            pool = db.create_pool(
+                ctx, {'protocol': lb_const.PROTOCOL_HTTP,
+                      'session_persistence': None,
+                      'lb_algorithm': lb_const.LB_METHOD_ROUND_ROBIN,
+                      'admin_state_up': True, 'healthmonitor_id': hm.id})
+            member = db.create_pool_member(
+                ctx, {'address': '10.0.0.1', 'protocol_port': 80,
+                      'admin_state_up': True}, pool.id)
+            deleted_member = db.create_pool_member(
+                ctx, {'address': '10.0.0.2', 'protocol_port': 80,
+                      'admin_state_up': True}, pool.id)
+            db.update_status(ctx, db_models.MemberV2, deleted_member.id,
+                             provisioning_status=constants.PENDING_DELETE)
+            listener = db.create_listener(
+                ctx, {'protocol_port': 80,
+                      'protocol': lb_const.PROTOCOL_HTTP,
+                      'admin_state_up': True, 'loadbalancer_id': lb_id,
+                      'default_pool_id': pool.id, 'sni_container_ids': []})
+
+            self.callbacks.loadbalancer_deployed(ctx, lb_id)
+
+            for model, obj_id in ((db_models.LoadBalancer, lb_id),
+                                  (db_models.Listener, listener.id),
+                                  (db_models.PoolV2, pool.id),
+                                  (db_models.MemberV2, member.id),
+                                  (db_models.HealthMonitorV2, hm.id)):
+                self.assertEqual(
+                    constants.ACTIVE,
+                    db._get_resource(ctx, model, obj_id).provisioning_status)
+            self.assertEqual(
+                constants.PENDING_DELETE,
+                db._get_resource(ctx, db_models.MemberV2,
+                                 deleted_member.id).provisioning_status)
+
     def test_listener_deployed(self):
         with self.loadbalancer(no_delete=True) as loadbalancer:
             self.plugin_instance.db.update_loadbalancer_provisioning_status(
@@ -277,6 +351,38 @@ class TestLoadBalancerCallbacks(
             self.assertEqual(constants.ACTIVE, l.provisioning_status)
             self.assertEqual(lb_const.ONLINE, l.operating_status)
 
+    def test_update_statuses(self):
+        with self.loadbalancer() as loadbalancer:
+            lb_id = loadbalancer['loadbalancer']['id']
+            ctx = context.get_admin_context()
+            self.callbacks.update_statuses(
+                ctx, [('loadbalancer', lb_id, constants.ERROR, None),
+                      ('loadbalancer', lb_id, None, lb_const.ONLINE),
+                      ('loadbalancer', 'deleted_lb', constants.ACTIVE, None),
+                      ('unknown', 'id', constants.ACTIVE, None)])
+            l = self.plugin_instance.db.get_loadbalancer(ctx, lb_id)
+            self.assertEqual(constants.ERROR, l.provisioning_status)
+            self.assertEqual(lb_const.ONLINE, l.operating_status)
+            self.plugin_instance.db.update_loadbalancer_provisioning_status(
+                ctx, lb_id)
+
+    def test_update_statuses_one_update_per_model(self):
+        ctx = context.get_admin_context()
+        with mock.patch.object(self.plugin_instance.db,
+                               'update_statuses') as update:
+            self.callbacks.update_statuses(
+                ctx, [('member', 'm1', constants.ACTIVE, lb_const.ONLINE),
+                      ('loadbalancer', 'lb1', constants.ACTIVE, None),
+                      ('member', 'm2', constants.ERROR, lb_const.OFFLINE),
+                      ('member', 'm1', None, lb_const.OFFLINE)])
+        self.assertEqual(2, update.call_count)
+        update.assert_any_call(
+            ctx, db_models.MemberV2,
+            {'m1': (constants.ACTIVE, lb_const.OFFLINE),
+             'm2': (constants.ERROR, lb_const.OFFLINE)})
+        update.assert_any_call(ctx, db_models.LoadBalancer,
+                               {'lb1': (constants.ACTIVE, None)})
+
     def test_update_status_loadbalancer_deleted_already(self):
         with mock.patch.object(agent_callbacks, 'LOG') as mock_log:
             loadbalancer_id = 'deleted_lb'
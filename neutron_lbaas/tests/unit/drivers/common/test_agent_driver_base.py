@@ -19,10 +19,12 @@ from neutron import context
 from neutron.db import servicetype_db as st_db
 from neutron import manager
 from neutron.plugins.common import constants
+from oslo_serialization import jsonutils
 
 from neutron_lbaas.db.loadbalancer import models
 from neutron_lbaas.drivers.common import agent_driver_base
 from neutron_lbaas.extensions import loadbalancerv2
+from neutron_lbaas.services.loadbalancer import data_models
 from neutron_lbaas.tests import base
 from neutron_lbaas.tests.unit.db.loadbalancer import test_db_loadbalancerv2
 
@@ -51,6 +53,27 @@ class TestLoadBalancerPluginBase(test_db_loadbalancerv2.LbaasPluginDbTestCase):
         self.plugin_instance = loaded_plugins[constants.LOADBALANCERV2]
 
 
+class TestDataModelSerializer(base.BaseTestCase):
+
+    def test_serialize_loadbalancers(self):
+        lbs = [data_models.LoadBalancer(id='lb1', name='a'),
+               data_models.LoadBalancer(id='lb2', name='b')]
+        serializer = agent_driver_base.DataModelSerializer()
+        payload = jsonutils.loads(jsonutils.dumps(
+            serializer.serialize_entity(mock.sentinel.context, lbs)))
+        self.assertEqual([lb.to_dict(stats=False) for lb in lbs], payload)
+        received = [data_models.LoadBalancer.from_dict(lb) for lb in payload]
+        self.assertEqual([('lb1', 'a'), ('lb2', 'b')],
+                         [(lb.id, lb.name) for lb in received])
+
+    def test_serialize_other(self):
+        serializer = agent_driver_base.DataModelSerializer()
+        self.assertEqual({'a': 1}, serializer.serialize_entity(
+            mock.sentinel.context, {'a': 1}))
+        self.assertEqual(['a', 1], serializer.serialize_entity(
+            mock.sentinel.context, ('a', 1)))
+
+
 class TestLoadBalancerAgentApi(base.BaseTestCase):
     def setUp(self):
         super(TestLoadBalancerAgentApi, self).setUp()
@@ -60,7 +83,7 @@ class TestLoadBalancerAgentApi(base.BaseTestCase):
     def test_init(self):
         self.assertEqual('topic', self.api.client.target.topic)
 
-    def _call_test_helper(self, method_name, method_args):
+    def _call_test_helper(self, method_name, method_args, version=None):
         with contextlib.nested(
             mock.patch.object(self.api.client, 'cast'),
             mock.patch.object(self.api.client, 'prepare'),
@@ -73,6 +96,8 @@ class TestLoadBalancerAgentApi(base.BaseTestCase):
                                            **method_args)
 
         prepare_args = {'server': 'host'}
+        if version:
+            prepare_args['version'] = version
         prepare_mock.assert_called_once_with(**prepare_args)
 
         if method_name == 'agent_updated':
@@ -97,6 +122,12 @@ class TestLoadBalancerAgentApi(base.BaseTestCase):
         self._call_test_helper('create_loadbalancer', {'loadbalancer': 'test',
                                                        'driver_name': 'dummy'})
 
+    def test_create_loadbalancers(self):
+        self._call_test_helper('create_loadbalancers',
+                               {'loadbalancers': ['test'],
+                                'driver_name': 'dummy'},
+                               version='1.2')
+
     def test_update_loadbalancer(self):
         self._call_test_helper('update_loadbalancer', {
             'old_loadbalancer': 'test', 'loadbalancer': 'test'})
@@ -111,6 +142,11 @@ class TestLoadBalancerAgentApi(base.BaseTestCase):
         self._call_test_helper('update_member', {'old_member': 'test',
                                                  'member': 'test'})
 
+    def test_update_members(self):
+        self._call_test_helper('update_members', {'old_pool': 'test',
+                                                  'pool': 'test'},
+                               version='1.1')
+
     def test_delete_member(self):
         self._call_test_helper('delete_member', {'member': 'test'})
 
@@ -0,0 +1,63 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import socket
+
+import mock
+
+from neutron_lbaas.drivers.haproxy import admin_socket
+from neutron_lbaas.services.loadbalancer import data_models
+from neutron_lbaas.tests import base
+
+
+class TestAdminSocket(base.BaseTestCase):
+
+    def test_member_commands(self):
+        pool = data_models.Pool(id='pool1')
+        member = data_models.Member(id='member1', pool=pool, weight=3,
+                                    admin_state_up=True)
+        self.assertEqual(['set weight pool1/member1 3',
+                          'enable server pool1/member1'],
+                         admin_socket.member_commands(member))
+        member.admin_state_up = False
+        member.weight = 0
+        self.assertEqual(['set weight pool1/member1 0',
+                          'disable server pool1/member1'],
+                         admin_socket.member_commands(member))
+
+    @mock.patch('socket.socket')
+    def test_run_commands(self, mock_socket):
+        sock = mock_socket.return_value
+        sock.recv.side_effect = ['\n', '']
+        admin_socket.run_commands('/sock', ['cmd1', 'cmd2'])
+        mock_socket.assert_called_once_with(socket.AF_UNIX,
+                                            socket.SOCK_STREAM)
+        sock.connect.assert_called_once_with('/sock')
+        sock.send.assert_called_once_with('cmd1;cmd2\n')
+        sock.close.assert_called_once_with()
+
+    @mock.patch('socket.socket')
+    def test_run_commands_rejected(self, mock_socket):
+        sock = mock_socket.return_value
+        sock.recv.side_effect = ['No such server.\n', '']
+        self.assertRaises(admin_socket.AdminSocketCommandFailed,
+                          admin_socket.run_commands, '/sock', ['cmd1'])
+        sock.close.assert_called_once_with()
+
+    @mock.patch('socket.socket')
+    def test_run_commands_connect_error(self, mock_socket):
+        sock = mock_socket.return_value
+        sock.connect.side_effect = socket.error
+        self.assertRaises(socket.error,
+                          admin_socket.run_commands, '/sock', ['cmd1'])
+        self.assertFalse(sock.send.called)
+        sock.close.assert_called_once_with()
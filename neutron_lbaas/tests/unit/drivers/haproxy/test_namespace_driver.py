@@ -36,6 +36,7 @@ class TestHaproxyNSDriver(base.BaseTestCase):
         conf.interface_driver = 'intdriver'
         conf.haproxy.user_group = 'test_group'
         conf.haproxy.send_gratuitous_arp = 3
+        conf.haproxy.reload_debounce_interval = 0
         self.conf = conf
         self.rpc_mock = mock.Mock()
         with mock.patch(
@@ -66,6 +67,76 @@ class TestHaproxyNSDriver(base.BaseTestCase):
     def test_get_name(self):
         self.assertEqual(namespace_driver.DRIVER_NAME, self.driver.get_name())
 
+    @mock.patch('os.path.getmtime')
+    def test_get_last_update_time(self, getmtime):
+        getmtime.return_value = 42.0
+        self.assertEqual(42.0, self.driver.get_last_update_time(self.lb.id))
+        getmtime.assert_called_once_with(
+            '/the/path/v2/%s/haproxy.conf' % self.lb.id)
+
+        getmtime.side_effect = OSError
+        self.assertIsNone(self.driver.get_last_update_time(self.lb.id))
+
+    @mock.patch.object(namespace_driver.lockutils, 'lock')
+    def test_deploy_instance_locks_loadbalancer(self, lock):
+        self.driver.deployable = mock.Mock(return_value=False)
+        self.driver.deploy_instance(self.lb)
+        lock.assert_called_once_with('haproxy-driver-%s' % self.lb.id)
+
+    @mock.patch('oslo_service.loopingcall.FixedIntervalLoopingCall')
+    def test_init_starts_flush_loop(self, mock_loop):
+        self.conf.haproxy.reload_debounce_interval = 0.5
+        with mock.patch(
+                'neutron.common.utils.load_class_by_alias_or_classname'):
+            driver = namespace_driver.HaproxyNSDriver(self.conf,
+                                                      self.rpc_mock)
+        mock_loop.assert_called_once_with(driver.flush_dirty_loadbalancers)
+        mock_loop.return_value.start.assert_called_once_with(interval=0.5)
+
+    def test_flush_dirty_loadbalancers(self):
+        self.driver._loadbalancer = mock.Mock()
+        for lb_id in ('lb1', 'lb2', 'lb1'):
+            self.driver.mark_dirty(lb_id)
+        self.driver.flush_dirty_loadbalancers()
+        self.driver.loadbalancer.reload.assert_has_calls(
+            [mock.call('lb1'), mock.call('lb2')], any_order=True)
+        self.assertEqual(2, self.driver.loadbalancer.reload.call_count)
+
+        self.driver.loadbalancer.reload.reset_mock()
+        self.driver.flush_dirty_loadbalancers()
+        self.assertFalse(self.driver.loadbalancer.reload.called)
+
+    def test_flush_dirty_loadbalancers_failed(self):
+        self.driver._loadbalancer = mock.Mock()
+        self.driver.loadbalancer.reload.side_effect = Exception
+        self.driver.mark_dirty('lb1')
+        self.driver.flush_dirty_loadbalancers()
+        self.driver.loadbalancer.reload.assert_called_once_with('lb1')
+        self.rpc_mock.update_status.assert_called_once_with(
+            'loadbalancer', 'lb1', constants.ERROR)
+
+    def test_defer_completion(self):
+        self.driver._loadbalancer = mock.Mock()
+        callback = mock.Mock()
+        self.assertFalse(self.driver.defer_completion('lb1', callback))
+        self.driver.mark_dirty('lb1')
+        self.assertTrue(self.driver.defer_completion('lb1', callback))
+        self.assertFalse(callback.called)
+        self.driver.flush_dirty_loadbalancers()
+        callback.assert_called_once_with(error=False)
+
+    def test_flush_dirty_loadbalancers_failed_deferred(self):
+        self.driver._loadbalancer = mock.Mock()
+        self.driver.loadbalancer.reload.side_effect = Exception
+        callbacks = [mock.Mock(), mock.Mock()]
+        self.driver.mark_dirty('lb1')
+        for callback in callbacks:
+            self.driver.defer_completion('lb1', callback)
+        self.driver.flush_dirty_loadbalancers()
+        for callback in callbacks:
+            callback.assert_called_once_with(error=True)
+        self.assertFalse(self.rpc_mock.update_status.called)
+
     @mock.patch('neutron.agent.linux.ip_lib.IPWrapper')
     @mock.patch('os.path.dirname')
     @mock.patch('os.path.isdir')
@@ -240,6 +311,7 @@ class TestHaproxyNSDriver(base.BaseTestCase):
 
     def test_update(self):
         self.driver._get_state_file_path = mock.Mock(return_value='/path')
+        self.driver._save_config = mock.Mock(return_value=True)
         self.driver._spawn = mock.Mock()
         with mock.patch('__builtin__.open') as m_open:
             file_mock = mock.MagicMock()
@@ -247,9 +319,30 @@ class TestHaproxyNSDriver(base.BaseTestCase):
             file_mock.__enter__.return_value = file_mock
             file_mock.__iter__.return_value = iter(['123'])
             self.driver.update(self.lb)
+            self.driver._save_config.assert_called_once_with(self.lb)
             self.driver._spawn.assert_called_once_with(self.lb,
                                                        ['-sf', '123'])
 
+    @mock.patch.object(namespace_driver.jinja_cfg, 'discard_digest')
+    def test_update_spawn_failed(self, discard_digest):
+        self.driver._get_state_file_path = mock.Mock(return_value='/path')
+        self.driver._save_config = mock.Mock(return_value=True)
+        self.driver._spawn = mock.Mock(side_effect=RuntimeError)
+        with mock.patch('__builtin__.open') as m_open:
+            m_open.return_value = ['123']
+            self.assertRaises(RuntimeError, self.driver.update, self.lb)
+        discard_digest.assert_called_once_with('/path')
+        self.assertNotIn(self.lb.id, self.driver.deployed_loadbalancers)
+
+    def test_update_config_unchanged(self):
+        self.driver._save_config = mock.Mock(return_value=False)
+        self.driver._spawn = mock.Mock()
+        self.driver.update(self.lb)
+        self.driver._save_config.assert_called_once_with(self.lb)
+        self.assertFalse(self.driver._spawn.called)
+        self.assertEqual(self.lb,
+                         self.driver.deployed_loadbalancers[self.lb.id])
+
     @mock.patch('socket.socket')
     @mock.patch('os.path.exists')
     @mock.patch('neutron.agent.linux.ip_lib.IPWrapper')
@@ -310,11 +403,13 @@ class TestHaproxyNSDriver(base.BaseTestCase):
 
     def test_create(self):
         self.driver._plug = mock.Mock()
+        self.driver._save_config = mock.Mock()
         self.driver._spawn = mock.Mock()
         self.driver.create(self.lb)
         self.driver._plug.assert_called_once_with(
             namespace_driver.get_ns_name(self.lb.id),
             self.lb.vip_port, self.lb.vip_address)
+        self.driver._save_config.assert_called_once_with(self.lb)
         self.driver._spawn.assert_called_once_with(self.lb)
 
     def test_deployable(self):
@@ -412,10 +507,9 @@ class TestHaproxyNSDriver(base.BaseTestCase):
     @mock.patch('neutron.common.utils.ensure_dir')
     @mock.patch('neutron_lbaas.services.loadbalancer.drivers.haproxy.'
                 'jinja_cfg.save_config')
-    @mock.patch('neutron.agent.linux.ip_lib.IPWrapper')
-    def test_spawn(self, ip_wrap, jinja_save, ensure_dir):
-        mock_ns = ip_wrap.return_value
-        self.driver._spawn(self.lb)
+    def test_save_config(self, jinja_save, ensure_dir):
+        jinja_save.return_value = True
+        self.assertTrue(self.driver._save_config(self.lb))
         conf_dir = self.driver.state_path + '/' + self.lb.id + '/%s'
         jinja_save.assert_called_once_with(
             conf_dir % 'haproxy.conf',
@@ -423,6 +517,16 @@ class TestHaproxyNSDriver(base.BaseTestCase):
             conf_dir % 'haproxy_stats.sock',
             'test_group',
             conf_dir % '')
+
+    @mock.patch('neutron.common.utils.ensure_dir')
+    @mock.patch('neutron_lbaas.services.loadbalancer.drivers.haproxy.'
+                'jinja_cfg.save_config')
+    @mock.patch('neutron.agent.linux.ip_lib.IPWrapper')
+    def test_spawn(self, ip_wrap, jinja_save, ensure_dir):
+        mock_ns = ip_wrap.return_value
+        self.driver._spawn(self.lb)
+        conf_dir = self.driver.state_path + '/' + self.lb.id + '/%s'
+        self.assertFalse(jinja_save.called)
         ip_wrap.assert_called_once_with(
             namespace=namespace_driver.get_ns_name(self.lb.id))
         mock_ns.netns.execute.assert_called_once_with(
@@ -432,12 +536,91 @@ class TestHaproxyNSDriver(base.BaseTestCase):
         self.assertEqual(self.lb,
                          self.driver.deployed_loadbalancers[self.lb.id])
 
+    def _sample_member(self):
+        listener = data_models.Listener(id='listener1', loadbalancer=self.lb)
+        pool = data_models.Pool(id='pool1', listener=listener)
+        return data_models.Member(id='member1', pool=pool, weight=5,
+                                  admin_state_up=False)
+
+    @mock.patch.object(namespace_driver.admin_socket, 'run_commands')
+    @mock.patch.object(data_models.LoadBalancer, 'from_dict')
+    def test_update_member_runtime(self, lb_from_dict, run_commands):
+        member = self._sample_member()
+        lb_from_dict.return_value = self.lb
+        self.driver.exists = mock.Mock(return_value=True)
+        self.driver.deployable = mock.Mock(return_value=True)
+        self.driver._save_config = mock.Mock()
+        self.driver._get_state_file_path = mock.Mock(return_value='/sock')
+        self.assertTrue(self.driver.update_member_runtime(member))
+        self.rpc_mock.get_loadbalancer.assert_called_once_with(self.lb.id)
+        self.driver._get_state_file_path.assert_called_once_with(
+            self.lb.id, 'haproxy_admin.sock')
+        run_commands.assert_called_once_with(
+            '/sock', ['set weight pool1/member1 5',
+                      'disable server pool1/member1'])
+        self.assertFalse(self.driver._save_config.called)
+
+    @mock.patch.object(namespace_driver.jinja_cfg, 'save_config')
+    @mock.patch.object(namespace_driver.admin_socket, 'run_commands')
+    @mock.patch.object(data_models.LoadBalancer, 'from_dict')
+    def test_member_create_pending_then_runtime_update(self, lb_from_dict,
+                                                       run_commands,
+                                                       save_config):
+        self.driver.reload_debounce_interval = 1
+        self.driver.exists = mock.Mock(return_value=True)
+        self.driver.deployable = mock.Mock(return_value=True)
+        self.driver._get_state_file_path = mock.Mock(return_value='/path')
+        self.driver._spawn = mock.Mock()
+        lb_from_dict.return_value = self.lb
+        save_config.return_value = True
+        new_member = self._sample_member()
+        member = data_models.Member(id='member2', pool=new_member.pool,
+                                    weight=3, admin_state_up=True)
+        self.driver.member.create(new_member)
+        self.driver.member.update(member, member)
+        self.assertTrue(run_commands.called)
+        # the pending member create still has to reload haproxy
+        self.assertFalse(save_config.called)
+
+        with mock.patch('__builtin__.open') as m_open:
+            file_mock = mock.MagicMock()
+            m_open.return_value = file_mock
+            file_mock.__iter__.return_value = iter(['123'])
+            self.driver.flush_dirty_loadbalancers()
+        save_config.assert_called_once_with('/path', self.lb, '/path',
+                                            'test_group', '/path')
+        self.driver._spawn.assert_called_once_with(self.lb, ['-sf', '123'])
+
+    @mock.patch.object(namespace_driver.admin_socket, 'run_commands')
+    @mock.patch.object(data_models.LoadBalancer, 'from_dict')
+    def test_update_member_runtime_rejected(self, lb_from_dict,
+                                            run_commands):
+        lb_from_dict.return_value = self.lb
+        run_commands.side_effect = (
+            namespace_driver.admin_socket.AdminSocketCommandFailed(
+                commands=[], response='No such server.'))
+        self.driver.exists = mock.Mock(return_value=True)
+        self.driver.deployable = mock.Mock(return_value=True)
+        self.driver._save_config = mock.Mock()
+        self.driver._get_state_file_path = mock.Mock(return_value='/sock')
+        self.assertFalse(
+            self.driver.update_member_runtime(self._sample_member()))
+
+    @mock.patch.object(namespace_driver.admin_socket, 'run_commands')
+    def test_update_member_runtime_not_running(self, run_commands):
+        self.driver.exists = mock.Mock(return_value=False)
+        self.assertFalse(
+            self.driver.update_member_runtime(self._sample_member()))
+        self.assertFalse(self.rpc_mock.get_loadbalancer.called)
+        self.assertFalse(run_commands.called)
+
 
 class BaseTestManager(base.BaseTestCase):
 
     def setUp(self):
         super(BaseTestManager, self).setUp()
         self.driver = mock.Mock()
+        self.driver.reload_debounce_interval = 0
         self.lb_manager = namespace_driver.LoadBalancerManager(self.driver)
         self.listener_manager = namespace_driver.ListenerManager(self.driver)
         self.pool_manager = namespace_driver.PoolManager(self.driver)
@@ -495,9 +678,17 @@ class TestLoadBalancerManager(BaseTestLoadBalancerManager):
         self.driver.exists.assert_called_once_with(from_dict_return.id)
         self.driver.undeploy_instance.assert_called_once_with(self.in_lb.id)
 
+    def test_refresh_debounced(self):
+        self.driver.reload_debounce_interval = 1
+        self.lb_manager.refresh(self.in_lb)
+        self.driver.mark_dirty.assert_called_once_with(self.in_lb.id)
+        self.assertFalse(self.driver.plugin_rpc.get_loadbalancer.called)
+        self.assertFalse(self.driver.deploy_instance.called)
+
     def test_delete(self):
         self.driver.exists.return_value = False
         self.lb_manager.delete(self.in_lb)
+        self.driver.discard_dirty.assert_called_once_with(self.in_lb.id)
         self.driver.exists.assert_called_once_with(self.in_lb.id)
         self.assertFalse(self.driver.undeploy_instance.called)
 
@@ -623,9 +814,18 @@ class TestMemberManager(BaseTestMemberManager):
     def test_update(self):
         old_member = data_models.Member(id=self.in_member.id,
                                         address='0.0.0.0')
+        self.driver.update_member_runtime.return_value = False
         self.member_manager.update(old_member, self.in_member)
+        self.driver.update_member_runtime.assert_called_once_with(
+            self.in_member)
         self.refresh.assert_called_once_with(self.in_lb)
 
+    def test_update_runtime(self):
+        old_member = data_models.Member(id=self.in_member.id, weight=2)
+        self.driver.update_member_runtime.return_value = True
+        self.member_manager.update(old_member, self.in_member)
+        self.assertFalse(self.refresh.called)
+
     def test_create(self):
         self.member_manager.create(self.in_member)
         self.refresh.assert_called_once_with(self.in_lb)
@@ -634,6 +834,10 @@ class TestMemberManager(BaseTestMemberManager):
         self.member_manager.delete(self.in_member)
         self.refresh.assert_called_once_with(self.in_lb)
 
+    def test_batch_update(self):
+        self.member_manager.batch_update(self.in_pool, self.in_pool)
+        self.refresh.assert_called_once_with(self.in_lb)
+
 
 class BaseTestHealthMonitorManager(BaseTestPoolManager):
 
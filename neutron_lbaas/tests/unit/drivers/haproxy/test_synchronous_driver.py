@@ -15,6 +15,7 @@
 
 import collections
 import contextlib
+import socket
 
 import mock
 from neutron.common import exceptions
@@ -306,6 +307,22 @@ class TestHaproxyNSDriver(base.BaseTestCase):
         self.driver._unplug('test_ns', 'port_id')
         self.vif_driver.unplug('test_interface', namespace='test_ns')
 
+    def test_save_config(self):
+        with contextlib.nested(
+            mock.patch.object(sync_driver.jinja_cfg, 'save_config'),
+            mock.patch.object(self.driver, '_get_state_file_path')
+        ) as (mock_save, gsp):
+            gsp.side_effect = lambda x, y: y
+            mock_save.return_value = False
+
+            self.assertFalse(
+                self.driver._save_config(self._sample_in_loadbalancer()))
+
+            mock_save.assert_called_once_with('haproxy.conf',
+                                              self._sample_in_loadbalancer(),
+                                              'haproxy_stats.sock', 'nogroup',
+                                              '')  # state_path is empty
+
     def test_spawn(self):
         with contextlib.nested(
             mock.patch.object(sync_driver.jinja_cfg, 'save_config'),
@@ -316,10 +333,7 @@ class TestHaproxyNSDriver(base.BaseTestCase):
 
             self.driver._spawn(self._sample_in_loadbalancer())
 
-            mock_save.assert_called_once_with('haproxy.conf',
-                                              self._sample_in_loadbalancer(),
-                                              'haproxy_stats.sock', 'nogroup',
-                                              '')  # state_path is empty
+            self.assertFalse(mock_save.called)
             cmd = ['haproxy', '-f', 'haproxy.conf', '-p', 'haproxy.pid']
             ns_name = ''.join([sync_driver.NS_PREFIX,
                               self._sample_in_loadbalancer().id])
@@ -328,6 +342,57 @@ class TestHaproxyNSDriver(base.BaseTestCase):
                 mock.call().netns.execute(cmd)
             ])
 
+    def _sample_runtime_member(self):
+        lb = data_models.LoadBalancer(id='lb1')
+        listener = data_models.Listener(id='listener1', loadbalancer=lb)
+        pool = data_models.Pool(id='pool1', listener=listener)
+        return data_models.Member(id='member1', pool=pool, weight=5,
+                                  admin_state_up=True)
+
+    def test_update_member_runtime(self):
+        member = self._sample_runtime_member()
+        lb = member.pool.listener.loadbalancer
+        with contextlib.nested(
+            mock.patch.object(self.driver.load_balancer, 'deployable',
+                              return_value=True),
+            mock.patch.object(self.driver, 'exists', return_value=True),
+            mock.patch.object(self.driver, '_save_config'),
+            mock.patch.object(self.driver, '_get_state_file_path',
+                              return_value='/sock'),
+            mock.patch.object(sync_driver.admin_socket, 'run_commands')
+        ) as (deployable, exists, save_config, gsp, run_commands):
+            self.assertTrue(self.driver.update_member_runtime(member))
+            self.assertFalse(save_config.called)
+            gsp.assert_called_once_with(lb.id, 'haproxy_admin.sock')
+            run_commands.assert_called_once_with(
+                '/sock', ['set weight pool1/member1 5',
+                          'enable server pool1/member1'])
+
+    def test_update_member_runtime_rejected(self):
+        member = self._sample_runtime_member()
+        with contextlib.nested(
+            mock.patch.object(self.driver.load_balancer, 'deployable',
+                              return_value=True),
+            mock.patch.object(self.driver, 'exists', return_value=True),
+            mock.patch.object(self.driver, '_save_config'),
+            mock.patch.object(self.driver, '_get_state_file_path',
+                              return_value='/sock'),
+            mock.patch.object(sync_driver.admin_socket, 'run_commands')
+        ) as (deployable, exists, save_config, gsp, run_commands):
+            run_commands.side_effect = socket.error
+            self.assertFalse(self.driver.update_member_runtime(member))
+
+    def test_update_member_runtime_not_deployed(self):
+        member = self._sample_runtime_member()
+        with contextlib.nested(
+            mock.patch.object(self.driver.load_balancer, 'deployable',
+                              return_value=True),
+            mock.patch.object(self.driver, 'exists', return_value=False),
+            mock.patch.object(sync_driver.admin_socket, 'run_commands')
+        ) as (deployable, exists, run_commands):
+            self.assertFalse(self.driver.update_member_runtime(member))
+            self.assertFalse(run_commands.called)
+
     def test_collect_and_store_stats(self):
         stats = {'members': ['test_members']}
         lbs = [self._sample_in_loadbalancer(), self._sample_in_loadbalancer()]
@@ -427,14 +492,17 @@ class TestHaproxyNSDriver(base.BaseTestCase):
                               return_value='/var/lbaas/id'),
             mock.patch('os.path.dirname', return_value='/var/lbaas'),
             mock.patch('os.path.isdir'),
-            mock.patch('shutil.rmtree')
-        ) as (gsp, dirname, isdir, rmtree):
+            mock.patch('shutil.rmtree'),
+            mock.patch.object(sync_driver.jinja_cfg,
+                              'forget_stored_certificates')
+        ) as (gsp, dirname, isdir, rmtree, forget):
             self.driver._remove_config_directory(
                 self._sample_in_loadbalancer().id)
             gsp.assert_called_once_with(self._sample_in_loadbalancer().id, '')
             dirname.assert_called_once_with(gsp.return_value)
             isdir.assert_called_once_with(dirname.return_value)
             rmtree.assert_called_once_with(dirname.return_value)
+            forget.assert_called_once_with(dirname.return_value)
 
     def test_cleanup_namespace(self):
         with contextlib.nested(
@@ -494,13 +562,16 @@ class TestHaproxyNSDriver(base.BaseTestCase):
             self.driver.periodic_tasks()
             pt.assert_called_once_with()
 
-    def test_create_instance(self):
+    @mock.patch.object(sync_driver.HaproxyNSDriver, '_save_config')
+    def test_create_instance(self, save_config):
         with mock.patch.object(self.driver, '_plug') as plug:
             with mock.patch.object(self.driver, '_spawn') as spawn:
                 with mock.patch.object(
                         sync_driver, 'get_ns_name') as ns_name:
                     self.driver.create_instance(self.context_mock,
                                                 self._sample_in_loadbalancer())
+                    save_config.assert_called_once_with(
+                        self._sample_in_loadbalancer())
                     ns_name.assert_called_once_with(
                         self._sample_in_loadbalancer().id)
                     plug.assert_called_once_with(
@@ -513,17 +584,59 @@ class TestHaproxyNSDriver(base.BaseTestCase):
     def test_update_instance(self):
         with contextlib.nested(
             mock.patch.object(self.driver, '_get_state_file_path'),
+            mock.patch.object(self.driver, '_save_config', return_value=True),
             mock.patch.object(self.driver, '_spawn'),
             mock.patch('__builtin__.open')
-        ) as (gsp, spawn, mock_open):
+        ) as (gsp, save_config, spawn, mock_open):
             mock_open.return_value = ['5']
 
             self.driver.update_instance(self._sample_in_loadbalancer())
 
+            save_config.assert_called_once_with(
+                self._sample_in_loadbalancer())
             mock_open.assert_called_once_with(gsp.return_value, 'r')
             spawn.assert_called_once_with(
                 self._sample_in_loadbalancer(), ['-sf', '5'])
 
+    def test_update_instance_spawn_failed(self):
+        with contextlib.nested(
+            mock.patch.object(self.driver, '_get_state_file_path'),
+            mock.patch.object(self.driver, '_save_config', return_value=True),
+            mock.patch.object(self.driver, '_spawn',
+                              side_effect=RuntimeError),
+            mock.patch('__builtin__.open'),
+            mock.patch.object(sync_driver.jinja_cfg, 'discard_digest')
+        ) as (gsp, save_config, spawn, mock_open, discard_digest):
+            mock_open.return_value = ['5']
+            self.assertRaises(RuntimeError, self.driver.update_instance,
+                              self._sample_in_loadbalancer())
+            discard_digest.assert_called_once_with(gsp.return_value)
+
+    def test_update_instance_config_unchanged(self):
+        with contextlib.nested(
+            mock.patch.object(self.driver, '_save_config',
+                              return_value=False),
+            mock.patch.object(self.driver, 'exists', return_value=True),
+            mock.patch.object(self.driver, '_spawn')
+        ) as (save_config, exists, spawn):
+            self.driver.update_instance(self._sample_in_loadbalancer())
+            exists.assert_called_once_with(self._sample_in_loadbalancer())
+            self.assertFalse(spawn.called)
+
+    def test_update_instance_config_unchanged_not_running(self):
+        with contextlib.nested(
+            mock.patch.object(self.driver, '_get_state_file_path'),
+            mock.patch.object(self.driver, '_save_config',
+                              return_value=False),
+            mock.patch.object(self.driver, 'exists', return_value=False),
+            mock.patch.object(self.driver, '_spawn'),
+            mock.patch('__builtin__.open')
+        ) as (gsp, save_config, exists, spawn, mock_open):
+            mock_open.return_value = ['5']
+            self.driver.update_instance(self._sample_in_loadbalancer())
+            spawn.assert_called_once_with(
+                self._sample_in_loadbalancer(), ['-sf', '5'])
+
     def test_delete_instance(self):
         with contextlib.nested(
             mock.patch.object(self.driver, '_kill_processes'),
@@ -1154,17 +1267,33 @@ class TestMemberManager(BaseTestManager):
     def test_update(self):
         loadbalancer, listener, pool, member, _ = self._create_mock_models()
         old_member = data_models.Member(id='2')
+        self.driver.update_member_runtime.return_value = False
         with mock.patch.object(self.driver.load_balancer,
                                'refresh') as lb_refresh:
             with mock.patch.object(self.member,
                                    'successful_completion') as success:
                 self.member.update(self.context, old_member, member)
+                self.driver.update_member_runtime.assert_called_once_with(
+                    member)
                 lb_refresh.assert_called_once_with(self.context, loadbalancer)
                 success.assert_called_once_with(self.context, member)
 
+    def test_update_runtime(self):
+        loadbalancer, listener, pool, member, _ = self._create_mock_models()
+        old_member = data_models.Member(id='2')
+        self.driver.update_member_runtime.return_value = True
+        with mock.patch.object(self.driver.load_balancer,
+                               'refresh') as lb_refresh:
+            with mock.patch.object(self.member,
+                                   'successful_completion') as success:
+                self.member.update(self.context, old_member, member)
+                self.assertFalse(lb_refresh.called)
+                success.assert_called_once_with(self.context, member)
+
     def test_fail_update(self):
         loadbalancer, listener, pool, member, _ = self._create_mock_models()
         old_member = data_models.Member(id='2')
+        self.driver.update_member_runtime.return_value = False
         with mock.patch.object(self.driver.load_balancer,
                                'refresh') as lb_refresh:
             with mock.patch.object(self.member,
@@ -1237,6 +1366,30 @@ class TestMemberManager(BaseTestManager):
             fail.assert_called_once_with(self.context, member)
             self.assertFalse(success.called)
 
+    def test_batch_update(self):
+        loadbalancer, listener, pool, member, _ = self._create_mock_models()
+        with contextlib.nested(
+            mock.patch.object(self.driver.load_balancer, 'refresh'),
+            mock.patch.object(self.member, 'successful_batch_completion')
+        ) as (refresh, success):
+            self.member.batch_update(self.context, pool, pool)
+            refresh.assert_called_once_with(self.context, loadbalancer)
+            success.assert_called_once_with(self.context, pool)
+
+    def test_fail_batch_update(self):
+        loadbalancer, listener, pool, member, _ = self._create_mock_models()
+        with contextlib.nested(
+            mock.patch.object(self.driver.load_balancer, 'refresh'),
+            mock.patch.object(self.member, 'successful_batch_completion'),
+            mock.patch.object(self.member, 'failed_batch_completion')
+        ) as (refresh, success, fail):
+            refresh.side_effect = Exception()
+            self.assertRaises(Exception, self.member.batch_update,
+                              self.context, pool, pool)
+            refresh.assert_called_once_with(self.context, loadbalancer)
+            fail.assert_called_once_with(self.context, pool)
+            self.assertFalse(success.called)
+
 
 class TestHealthMonitorManager(BaseTestManager):
 
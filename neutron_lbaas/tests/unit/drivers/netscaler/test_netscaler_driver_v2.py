@@ -13,6 +13,7 @@
 #    under the License.
 
 import mock
+from neutron.plugins.common import constants
 
 from neutron_lbaas.drivers.netscaler \
     import netscaler_driver_v2
@@ -325,6 +326,86 @@ class TestNetScalerLoadBalancerDriverV2(
         MonitorManagerTest(self, self.driver.health_monitor,
                            self.lb.listeners[0].default_pool.healthmonitor)
 
+    def test_track_provision_status(self):
+        netscaler_driver_v2.PROVISIONING_STATUS_TRACKER.clear()
+        self.driver.load_balancer.track_provision_status(self.lb)
+        self.driver.listener.track_provision_status(self.lb.listeners[0])
+        self.assertEqual(set([self.lb.id]),
+                         netscaler_driver_v2.PROVISIONING_STATUS_TRACKER)
+
+    def test_loadbalancer_statuses_paged(self):
+        self.driver.pagesize_status_collection = "2"
+        self.driver.bulk_status_threshold = 1
+        self.driver.is_bulk_status_supported = True
+        self.retrieve_resource_mock.side_effect = [
+            (200, {'dict': {'statuses': [{'loadbalancer': {'id': 'lb1'}},
+                                         {'loadbalancer': {'id': 'lb2'}}]}}),
+            (200, {'dict': {'statuses': [{'loadbalancer': {'id': 'lb3'}}]}}),
+            (200, {'dict': {'statuses': {'loadbalancer': {'id': 'lb4'}}}})]
+        statuses = self.driver._get_loadbalancers_statuses(
+            ['lb1', 'lb3', 'lb4'])
+        self.assertEqual(
+            {'lb1': {'lb_statuses': {'loadbalancer': {'id': 'lb1'}}},
+             'lb3': {'lb_statuses': {'loadbalancer': {'id': 'lb3'}}},
+             'lb4': {'lb_statuses': {'loadbalancer': {'id': 'lb4'}}}},
+            statuses)
+        self.retrieve_resource_mock.assert_has_calls([
+            mock.call('GLOBAL', 'v2.0/lbaas/loadbalancers/statuses'
+                                '?page=1&size=2'),
+            mock.call('GLOBAL', 'v2.0/lbaas/loadbalancers/statuses'
+                                '?page=2&size=2'),
+            mock.call('GLOBAL', 'v2.0/lbaas/loadbalancers/lb4/statuses')])
+
+    def test_loadbalancer_statuses_one_by_one(self):
+        self.driver.pagesize_status_collection = "300"
+        self.driver.bulk_status_threshold = 1
+        self.driver.is_bulk_status_supported = True
+
+        def retrieve_resource(tenant_id, resource_path):
+            if '?' in resource_path:
+                raise ncc_client.NCCException(
+                    ncc_client.NCCException.RESPONSE_ERROR, status=404)
+            lb_id = resource_path.split('/')[-2]
+            return 200, {'dict': {'statuses': {'loadbalancer': {'id': lb_id}}}}
+
+        self.retrieve_resource_mock.side_effect = retrieve_resource
+        statuses = self.driver._get_loadbalancers_statuses(['lb1', 'lb2'])
+        self.assertFalse(self.driver.is_bulk_status_supported)
+        self.assertEqual({'loadbalancer': {'id': 'lb2'}},
+                         statuses['lb2']['lb_statuses'])
+        self.driver._get_loadbalancers_statuses(['lb1', 'lb2'])
+        self.assertEqual(5, self.retrieve_resource_mock.call_count)
+
+    def test_loadbalancer_statuses_below_bulk_threshold(self):
+        self.driver.pagesize_status_collection = "300"
+        self.driver.bulk_status_threshold = 2
+        self.driver.is_bulk_status_supported = True
+        self.retrieve_resource_mock.side_effect = [
+            (200, {'dict': {'statuses': {'loadbalancer': {'id': 'lb1'}}}}),
+            (200, {'dict': {'statuses': {'loadbalancer': {'id': 'lb2'}}}})]
+        statuses = self.driver._get_loadbalancers_statuses(['lb1', 'lb2'])
+        self.assertEqual({'loadbalancer': {'id': 'lb2'}},
+                         statuses['lb2']['lb_statuses'])
+        self.retrieve_resource_mock.assert_has_calls([
+            mock.call('GLOBAL', 'v2.0/lbaas/loadbalancers/lb1/statuses'),
+            mock.call('GLOBAL', 'v2.0/lbaas/loadbalancers/lb2/statuses')])
+        self.assertEqual(2, self.retrieve_resource_mock.call_count)
+
+    def test_update_status_tree_reads_statuses_only(self):
+        self.plugin.db.get_loadbalancer_status_tree.return_value = (
+            data_models.LoadBalancer(
+                id=self.lb.id, provisioning_status=constants.ACTIVE))
+        netscaler_driver_v2.PROVISIONING_STATUS_TRACKER.add(self.lb.id)
+        self.driver._update_status_tree_in_db(
+            self.lb.id, {'loadbalancer': {'id': self.lb.id, 'listeners': [],
+                                          'provisioning_status':
+                                          constants.ACTIVE}})
+        self.plugin.db.get_loadbalancer_status_tree.assert_called_once_with(
+            self.driver.admin_ctx, self.lb.id)
+        self.assertFalse(self.plugin.db.get_loadbalancer.called)
+        self.assertNotIn(self.lb.id,
+                         netscaler_driver_v2.PROVISIONING_STATUS_TRACKER)
+
 
 def mock_create_resource_func(*args, **kwargs):
     return 201, {}
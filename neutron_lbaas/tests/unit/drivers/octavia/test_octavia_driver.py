@@ -12,12 +12,16 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import time
+
 import mock
 from oslo_config import cfg
+import requests
 
 from neutron import context
 from neutron_lbaas.drivers.octavia import driver
 from neutron_lbaas.services.loadbalancer import data_models
+from neutron_lbaas.tests import base
 from neutron_lbaas.tests.unit.db.loadbalancer import test_db_loadbalancerv2
 
 
@@ -275,75 +279,220 @@ class TestOctaviaDriver(BaseOctaviaDriverTest):
         m.delete(hm, hm_url)
 
 
-class TestThreadedDriver(BaseOctaviaDriverTest):
-
-        def setUp(self):
-            super(TestThreadedDriver, self).setUp()
-            cfg.CONF.set_override('request_poll_interval', 1, group='octavia')
-            cfg.CONF.set_override('request_poll_timeout', 5, group='octavia')
-            self.driver.req.get = mock.MagicMock()
-            self.succ_completion = mock.MagicMock()
-            self.fail_completion = mock.MagicMock()
-            self.context = mock.MagicMock()
-            ctx_patcher = mock.patch('neutron.context.get_admin_context',
-                                     return_value=self.context)
-            ctx_patcher.start()
-            self.addCleanup(ctx_patcher.stop)
-            self.driver.load_balancer.successful_completion = (
-                self.succ_completion)
-            self.driver.load_balancer.failed_completion = self.fail_completion
-
-        def test_thread_op_goes_active(self):
-            self.driver.req.get.side_effect = [
-                {'provisioning_status': 'PENDING_CREATE'},
-                {'provisioning_status': 'ACTIVE'}
-            ]
-            driver.thread_op(self.driver.load_balancer, self.lb)
-            self.succ_completion.assert_called_once_with(self.context, self.lb,
-                                                         delete=False)
-            self.assertEqual(0, self.fail_completion.call_count)
-
-        def test_thread_op_goes_deleted(self):
-            self.driver.req.get.side_effect = [
-                {'provisioning_status': 'PENDING_DELETE'},
-                {'provisioning_status': 'DELETED'}
-            ]
-            driver.thread_op(self.driver.load_balancer, self.lb, delete=True)
-            self.succ_completion.assert_called_once_with(self.context, self.lb,
-                                                         delete=True)
-            self.assertEqual(0, self.fail_completion.call_count)
-
-        def test_thread_op_goes_error(self):
-            self.driver.req.get.side_effect = [
-                {'provisioning_status': 'PENDING_CREATE'},
-                {'provisioning_status': 'ERROR'}
-            ]
-            driver.thread_op(self.driver.load_balancer, self.lb)
-            self.fail_completion.assert_called_once_with(self.context, self.lb)
-            self.assertEqual(0, self.succ_completion.call_count)
-
-        def test_thread_op_a_times_out(self):
-            cfg.CONF.set_override('request_poll_timeout', 1, group='octavia')
-            self.driver.req.get.side_effect = [
-                {'provisioning_status': 'PENDING_CREATE'}
-            ]
-            driver.thread_op(self.driver.load_balancer, self.lb)
-            self.fail_completion.assert_called_once_with(self.context, self.lb)
-            self.assertEqual(0, self.succ_completion.call_count)
-
-        def test_thread_op_updates_vip_when_vip_delegated(self):
-            cfg.CONF.set_override('allocates_vip', True, group='octavia')
-            expected_vip = '10.1.1.1'
-            self.driver.req.get.side_effect = [
-                {'provisioning_status': 'PENDING_CREATE',
-                 'vip': {'ip_address': ''}},
-                {'provisioning_status': 'ACTIVE',
-                 'vip': {'ip_address': expected_vip}}
-            ]
-            driver.thread_op(self.driver.load_balancer,
-                             self.lb,
-                             lb_create=True)
-            self.succ_completion.assert_called_once_with(self.context, self.lb,
-                                                         delete=False,
-                                                         lb_create=True)
-            self.assertEqual(expected_vip, self.lb.vip_address)
+class TestStatusPoller(BaseOctaviaDriverTest):
+
+    def setUp(self):
+        super(TestStatusPoller, self).setUp()
+        cfg.CONF.set_override('request_poll_interval', 0, group='octavia')
+        cfg.CONF.set_override('request_poll_timeout', 5, group='octavia')
+        self.driver.req.get = mock.MagicMock()
+        self.succ_completion = mock.MagicMock()
+        self.fail_completion = mock.MagicMock()
+        self.context = mock.MagicMock()
+        ctx_patcher = mock.patch('neutron.context.get_admin_context',
+                                 return_value=self.context)
+        ctx_patcher.start()
+        self.addCleanup(ctx_patcher.stop)
+        # the tests drive the poller themselves
+        mock.patch.object(driver.StatusPoller, '_run').start()
+        self.poller = self.driver.poller
+        self.driver.load_balancer.successful_completion = (
+            self.succ_completion)
+        self.driver.load_balancer.failed_completion = self.fail_completion
+
+    def _poll(self, times):
+        for _i in range(times):
+            self.poller.poll()
+
+    def test_poll_goes_active(self):
+        self.driver.req.get.side_effect = [
+            {'provisioning_status': 'PENDING_CREATE'},
+            {'provisioning_status': 'ACTIVE'}
+        ]
+        self.poller.add(self.driver.load_balancer, self.lb)
+        self._poll(2)
+        self.succ_completion.assert_called_once_with(self.context, self.lb,
+                                                     delete=False)
+        self.assertEqual(0, self.fail_completion.call_count)
+        self.assertIsNone(self.poller.poll())
+
+    def test_poll_goes_deleted(self):
+        self.driver.req.get.side_effect = [
+            {'provisioning_status': 'PENDING_DELETE'},
+            {'provisioning_status': 'DELETED'}
+        ]
+        self.poller.add(self.driver.load_balancer, self.lb, delete=True)
+        self._poll(2)
+        self.succ_completion.assert_called_once_with(self.context, self.lb,
+                                                     delete=True)
+        self.assertEqual(0, self.fail_completion.call_count)
+
+    def test_poll_goes_error(self):
+        self.driver.req.get.side_effect = [
+            {'provisioning_status': 'PENDING_CREATE'},
+            {'provisioning_status': 'ERROR'}
+        ]
+        self.poller.add(self.driver.load_balancer, self.lb)
+        self._poll(2)
+        self.fail_completion.assert_called_once_with(self.context, self.lb)
+        self.assertEqual(0, self.succ_completion.call_count)
+
+    def test_poll_times_out(self):
+        cfg.CONF.set_override('request_poll_timeout', 0, group='octavia')
+        self.driver.req.get.return_value = {
+            'provisioning_status': 'PENDING_CREATE'}
+        self.poller.add(self.driver.load_balancer, self.lb)
+        self._poll(1)
+        self.fail_completion.assert_called_once_with(self.context, self.lb)
+        self.assertEqual(0, self.succ_completion.call_count)
+
+    def test_poll_get_fails(self):
+        self.driver.req.get.side_effect = [
+            Exception(), {'provisioning_status': 'ACTIVE'}]
+        self.poller.add(self.driver.load_balancer, self.lb)
+        self._poll(2)
+        self.succ_completion.assert_called_once_with(self.context, self.lb,
+                                                     delete=False)
+
+    def test_poll_updates_vip_when_vip_delegated(self):
+        cfg.CONF.set_override('allocates_vip', True, group='octavia')
+        expected_vip = '10.1.1.1'
+        self.driver.req.get.side_effect = [
+            {'provisioning_status': 'PENDING_CREATE',
+             'vip': {'ip_address': ''}},
+            {'provisioning_status': 'ACTIVE',
+             'vip': {'ip_address': expected_vip}}
+        ]
+        self.poller.add(self.driver.load_balancer, self.lb, lb_create=True)
+        self._poll(2)
+        self.succ_completion.assert_called_once_with(self.context, self.lb,
+                                                     delete=False,
+                                                     lb_create=True)
+        self.assertEqual(expected_vip, self.lb.vip_address)
+
+    def test_operations_share_one_poll(self):
+        self.driver.req.get.return_value = {'provisioning_status': 'ACTIVE'}
+        member = self.lb.listeners[0].default_pool.members[0]
+        self.driver.member.successful_completion = self.succ_completion
+        self.poller.add(self.driver.load_balancer, self.lb)
+        self.poller.add(self.driver.member, member)
+        self._poll(1)
+        self.assertEqual(1, self.driver.req.get.call_count)
+        self.succ_completion.assert_has_calls(
+            [mock.call(self.context, self.lb, delete=False),
+             mock.call(self.context, member, delete=False)], any_order=True)
+
+    def test_loadbalancers_listed_once(self):
+        other_lb = data_models.LoadBalancer(id='other_id')
+        self.driver.req.get.return_value = [
+            {'id': self.lb.id, 'provisioning_status': 'ACTIVE'},
+            {'id': other_lb.id, 'provisioning_status': 'ACTIVE'}]
+        self.poller.add(self.driver.load_balancer, self.lb)
+        self.poller.add(self.driver.load_balancer, other_lb)
+        self._poll(1)
+        self.driver.req.get.assert_called_once_with('/v1/loadbalancers')
+        self.assertEqual(2, self.succ_completion.call_count)
+
+    def test_interval_backs_off(self):
+        cfg.CONF.set_override('request_poll_interval', 1, group='octavia')
+        cfg.CONF.set_override('request_poll_max_interval', 3,
+                              group='octavia')
+        cfg.CONF.set_override('request_poll_timeout', 100, group='octavia')
+        self.driver.req.get.return_value = {
+            'provisioning_status': 'PENDING_UPDATE'}
+        self.poller.add(self.driver.load_balancer, self.lb)
+        now = time.time()
+        self.assertAlmostEqual(2, self.poller.poll(now + 1), places=3)
+        self.assertAlmostEqual(1, self.poller.poll(now + 2), places=3)
+        self.assertAlmostEqual(3, self.poller.poll(now + 3), places=3)
+        self.assertAlmostEqual(3, self.poller.poll(now + 6), places=3)
+        self.assertEqual(3, self.driver.req.get.call_count)
+        # a new operation brings the load balancer back to the base rate
+        self.poller.add(self.driver.load_balancer, self.lb)
+        self.assertAlmostEqual(2, self.poller.poll(now + 9), places=3)
+
+    def test_async_op_adds_to_poller(self):
+        with mock.patch.object(self.poller, 'add') as add:
+            self.driver.load_balancer.create(self.context, self.lb)
+            add.assert_called_once_with(self.driver.load_balancer, self.lb,
+                                        delete=False, lb_create=True)
+
+
+class TestOctaviaRequest(base.BaseTestCase):
+
+    def setUp(self):
+        super(TestOctaviaRequest, self).setUp()
+        self.req = driver.OctaviaRequest('http://octavia', connect_timeout=1,
+                                         read_timeout=2, retries=2,
+                                         retry_backoff=0.1)
+        self.session_request = mock.patch.object(self.req.session,
+                                                 'request').start()
+        self.sleep = mock.patch('time.sleep').start()
+
+    def _response(self, status_code=200, body=None):
+        r = mock.Mock(status_code=status_code)
+        r.json.return_value = body
+        return r
+
+    def test_request_reuses_session(self):
+        self.session_request.return_value = self._response(body={'id': 'x'})
+        self.assertEqual({'id': 'x'}, self.req.get('/v1/loadbalancers/x'))
+        self.req.post('/v1/loadbalancers', {'id': 'y'})
+        self.assertEqual(2, self.session_request.call_count)
+        self.session_request.assert_called_with(
+            'POST', 'http://octavia/v1/loadbalancers',
+            data='{"id": "y"}',
+            headers={'Content-type': 'application/json'},
+            timeout=(1, 2))
+
+    def test_get_retried_with_backoff(self):
+        self.session_request.side_effect = [
+            requests.ConnectionError(), self._response(status_code=503),
+            self._response(body={})]
+        self.assertEqual({}, self.req.get('/v1/loadbalancers/x'))
+        self.assertEqual(3, self.session_request.call_count)
+        self.assertEqual([mock.call(0.1), mock.call(0.2)],
+                         self.sleep.call_args_list)
+
+    def test_get_retries_exhausted(self):
+        self.session_request.side_effect = requests.Timeout()
+        self.assertRaises(requests.Timeout, self.req.get,
+                          '/v1/loadbalancers/x')
+        self.assertEqual(3, self.session_request.call_count)
+
+    def test_post_not_retried(self):
+        self.session_request.side_effect = requests.ConnectionError()
+        self.assertRaises(requests.ConnectionError, self.req.post,
+                          '/v1/loadbalancers', {'id': 'x'})
+        self.assertEqual(1, self.session_request.call_count)
+        self.assertFalse(self.sleep.called)
+
+    def test_stats_per_endpoint(self):
+        self.session_request.side_effect = [
+            requests.ConnectionError(), self._response(body={}),
+            self._response(status_code=404, body={}),
+            self._response()]
+        self.req.get('/v1/loadbalancers/x')
+        self.req.get('/v1/loadbalancers/y/listeners/z')
+        self.req.delete('/v1/loadbalancers/x')
+        stats = self.req.stats.get()
+        self.assertEqual(
+            set([('GET', '/v1/loadbalancers/{id}'),
+                 ('GET', '/v1/loadbalancers/{id}/listeners/{id}'),
+                 ('DELETE', '/v1/loadbalancers/{id}')]),
+            set(stats))
+        lb_get = stats[('GET', '/v1/loadbalancers/{id}')]
+        self.assertEqual(2, lb_get['requests'])
+        self.assertEqual(1, lb_get['errors'])
+        self.assertEqual(1, lb_get['retries'])
+        self.assertEqual(
+            1, stats[('GET', '/v1/loadbalancers/{id}/listeners/{id}')][
+                'errors'])
+        self.assertEqual(0, stats[('DELETE', '/v1/loadbalancers/{id}')][
+            'errors'])
+
+    def test_stats_logged(self):
+        req = driver.OctaviaRequest('http://octavia', stats_log_interval=60)
+        self.assertEqual('Octavia', req.stats.name)
+        self.assertEqual(60, req.stats.log_interval)
+        self.assertEqual(0, self.req.stats.log_interval)
@@ -0,0 +1,92 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import mock
+from six.moves import queue as Queue
+
+from neutron_lbaas.drivers.radware import completion_scheduler
+from neutron_lbaas.tests import base
+
+
+class TestCompletionScheduler(base.BaseTestCase):
+
+    def setUp(self):
+        super(TestCompletionScheduler, self).setUp()
+        self.time = mock.patch('time.time', return_value=1000).start()
+        self.queue = Queue.Queue()
+        self.scheduler = completion_scheduler.CompletionScheduler(
+            self.queue, poll_interval=1, max_poll_interval=4)
+        self.scheduler.handle_operation_completion = mock.Mock(
+            return_value=False)
+
+    def _queue(self, *opers):
+        for oper in opers:
+            self.queue.put_nowait(oper)
+        self.scheduler._receive(0)
+
+    def _polled(self):
+        handle = self.scheduler.handle_operation_completion
+        polled = [args[0] for args, kwargs in handle.call_args_list]
+        handle.reset_mock()
+        return polled
+
+    def test_first_poll_after_interval(self):
+        self._queue('a', 'b')
+        self.assertEqual(1, self.scheduler.poll())
+        self.assertEqual([], self._polled())
+        self.time.return_value = 1001
+        self.scheduler.poll()
+        self.assertEqual(['a', 'b'], self._polled())
+
+    def test_interval_doubled_up_to_max(self):
+        self._queue('a')
+        polls = []
+        for now in range(1001, 1020):
+            self.time.return_value = now
+            self.scheduler.poll()
+            if self._polled():
+                polls.append(now)
+        self.assertEqual([1001, 1003, 1007, 1011, 1015, 1019], polls)
+
+    def test_completed_operation_dropped(self):
+        self.scheduler.handle_operation_completion.side_effect = (
+            lambda oper: oper == 'a')
+        self._queue('a', 'b')
+        self.time.return_value = 1001
+        self.assertEqual(2, self.scheduler.poll())
+        self.assertEqual(['b'], [entry[2]
+                                 for entry in self.scheduler._scheduled])
+
+    def test_task_done_on_completion(self):
+        self.scheduler.handle_operation_completion.side_effect = (
+            lambda oper: oper == 'a' or self.time.return_value >= 1003)
+        self._queue('a', 'b')
+        self.assertEqual(2, self.queue.unfinished_tasks)
+        self.time.return_value = 1001
+        self.scheduler.poll()
+        self.assertEqual(1, self.queue.unfinished_tasks)
+        self.time.return_value = 1003
+        self.scheduler.poll()
+        self.assertEqual(0, self.queue.unfinished_tasks)
+        # returns right away now that every operation has completed
+        self.queue.join()
+
+    def test_failed_poll_rescheduled(self):
+        self.scheduler.handle_operation_completion.side_effect = ValueError
+        self._queue('a')
+        self.time.return_value = 1001
+        self.scheduler.poll()
+        self.assertEqual(['a'], [entry[2]
+                                 for entry in self.scheduler._scheduled])
+
+    def test_no_operation(self):
+        self.assertIsNone(self.scheduler.poll())
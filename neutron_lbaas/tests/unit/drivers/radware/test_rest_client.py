@@ -0,0 +1,128 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import httplib
+import socket
+
+import mock
+
+from neutron_lbaas.drivers.radware import rest_client
+from neutron_lbaas.tests import base
+
+
+def _response(status=200, body='{}', will_close=False):
+    return mock.Mock(status=status, reason='OK', will_close=will_close,
+                     read=mock.Mock(return_value=body))
+
+
+class TestConnectionPool(base.BaseTestCase):
+
+    def setUp(self):
+        super(TestConnectionPool, self).setUp()
+        self.connection = mock.patch.object(httplib,
+                                            'HTTPSConnection').start()
+        self.connection.side_effect = lambda *args, **kwargs: mock.Mock(
+            getresponse=mock.Mock(return_value=_response()))
+        self.pool = rest_client.ConnectionPool(size=1)
+
+    def _request(self, server='s1'):
+        return self.pool.request(server, 2189, 'GET', '/api', None, {})
+
+    def test_connection_reused(self):
+        self.assertEqual((200, 'OK', '{}'), self._request())
+        self._request()
+        self.assertEqual(1, self.connection.call_count)
+
+    def test_connection_closed_by_server_not_reused(self):
+        self.connection.side_effect = lambda *args, **kwargs: mock.Mock(
+            getresponse=mock.Mock(return_value=_response(will_close=True)))
+        self._request()
+        self._request()
+        self.assertEqual(2, self.connection.call_count)
+
+    def test_idle_connections_per_server(self):
+        self._request('s1')
+        self._request('s2')
+        self._request('s1')
+        self.assertEqual(2, self.connection.call_count)
+
+    def test_stale_connection_retried(self):
+        self._request()
+        stale = self.pool._idle[('s1', 2189)][0]
+        stale.getresponse.side_effect = httplib.BadStatusLine('')
+        self.assertEqual((200, 'OK', '{}'), self._request())
+        stale.close.assert_called_once_with()
+        self.assertEqual(2, self.connection.call_count)
+
+    def test_stale_connection_not_written_retried(self):
+        self._request()
+        stale = self.pool._idle[('s1', 2189)][0]
+        stale.request.side_effect = socket.error
+        self.assertEqual((200, 'OK', '{}'),
+                         self.pool.request('s1', 2189, 'POST', '/api', '{}',
+                                           {}))
+        self.assertEqual(2, self.connection.call_count)
+
+    def test_sent_request_not_retried(self):
+        self._request()
+        stale = self.pool._idle[('s1', 2189)][0]
+        stale.getresponse.side_effect = httplib.BadStatusLine('')
+        self.assertRaises(httplib.BadStatusLine, self.pool.request,
+                          's1', 2189, 'POST', '/api', '{}', {})
+        stale.close.assert_called_once_with()
+        self.assertEqual(1, self.connection.call_count)
+
+    def test_timeout_not_retried(self):
+        self._request()
+        stale = self.pool._idle[('s1', 2189)][0]
+        stale.getresponse.side_effect = socket.timeout
+        self.assertRaises(socket.timeout, self._request)
+        self.assertEqual(1, self.connection.call_count)
+
+    def test_retried_once(self):
+        self.pool.size = 2
+        conns = [mock.Mock(getresponse=mock.Mock(
+            side_effect=httplib.BadStatusLine(''))) for _i in range(2)]
+        for conn in conns:
+            self.pool._put('s1', 2189, conn)
+        self.assertEqual((200, 'OK', '{}'), self._request())
+        # the failure on one idle connection drops the other one unused
+        self.assertEqual(1, sum(conn.getresponse.call_count
+                                for conn in conns))
+        for conn in conns:
+            conn.close.assert_called_once_with()
+        self.assertEqual(1, self.connection.call_count)
+
+    def test_new_connection_failure_raised(self):
+        self.connection.side_effect = lambda *args, **kwargs: mock.Mock(
+            request=mock.Mock(side_effect=socket.error))
+        self.assertRaises(socket.error, self._request)
+        self.assertEqual(1, self.connection.call_count)
+
+    def test_clear_server(self):
+        self._request('s1')
+        self._request('s2')
+        conn = self.pool._idle[('s1', 2189)][0]
+        self.pool.clear('s1')
+        conn.close.assert_called_once_with()
+        self.assertEqual([('s2', 2189)], list(self.pool._idle))
+
+
+class TestvDirectRESTClient(base.BaseTestCase):
+
+    def test_flip_servers_drops_connections(self):
+        client = rest_client.vDirectRESTClient(
+            server='s1', secondary_server='s2', user='u', password='p')
+        with mock.patch.object(client.pool, 'clear') as clear:
+            client._flip_servers()
+        clear.assert_called_once_with('s1')
+        self.assertEqual('s2', client.server)
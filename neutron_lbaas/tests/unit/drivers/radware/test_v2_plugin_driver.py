@@ -29,6 +29,7 @@ from neutron_lbaas.drivers.radware import exceptions as r_exc
 from neutron_lbaas.drivers.radware import v2_driver
 from neutron_lbaas.extensions import loadbalancerv2
 from neutron_lbaas.services.loadbalancer import constants as lb_const
+from neutron_lbaas.tests import base
 from neutron_lbaas.tests.unit.db.loadbalancer import test_db_loadbalancerv2
 
 GET_200 = ('/api/workflow/', '/api/workflowTemplate')
@@ -735,6 +736,62 @@ class TestLBaaSDriver(TestLBaaSDriverBase):
                             self.driver_rest_call_mock.assert_has_calls(
                                 calls, any_order=True)
 
+    def test_diff_action_sends_changed_members(self):
+        self.driver.workflow_diff_action_name = 'apply_diff'
+        with self.subnet(cidr='10.0.0.0/24') as vip_sub:
+            with self.loadbalancer(subnet=vip_sub) as lb:
+                lb_id = lb['loadbalancer']['id']
+                with self.listener(loadbalancer_id=lb_id) as listener:
+                    with self.pool(
+                        protocol='HTTP',
+                        listener_id=listener['listener']['id']) as pool:
+                        with self.member(pool_id=pool['pool']['id'],
+                                         subnet=vip_sub, address='10.0.1.10'):
+                            rest_call_function_mock.__dict__.update(
+                                {'WORKFLOW_MISSING': False})
+                            self.driver_rest_call_mock.reset_mock()
+                            with self.member(pool_id=pool['pool']['id'],
+                                             subnet=vip_sub,
+                                             address='10.0.1.20') as member2:
+                                member2_data = {
+                                    "id": member2['member']['id'],
+                                    "address": "10.0.1.20",
+                                    "protocol_port": 80,
+                                    "weight": 1, "admin_state_up": True,
+                                    "subnet": "255.255.255.255",
+                                    "mask": "255.255.255.255",
+                                    "gw": "255.255.255.255"}
+                                wf_diff_params = {'parameters': {
+                                    'listeners': [{
+                                        "id": listener['listener']['id'],
+                                        "admin_state_up": True,
+                                        "protocol_port": 80,
+                                        "protocol": "HTTP",
+                                        "connection_limit": -1,
+                                        "default_pool": {
+                                            "id": pool['pool']['id'],
+                                            "protocol": "HTTP",
+                                            "lb_algorithm": "ROUND_ROBIN",
+                                            "admin_state_up": True,
+                                            "members": [member2_data],
+                                            "removed_members": []}}],
+                                    "removed_listeners": [],
+                                    "admin_state_up": True,
+                                    "pip_address": "10.0.0.2",
+                                    "vip_address": "10.0.0.2"}}
+                                self.driver_rest_call_mock.assert_any_call(
+                                    'POST',
+                                    '/api/workflow/LB_' + lb_id +
+                                    '/action/apply_diff',
+                                    wf_diff_params,
+                                    v2_driver.TEMPLATE_HEADER)
+                                self.assertNotIn(
+                                    mock.call('POST',
+                                              '/api/workflow/LB_' + lb_id +
+                                              '/action/apply',
+                                              mock.ANY, mock.ANY),
+                                    self.driver_rest_call_mock.call_args_list)
+
     def test_build_objects_graph_two_legs_full(self):
         with contextlib.nested(
             self.subnet(cidr='10.0.0.0/24'),
@@ -835,6 +892,65 @@ class TestLBaaSDriver(TestLBaaSDriverBase):
                                             calls, any_order=True)
 
 
+class TestDiffObjectsGraph(base.BaseTestCase):
+
+    def _graph(self, listeners):
+        return {'vip_address': '10.0.0.2', 'admin_state_up': True,
+                'pip_address': '10.0.0.2', 'listeners': listeners}
+
+    def _listener(self, listener_id, members, **kwargs):
+        listener = {'id': listener_id, 'protocol_port': 80,
+                    'protocol': 'HTTP', 'connection_limit': -1,
+                    'admin_state_up': True,
+                    'default_pool': {'id': 'p-' + listener_id,
+                                     'protocol': 'HTTP',
+                                     'lb_algorithm': 'ROUND_ROBIN',
+                                     'admin_state_up': True,
+                                     'members': members}}
+        listener.update(kwargs)
+        return listener
+
+    def test_unchanged_listener_omitted(self):
+        graph = self._graph([self._listener('l1', [{'id': 'm1'}])])
+        diff = v2_driver._diff_objects_graph(graph, copy.deepcopy(graph))
+        self.assertEqual([], diff['listeners'])
+        self.assertEqual([], diff['removed_listeners'])
+        self.assertEqual('10.0.0.2', diff['vip_address'])
+
+    def test_members_diff(self):
+        old = self._graph([self._listener(
+            'l1', [{'id': 'm1', 'weight': 1}, {'id': 'm2', 'weight': 1}])])
+        new = self._graph([self._listener(
+            'l1', [{'id': 'm1', 'weight': 2}, {'id': 'm3', 'weight': 1}])])
+        pool = v2_driver._diff_objects_graph(old, new)['listeners'][0][
+            'default_pool']
+        self.assertEqual([{'id': 'm1', 'weight': 2},
+                          {'id': 'm3', 'weight': 1}], pool['members'])
+        self.assertEqual(['m2'], pool['removed_members'])
+
+    def test_unchanged_pool_omitted(self):
+        old = self._graph([self._listener('l1', [{'id': 'm1'}])])
+        new = self._graph([self._listener('l1', [{'id': 'm1'}],
+                                          connection_limit=10)])
+        listener = v2_driver._diff_objects_graph(old, new)['listeners'][0]
+        self.assertEqual(10, listener['connection_limit'])
+        self.assertNotIn('default_pool', listener)
+
+    def test_removed_certificate(self):
+        old = self._graph([self._listener(
+            'l1', [{'id': 'm1'}], default_tls_certificate={'id': 'c1'})])
+        new = self._graph([self._listener('l1', [{'id': 'm1'}])])
+        listener = v2_driver._diff_objects_graph(old, new)['listeners'][0]
+        self.assertIsNone(listener['default_tls_certificate'])
+
+    def test_listeners_added_and_removed(self):
+        old = self._graph([self._listener('l1', [{'id': 'm1'}])])
+        new = self._graph([self._listener('l2', [{'id': 'm2'}])])
+        diff = v2_driver._diff_objects_graph(old, new)
+        self.assertEqual(new['listeners'], diff['listeners'])
+        self.assertEqual(['l1'], diff['removed_listeners'])
+
+
 class TestLBaaSDriverDebugOptions(TestLBaaSDriverBase):
     def setUp(self):
         cfg.CONF.set_override('configure_l3', False,
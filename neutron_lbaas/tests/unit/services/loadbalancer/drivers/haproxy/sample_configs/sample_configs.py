@@ -275,7 +275,9 @@ def sample_base_expected_config(backend, frontend=None):
             "    group nogroup\n"
             "    log /dev/log local0\n"
             "    log /dev/log local1 notice\n"
-            "    stats socket /sock_path mode 0666 level user\n\n"
+            "    stats socket /sock_path mode 0666 level user\n"
+            "    stats socket /haproxy_admin.sock mode 0660 group nogroup "
+            "level admin\n\n"
             "defaults\n"
             "    log global\n"
             "    retries 3\n"
@@ -31,19 +31,95 @@ class TestHaproxyCfg(base.BaseTestCase):
         with contextlib.nested(
             mock.patch('neutron_lbaas.services.loadbalancer.'
                        'drivers.haproxy.jinja_cfg.render_loadbalancer_obj'),
-            mock.patch('neutron.common.utils.replace_file')
-        ) as (r_t, replace):
+            mock.patch('neutron.common.utils.replace_file'),
+            mock.patch.object(jinja_cfg, '_config_digest',
+                              return_value='digest'),
+            mock.patch.object(jinja_cfg, '_read_file', return_value=None),
+            mock.patch('os.path.exists', return_value=True)
+        ) as (r_t, replace, digest, read_file, exists):
             r_t.return_value = 'fake_rendered_template'
             lb = mock.Mock()
-            jinja_cfg.save_config('test_conf_path', lb, 'test_sock_path',
-                                  'nogroup',
-                                  'fake_state_path')
+            ret = jinja_cfg.save_config('test_conf_path', lb,
+                                        'test_sock_path',
+                                        'nogroup',
+                                        'fake_state_path')
+            self.assertTrue(ret)
             r_t.assert_called_once_with(lb,
                                         'nogroup',
                                         'test_sock_path',
                                         'fake_state_path')
-            replace.assert_called_once_with('test_conf_path',
-                                            'fake_rendered_template')
+            digest.assert_called_once_with('fake_rendered_template', lb,
+                                           'fake_state_path')
+            read_file.assert_called_once_with('test_conf_path.sha256')
+            replace.assert_has_calls([
+                mock.call('test_conf_path', 'fake_rendered_template'),
+                mock.call('test_conf_path.sha256', 'digest')])
+            self.assertEqual(2, replace.call_count)
+
+    def test_save_config_unchanged(self):
+        with contextlib.nested(
+            mock.patch('neutron_lbaas.services.loadbalancer.'
+                       'drivers.haproxy.jinja_cfg.render_loadbalancer_obj'),
+            mock.patch('neutron.common.utils.replace_file'),
+            mock.patch.object(jinja_cfg, '_config_digest',
+                              return_value='digest'),
+            mock.patch.object(jinja_cfg, '_read_file',
+                              return_value='digest'),
+            mock.patch('os.path.exists', return_value=True)
+        ) as (r_t, replace, digest, read_file, exists):
+            r_t.return_value = 'fake_rendered_template'
+            ret = jinja_cfg.save_config('test_conf_path', mock.Mock(),
+                                        'test_sock_path',
+                                        'nogroup',
+                                        'fake_state_path')
+            self.assertFalse(ret)
+            exists.assert_called_once_with('test_conf_path')
+            self.assertFalse(replace.called)
+
+    def test_save_config_missing_config(self):
+        with contextlib.nested(
+            mock.patch('neutron_lbaas.services.loadbalancer.'
+                       'drivers.haproxy.jinja_cfg.render_loadbalancer_obj'),
+            mock.patch('neutron.common.utils.replace_file'),
+            mock.patch.object(jinja_cfg, '_config_digest',
+                              return_value='digest'),
+            mock.patch.object(jinja_cfg, '_read_file',
+                              return_value='digest'),
+            mock.patch('os.path.exists', return_value=False)
+        ) as (r_t, replace, digest, read_file, exists):
+            r_t.return_value = 'fake_rendered_template'
+            ret = jinja_cfg.save_config('test_conf_path', mock.Mock(),
+                                        'test_sock_path',
+                                        'nogroup',
+                                        'fake_state_path')
+            self.assertTrue(ret)
+            self.assertEqual(2, replace.call_count)
+
+    @mock.patch('os.remove')
+    def test_discard_digest(self, remove):
+        jinja_cfg.discard_digest('test_conf_path')
+        remove.assert_called_once_with('test_conf_path.sha256')
+        remove.side_effect = OSError
+        jinja_cfg.discard_digest('test_conf_path')
+
+    def test_config_digest(self):
+        lb = sample_configs.sample_loadbalancer_tuple()
+        with contextlib.nested(
+            mock.patch('os.path.isdir', return_value=True),
+            mock.patch('os.listdir', return_value=['b.pem', 'a.pem',
+                                                   'other']),
+            mock.patch('__builtin__.open')
+        ) as (isdir, listdir, mock_open):
+            crt = mock_open.return_value.__enter__.return_value
+            crt.read.side_effect = ['pem_a', 'pem_b', 'pem_a', 'pem_c']
+            digest1 = jinja_cfg._config_digest(u'cfg', lb, '/v2')
+            digest2 = jinja_cfg._config_digest(u'cfg', lb, '/v2')
+            isdir.assert_called_with('/v2/sample_listener_id_1')
+            mock_open.assert_has_calls([
+                mock.call('/v2/sample_listener_id_1/a.pem', 'rb'),
+                mock.call('/v2/sample_listener_id_1/b.pem', 'rb')],
+                any_order=True)
+            self.assertNotEqual(digest1, digest2)
 
     def test_get_template(self):
         template = jinja_cfg._get_template()
@@ -162,6 +238,32 @@ class TestHaproxyCfg(base.BaseTestCase):
             sample_configs.sample_base_expected_config(backend=be),
             rendered_obj)
 
+    def test_render_template_member_admin_state_down(self):
+        be = ("backend sample_pool_id_1\n"
+              "    mode http\n"
+              "    balance roundrobin\n"
+              "    cookie SRV insert indirect nocache\n"
+              "    timeout check 31\n"
+              "    option httpchk GET /index.html\n"
+              "    http-check expect rstatus %s\n"
+              "    option forwardfor\n"
+              "    server sample_member_id_1 10.0.0.99:82 "
+              "weight 13 check inter 30s fall 3 cookie sample_member_id_1\n"
+              "    server sample_member_id_2 10.0.0.98:82 "
+              "weight 13 check inter 30s fall 3 cookie sample_member_id_2 "
+              "disabled\n\n"
+              % sample_configs.PIPED_CODES)
+        lb = sample_configs.sample_loadbalancer_tuple()
+        lb.listeners[0].default_pool.members[1] = (
+            sample_configs.sample_member_tuple('sample_member_id_2',
+                                               '10.0.0.98',
+                                               admin_state_up=False))
+        rendered_obj = jinja_cfg.render_loadbalancer_obj(
+            lb, 'nogroup', '/sock_path', '/v2')
+        self.assertEqual(
+            sample_configs.sample_base_expected_config(backend=be),
+            rendered_obj)
+
     def test_render_template_https(self):
         fe = ("frontend sample_listener_id_1\n"
               "    option tcplog\n"
@@ -331,6 +433,43 @@ class TestHaproxyCfg(base.BaseTestCase):
                         '/v2/loadbalancers/sample_listener_id_1/fakeCNM.pem',
                         ret)
 
+    def test_store_listener_crt_unchanged(self):
+        l = sample_configs.sample_listener_tuple(tls=True, sni=True)
+        pem = jinja_cfg._build_pem(l.default_tls_container)
+        with contextlib.nested(
+            mock.patch('os.makedirs'),
+            mock.patch('neutron.common.utils.replace_file'),
+            mock.patch.object(jinja_cfg, '_read_file', return_value=pem)
+        ) as (makedirs, replace, read_file):
+            ret = jinja_cfg._store_listener_crt(
+                '/v2/loadbalancers', l, l.default_tls_container)
+            read_file.assert_called_once_with(ret)
+            self.assertFalse(replace.called)
+
+    def test_store_listener_crt_remembers_digest(self):
+        l = sample_configs.sample_listener_tuple(tls=True, sni=True)
+        with contextlib.nested(
+            mock.patch('os.makedirs'),
+            mock.patch('os.path.exists', return_value=True),
+            mock.patch('neutron.common.utils.replace_file'),
+            mock.patch.object(jinja_cfg, '_read_file', return_value=None),
+            mock.patch.dict(jinja_cfg._STORED_PEM_DIGESTS, clear=True)
+        ) as (makedirs, exists, replace, read_file, digests):
+            for _i in range(2):
+                jinja_cfg._store_listener_crt(
+                    '/v2/loadbalancers', l, l.default_tls_container)
+            self.assertEqual(1, read_file.call_count)
+            self.assertEqual(1, replace.call_count)
+
+    def test_forget_stored_certificates(self):
+        with mock.patch.dict(jinja_cfg._STORED_PEM_DIGESTS, {
+                '/v2/lb1/listener1/cn.pem': 'a',
+                '/v2/lb1/listener2/cn.pem': 'b',
+                '/v2/lb10/listener3/cn.pem': 'c'}, clear=True):
+            jinja_cfg.forget_stored_certificates('/v2/lb1/')
+            self.assertEqual({'/v2/lb10/listener3/cn.pem': 'c'},
+                             jinja_cfg._STORED_PEM_DIGESTS)
+
     def test_process_tls_certificates(self):
         sl = sample_configs.sample_listener_tuple(tls=True, sni=True)
         tls = data_models.TLSContainer(primary_cn='fakeCN',
@@ -347,21 +486,18 @@ class TestHaproxyCfg(base.BaseTestCase):
             mock.patch.object(jinja_cfg, '_map_cert_tls_container'),
             mock.patch.object(jinja_cfg, '_store_listener_crt'),
             mock.patch.object(cert_parser, 'get_host_names'),
-            mock.patch.object(jinja_cfg, 'CERT_MANAGER_PLUGIN')
+            mock.patch.object(jinja_cfg, 'CERT_MANAGER')
         ) as (map, store_cert, get_host_names, cert_mgr):
             map.return_value = tls
-            cert_mgr_mock = mock.Mock(spec=cert_manager.CertManager)
-            cert_mgr_mock.get_cert.return_value = cert
-            cert_mgr.CertManager.return_value = cert_mgr_mock
+            cert_mgr.get_certs.return_value = [cert, cert, cert]
             get_host_names.return_value = {'cn': 'fakeCN'}
             jinja_cfg._process_tls_certificates(sl)
 
-            # Ensure get_cert is called three times
-            calls_certs = [
-                mock.call(sl.default_tls_container.id),
-                mock.call('cont_id_2'),
-                mock.call('cont_id_3')]
-            cert_mgr_mock.get_cert.call_args_list == calls_certs
+            # Ensure the three certs are read at once
+            cert_mgr.get_certs.assert_called_once_with(
+                [sl.default_tls_container_id, 'cont_id_2', 'cont_id_3'],
+                check_only=True)
+            self.assertEqual(3, map.call_count)
 
             # Ensure store_cert is called three times
             calls_ac = [mock.call('/v2/',
@@ -468,12 +604,12 @@ class TestHaproxyCfg(base.BaseTestCase):
                                                '10.0.0.99', status='PENDING'))
         self.assertFalse(ret)
 
-    def test_include_member_invalid_admin_state(self):
+    def test_include_member_admin_state_down(self):
         ret = jinja_cfg._include_member(
             sample_configs.sample_member_tuple('sample_member_id_1',
                                                '10.0.0.99',
                                                admin_state_up=False))
-        self.assertFalse(ret)
+        self.assertTrue(ret)
 
     def test_expand_expected_codes(self):
         exp_codes = ''
@@ -42,9 +42,9 @@ class TestNSClient(testlib_api.WebTestCase):
     def setUp(self):
         self.log = mock.patch.object(ncc_client, 'LOG').start()
         super(TestNSClient, self).setUp()
-        # mock the requests.request function call
-        self.request_method_mock = mock.Mock()
-        requests.request = self.request_method_mock
+        # mock the request function of the session
+        self.request_method_mock = mock.patch.object(
+            requests.Session, 'request').start()
         self.testclient = self._get_nsclient()
         self.testclient.login = mock.Mock()
         self.testclient.login.side_effect = self.mock_auth_func(
@@ -83,7 +83,7 @@ class TestNSClient(testlib_api.WebTestCase):
         fake_response = requests.Response()
         fake_response.status_code = requests.codes.unavailable
         fake_response.headers = []
-        requests.request.return_value = fake_response
+        self.request_method_mock.return_value = fake_response
         resource_path = netscaler_driver.VIPS_RESOURCE
         resource_name = netscaler_driver.VIP_RESOURCE
         resource_body = self._get_testvip_httpbody_for_create()
@@ -194,6 +194,56 @@ class TestNSClient(testlib_api.WebTestCase):
             headers=mock.ANY,
             data=mock.ANY)
 
+    def test_session_renewed_after_ttl(self):
+        fake_response = requests.Response()
+        fake_response.status_code = requests.codes.ok
+        fake_response.headers = []
+        self.request_method_mock.return_value = fake_response
+        self.testclient.auth_expires = 1000
+        resource_path = "%s/%s" % (netscaler_driver.VIPS_RESOURCE,
+                                   TESTVIP_ID)
+        with mock.patch('time.time', return_value=999):
+            self.testclient.remove_resource(TEST_TENANT_ID, resource_path)
+        self.assertFalse(self.testclient.login.called)
+        with mock.patch('time.time', return_value=1000):
+            self.testclient.remove_resource(TEST_TENANT_ID, resource_path)
+        self.testclient.login.assert_called_once_with()
+
+    def test_relogin_result_returned(self):
+        unauthorized = requests.Response()
+        unauthorized.status_code = requests.codes.unauthorized
+        unauthorized.headers = []
+        ok = requests.Response()
+        ok.status_code = requests.codes.ok
+        ok.headers = []
+        self.request_method_mock.side_effect = [unauthorized, ok]
+        resource_path = "%s/%s" % (netscaler_driver.VIPS_RESOURCE,
+                                   TESTVIP_ID)
+        status, resp_dict = self.testclient.remove_resource(TEST_TENANT_ID,
+                                                            resource_path)
+        self.assertEqual(requests.codes.ok, status)
+        self.testclient.login.assert_called_once_with()
+
+    def test_request_stats(self):
+        fake_response = requests.Response()
+        fake_response.status_code = requests.codes.unavailable
+        fake_response.headers = []
+        self.request_method_mock.return_value = fake_response
+        resource_path = "%s/%s" % (netscaler_driver.VIPS_RESOURCE,
+                                   TESTVIP_ID)
+        self.assertRaises(ncc_client.NCCException,
+                          self.testclient.remove_resource,
+                          TEST_TENANT_ID, resource_path)
+        stats = self.testclient.stats.get()[('DELETE', 'vips/{id}')]
+        self.assertEqual(1, stats['requests'])
+        self.assertEqual(1, stats['errors'])
+
+    def test_request_stats_logged(self):
+        client = ncc_client.NSClient(TESTURI, TEST_USERNAME, TEST_PASSWORD,
+                                     stats_log_interval=60)
+        self.assertEqual(60, client.stats.log_interval)
+        self.assertEqual(0, self.testclient.stats.log_interval)
+
     def _get_nsclient(self):
         return ncc_client.NSClient(TESTURI, TEST_USERNAME, TEST_PASSWORD)
 
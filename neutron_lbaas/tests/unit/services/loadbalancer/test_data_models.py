@@ -0,0 +1,76 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import copy
+
+from neutron_lbaas.db.loadbalancer import models
+from neutron_lbaas.services.loadbalancer import data_models
+from neutron_lbaas.tests import base
+from neutron_lbaas.tests.benchmark import data_models as bench
+
+
+class TestDataModels(base.BaseTestCase):
+
+    def setUp(self):
+        super(TestDataModels, self).setUp()
+        self.lb_db = bench.build_loadbalancer(listeners=2, members=6)
+
+    def test_from_sqlalchemy_model(self):
+        lb = data_models.LoadBalancer.from_sqlalchemy_model(self.lb_db)
+        self.assertEqual(self.lb_db.id, lb.id)
+        self.assertEqual('haproxy', lb.provider.provider_name)
+        self.assertEqual(0, lb.stats.bytes_in)
+        self.assertIsNone(lb.stats.loadbalancer)
+        self.assertIsNone(lb.vip_port)
+        self.assertEqual([l.id for l in self.lb_db.listeners],
+                         [l.id for l in lb.listeners])
+        for listener, listener_db in zip(lb.listeners, self.lb_db.listeners):
+            # references back to the referring object are not followed
+            self.assertIsNone(listener.loadbalancer)
+            pool = listener.default_pool
+            self.assertIsNone(pool.listener)
+            self.assertEqual([m.id for m in listener_db.default_pool.members],
+                             [m.id for m in pool.members])
+            for member in pool.members:
+                self.assertIsNone(member.pool)
+            self.assertEqual('HTTP', pool.healthmonitor.type)
+            self.assertEqual('HTTP_COOKIE', pool.session_persistence.type)
+
+    def test_from_sqlalchemy_model_root_loadbalancer(self):
+        member_db = self.lb_db.listeners[0].default_pool.members[0]
+        member = data_models.Member.from_sqlalchemy_model(member_db)
+        self.assertEqual(self.lb_db.id, member.root_loadbalancer.id)
+        self.assertEqual(3, len(member.pool.members))
+
+    def test_from_sqlalchemy_model_empty_relationships(self):
+        pool = data_models.Pool.from_sqlalchemy_model(models.PoolV2(id='p'))
+        self.assertEqual('p', pool.id)
+        self.assertEqual([], pool.members)
+        self.assertIsNone(pool.healthmonitor)
+        self.assertIsNone(pool.listener)
+
+    def test_conversion_plan_cached(self):
+        plan = data_models._conversion_plan(data_models.Member,
+                                            models.MemberV2)
+        self.assertIs(plan, data_models._conversion_plan(data_models.Member,
+                                                         models.MemberV2))
+        kinds = dict((attr, kind) for attr, source, kind, related in plan)
+        self.assertEqual(data_models._COLUMN, kinds['address'])
+        self.assertEqual(data_models._SCALAR, kinds['pool'])
+
+    def test_to_dict_from_dict_round_trip(self):
+        lb = data_models.LoadBalancer.from_sqlalchemy_model(self.lb_db)
+        lb_dict = lb.to_dict(stats=False)
+        self.assertNotIn('stats', lb_dict)
+        lb_copy = data_models.LoadBalancer.from_dict(copy.deepcopy(lb_dict))
+        self.assertEqual(lb_dict['listeners'],
+                         lb_copy.to_dict()['listeners'])
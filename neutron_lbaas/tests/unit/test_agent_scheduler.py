@@ -16,6 +16,7 @@
 
 import copy
 from datetime import datetime
+from datetime import timedelta
 
 import mock
 from neutron.api import extensions
@@ -30,9 +31,11 @@ from neutron.tests.unit.api import test_extensions
 from neutron.tests.unit.db import test_agentschedulers_db
 import neutron.tests.unit.extensions
 from neutron.tests.unit.extensions import test_agent
+from oslo_config import cfg
 import six
 from webob import exc
 
+from neutron_lbaas import agent_scheduler
 from neutron_lbaas.drivers.haproxy import plugin_driver
 from neutron_lbaas.extensions import lbaas_agentschedulerv2
 from neutron_lbaas.services.loadbalancer import constants as lb_const
@@ -62,6 +65,17 @@ class AgentSchedulerTestMixIn(test_agentschedulers_db.AgentSchedulerTestMixIn):
         return self._request_list(path, expected_code=expected_code,
                                   admin_context=admin_context)
 
+    def _evacuate_lbaas_agent(self, agent_id,
+                              expected_code=exc.HTTPCreated.code):
+        path = "/agents/%s/%s.%s" % (agent_id,
+                                     lbaas_agentschedulerv2
+                                     .LOADBALANCER_EVACUATION,
+                                     self.fmt)
+        req = self._path_create_request(path, {})
+        res = req.get_response(self.ext_api)
+        self.assertEqual(expected_code, res.status_int)
+        return self.deserialize(self.fmt, res)
+
 
 class LBaaSAgentSchedulerTestCase(test_agent.AgentDBTestMixIn,
                                   AgentSchedulerTestMixIn,
@@ -70,7 +84,8 @@ class LBaaSAgentSchedulerTestCase(test_agent.AgentDBTestMixIn,
     fmt = 'json'
     plugin_str = 'neutron.plugins.ml2.plugin.Ml2Plugin'
 
-    def _register_agent_states(self, lbaas_agents=False):
+    def _register_agent_states(self, lbaas_agents=False,
+                               rpc_api_version='1.2'):
         res = super(LBaaSAgentSchedulerTestCase, self)._register_agent_states(
             lbaas_agents=lbaas_agents)
         if lbaas_agents:
@@ -81,6 +96,9 @@ class LBaaSAgentSchedulerTestCase(test_agent.AgentDBTestMixIn,
                 'configurations': {'device_drivers': [
                     plugin_driver.HaproxyOnHostPluginDriver.device_driver]},
                 'agent_type': lb_const.AGENT_TYPE_LOADBALANCERV2}
+            if rpc_api_version:
+                lbaas_hosta['configurations']['rpc_api_version'] = (
+                    rpc_api_version)
             lbaas_hostb = copy.deepcopy(lbaas_hosta)
             lbaas_hostb['host'] = test_agent.LBAAS_HOSTB
             callback = agents_db.AgentExtRpcCallback()
@@ -254,3 +272,166 @@ class LBaaSAgentSchedulerTestCase(test_agent.AgentDBTestMixIn,
             self.lbaas_plugin.db.update_loadbalancer_provisioning_status(
                 self.adminContext, loadbalancer['loadbalancer']['id']
             )
+
+    def _kill_agent(self, agent_id):
+        with self.adminContext.session.begin(subtransactions=True):
+            query = self.adminContext.session.query(agents_db.Agent)
+            query.filter_by(id=agent_id).update(
+                {'heartbeat_timestamp': datetime.utcnow() -
+                 timedelta(hours=1)})
+
+    def test_reschedule_loadbalancers_from_down_agents(self):
+        self._register_agent_states(lbaas_agents=True)
+        driver = self.lbaas_plugin.drivers['lbaas']
+        create_lbs = mock.patch.object(driver.agent_rpc,
+                                       'create_loadbalancers').start()
+        with self.loadbalancer() as loadbalancer:
+            lb_id = loadbalancer['loadbalancer']['id']
+            old_agent = self._get_lbaas_agent_hosting_loadbalancer(
+                lb_id)['agent']
+            self._kill_agent(old_agent['id'])
+            self.lbaas_plugin.db.reschedule_loadbalancers_from_down_agents(
+                self.lbaas_plugin)
+            new_agent = self._get_lbaas_agent_hosting_loadbalancer(
+                lb_id)['agent']
+            self.assertNotEqual(old_agent['id'], new_agent['id'])
+            create_lbs.assert_called_once_with(
+                mock.ANY, mock.ANY, new_agent['host'], driver.device_driver)
+            self.assertEqual([lb_id],
+                             [lb.id for lb in create_lbs.call_args[0][1]])
+            self.lbaas_plugin.db.update_loadbalancer_provisioning_status(
+                self.adminContext, lb_id)
+
+    def test_reschedule_loadbalancers_without_live_agent(self):
+        self._register_agent_states(lbaas_agents=True)
+        driver = self.lbaas_plugin.drivers['lbaas']
+        create_lbs = mock.patch.object(driver.agent_rpc,
+                                       'create_loadbalancers').start()
+        with self.loadbalancer() as loadbalancer:
+            lb_id = loadbalancer['loadbalancer']['id']
+            for lbaas_agent in self.lbaas_plugin.db.get_lbaas_agents(
+                    self.adminContext):
+                self._kill_agent(lbaas_agent['id'])
+            old_agent = self._get_lbaas_agent_hosting_loadbalancer(
+                lb_id)['agent']
+            self.lbaas_plugin.db.reschedule_loadbalancers_from_down_agents(
+                self.lbaas_plugin)
+            self.assertEqual(
+                old_agent['id'],
+                self._get_lbaas_agent_hosting_loadbalancer(
+                    lb_id)['agent']['id'])
+            self.assertFalse(create_lbs.called)
+            self.lbaas_plugin.db.update_loadbalancer_provisioning_status(
+                self.adminContext, lb_id)
+
+    def test_evacuate_lbaas_agent(self):
+        self._register_agent_states(lbaas_agents=True)
+        driver = self.lbaas_plugin.drivers['lbaas']
+        create_lbs = mock.patch.object(driver.agent_rpc,
+                                       'create_loadbalancers').start()
+        with self.loadbalancer() as loadbalancer:
+            lb_id = loadbalancer['loadbalancer']['id']
+            old_agent = self._get_lbaas_agent_hosting_loadbalancer(
+                lb_id)['agent']
+            res = self._evacuate_lbaas_agent(old_agent['id'])
+            self.assertEqual({'loadbalancers': [lb_id]}, res)
+            self.assertFalse(self._show('agents', old_agent['id'])[
+                'agent']['admin_state_up'])
+            new_agent = self._get_lbaas_agent_hosting_loadbalancer(
+                lb_id)['agent']
+            self.assertNotEqual(old_agent['id'], new_agent['id'])
+            self.assertEqual(1, create_lbs.call_count)
+            self.lbaas_plugin.db.update_loadbalancer_provisioning_status(
+                self.adminContext, lb_id)
+
+    def test_evacuate_lbaas_agent_before_rpc_1_2(self):
+        self._register_agent_states(lbaas_agents=True, rpc_api_version=None)
+        driver = self.lbaas_plugin.drivers['lbaas']
+        create_lbs = mock.patch.object(driver.agent_rpc,
+                                       'create_loadbalancers').start()
+        create_lb = mock.patch.object(driver.agent_rpc,
+                                      'create_loadbalancer').start()
+        with self.loadbalancer() as loadbalancer:
+            lb_id = loadbalancer['loadbalancer']['id']
+            old_agent = self._get_lbaas_agent_hosting_loadbalancer(
+                lb_id)['agent']
+            self._evacuate_lbaas_agent(old_agent['id'])
+            new_agent = self._get_lbaas_agent_hosting_loadbalancer(
+                lb_id)['agent']
+            self.assertFalse(create_lbs.called)
+            create_lb.assert_called_once_with(
+                mock.ANY, mock.ANY, new_agent['host'], driver.device_driver)
+            self.assertEqual(lb_id, create_lb.call_args[0][1].id)
+            self.lbaas_plugin.db.update_loadbalancer_provisioning_status(
+                self.adminContext, lb_id)
+
+    def test_evacuate_non_lbaas_agent(self):
+        self._register_agent_states(lbaas_agents=True)
+        agent_id = [a['id'] for a in self._list('agents')['agents']
+                    if a['agent_type'] !=
+                    lb_const.AGENT_TYPE_LOADBALANCERV2][0]
+        self._evacuate_lbaas_agent(agent_id,
+                                   expected_code=exc.HTTPNotFound.code)
+        self.assertTrue(
+            self._show('agents', agent_id)['agent']['admin_state_up'])
+
+    def test_evacuate_lbaas_agent_non_admin_access(self):
+        self._register_agent_states(lbaas_agents=True)
+        agent_id = self.lbaas_plugin.db.get_lbaas_agents(
+            self.adminContext)[0]['id']
+        path = "/agents/%s/%s.%s" % (agent_id,
+                                     lbaas_agentschedulerv2
+                                     .LOADBALANCER_EVACUATION,
+                                     self.fmt)
+        req = self._path_create_request(path, {}, admin_context=False)
+        res = req.get_response(self.ext_api)
+        self.assertEqual(exc.HTTPForbidden.code, res.status_int)
+
+    def test_get_lbaas_agent_loads(self):
+        self._register_agent_states(lbaas_agents=True)
+        agent_ids = [a['id'] for a in self.lbaas_plugin.db.get_lbaas_agents(
+            self.adminContext)]
+        with self.loadbalancer() as loadbalancer:
+            lb_id = loadbalancer['loadbalancer']['id']
+            hosting = self._get_lbaas_agent_hosting_loadbalancer(lb_id)
+            self.lbaas_plugin.db.update_loadbalancer_stats(
+                self.adminContext, lb_id,
+                {'bytes_in': 10, 'bytes_out': 20, 'active_connections': 3,
+                 'total_connections': 5})
+            loads = self.lbaas_plugin.db.get_lbaas_agent_loads(
+                self.adminContext, agent_ids)
+            expected = dict((agent_id, (0, 0, 0)) for agent_id in agent_ids)
+            expected[hosting['agent']['id']] = (1, 3, 30)
+            self.assertEqual(expected, loads)
+            self.lbaas_plugin.db.update_loadbalancer_provisioning_status(
+                self.adminContext, lb_id)
+
+
+class TestLeastLoadedScheduler(base.BaseTestCase):
+
+    def setUp(self):
+        super(TestLeastLoadedScheduler, self).setUp()
+        self.plugin = mock.Mock()
+        self.plugin.db.get_lbaas_agent_loads.return_value = {
+            'a': (2, 10, 1000), 'b': (3, 0, 0), 'c': (2, 50, 10)}
+        self.candidates = [{'id': 'a'}, {'id': 'b'}, {'id': 'c'}]
+        self.scheduler = agent_scheduler.LeastLoadedScheduler()
+
+    def _schedule(self):
+        return self.scheduler._schedule(self.candidates, self.plugin,
+                                        mock.sentinel.context)
+
+    def test_least_instances(self):
+        self.assertEqual({'id': 'a'}, self._schedule())
+        self.plugin.db.get_lbaas_agent_loads.assert_called_once_with(
+            mock.sentinel.context, ['a', 'b', 'c'])
+
+    def test_weighted_connections(self):
+        cfg.CONF.set_override('loadbalancer_scheduler_connection_weight', 1)
+        self.assertEqual({'id': 'b'}, self._schedule())
+
+    def test_weighted_traffic(self):
+        cfg.CONF.set_override('loadbalancer_scheduler_traffic_weight', 1)
+        self.assertEqual({'id': 'b'}, self._schedule())
+        cfg.CONF.set_override('loadbalancer_scheduler_instance_weight', 1000)
+        self.assertEqual({'id': 'c'}, self._schedule())